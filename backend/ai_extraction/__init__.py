@@ -3,11 +3,15 @@ AI Extraction module using Google Gemini Flash for medical device entity extract
 """
 
 from .gemini_client import GeminiClient
-from .prompt_templates import MedicalDevicePrompts
+from .prompt_templates import MedicalDevicePrompts, PromptParts
 from .entity_parser import MedicalEntityParser
+from .prompt_cache import PromptCache, SemanticPromptCache
 
 __all__ = [
     'GeminiClient',
     'MedicalDevicePrompts', 
-    'MedicalEntityParser'
+    'PromptParts',
+    'MedicalEntityParser',
+    'PromptCache',
+    'SemanticPromptCache'
 ]
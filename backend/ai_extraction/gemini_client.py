@@ -10,7 +10,10 @@ from dataclasses import dataclass
 import google.generativeai as genai
 from loguru import logger
 import time
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, stop_after_attempt, wait_exponential, wait_random
+
+from .prompt_templates import MedicalDevicePrompts
+from .prompt_cache import PromptCache, SemanticPromptCache, normalize_page_content
 
 
 @dataclass
@@ -23,6 +26,9 @@ class ExtractionConfig:
     top_k: int = 10
     timeout: int = 300
     retry_attempts: int = 3
+    enable_response_cache: bool = True
+    response_cache_ttl: int = 3600
+    semantic_cache_threshold: Optional[float] = None  # e.g. 0.92, requires temperature 0
 
 
 class GeminiClient:
@@ -55,9 +61,30 @@ class GeminiClient:
             }
         )
         
+        # Prompt builder (stateless, its prompt caches are shared at class level)
+        self.prompt_builder = MedicalDevicePrompts()
+        
+        # Exact-match cache so repeated pages skip the Gemini round-trip, plus an
+        # embedding-similarity tier for near-duplicate pages on deterministic runs
+        self.response_cache = None
+        if self.config.semantic_cache_threshold is not None:
+            if self.config.temperature != 0:
+                logger.warning("Semantic response cache requires temperature 0, using exact-match cache only")
+            else:
+                try:
+                    self.response_cache = SemanticPromptCache(
+                        similarity_threshold=self.config.semantic_cache_threshold,
+                        default_ttl=self.config.response_cache_ttl
+                    )
+                except ImportError:
+                    logger.warning("Semantic response cache requires sentence-transformers, using exact-match cache only")
+        if self.response_cache is None:
+            self.response_cache = PromptCache(default_ttl=self.config.response_cache_ttl)
+        
         logger.info(f"Gemini client initialized with model: {self.config.model}")
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    # Jitter keeps concurrent pages from retrying in lockstep after a 429
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10) + wait_random(0, 2))
     async def extract_medical_entities(
         self,
         page_content: str,
@@ -89,15 +116,15 @@ class GeminiClient:
                 extraction_focus = ["error_codes", "components", "procedures", "safety_protocols"]
         
         try:
-            # Build extraction prompt
+            # Build extraction prompts (oversized pages are split into several)
             if hierarchical_mode:
-                prompt = self._build_hierarchical_extraction_prompt(
+                prompts = [self._build_hierarchical_extraction_prompt(
                     page_content=page_content,
                     device_type=device_type,
                     focus_subsystem=focus_subsystem
-                )
+                )]
             else:
-                prompt = self._build_extraction_prompt(
+                prompts = self._build_extraction_prompts(
                     page_content=page_content,
                     device_type=device_type,
                     manual_type=manual_type,
@@ -106,11 +133,20 @@ class GeminiClient:
             
             logger.info(f"Starting Gemini extraction for {device_type} content")
             
-            # Generate response
-            response = await self._generate_response(prompt)
-            
-            # Parse response
-            entities = self._parse_gemini_response(response)
+            entities = {}
+            for prompt in prompts:
+                # Generate response
+                response = await self._generate_response(
+                    prompt,
+                    page_content=page_content if len(prompts) == 1 else None
+                )
+                
+                # Parse response and merge entities from each chunk
+                for entity_type, value in self._parse_gemini_response(response).items():
+                    if isinstance(value, list) and isinstance(entities.get(entity_type), list):
+                        entities[entity_type].extend(value)
+                    else:
+                        entities.setdefault(entity_type, value)
             
             # Add metadata
             entities["extraction_metadata"] = {
@@ -132,8 +168,46 @@ class GeminiClient:
             logger.error(f"Error in Gemini extraction: {str(e)}")
             raise
     
-    async def _generate_response(self, prompt: str) -> str:
-        """Generate response from Gemini with error handling"""
+    async def _generate_response(self, prompt: str, page_content: Optional[str] = None) -> str:
+        """
+        Generate response from Gemini with error handling
+        
+        Args:
+            prompt: Full prompt text
+            page_content: Page text at the end of the prompt, enables the
+                similarity cache tier when configured
+        """
+        
+        cache_key = None
+        namespace = None
+        normalized_page = None
+        if self.config.enable_response_cache:
+            if page_content is not None:
+                # Key on the prompt prefix plus the normalized page so pages that
+                # differ only in whitespace or Unicode form share an entry
+                prefix = prompt[:len(prompt) - len(page_content)]
+                normalized_page = normalize_page_content(page_content)
+                cache_key = PromptCache.cache_key(
+                    self.config.model, str(self.config.temperature), prefix, normalized_page
+                )
+            else:
+                cache_key = PromptCache.cache_key(self.config.model, str(self.config.temperature), prompt)
+            
+            cached_response = self.response_cache.get(cache_key)
+            if cached_response is not None:
+                logger.info("Using cached Gemini response")
+                return cached_response
+            
+            if isinstance(self.response_cache, SemanticPromptCache) and normalized_page is not None:
+                # Near-duplicate pages only match under an identical prompt prefix
+                namespace = PromptCache.cache_key(self.config.model, prefix)
+                # Embedding the page is blocking, keep it off the event loop
+                cached_response = await asyncio.to_thread(
+                    self.response_cache.get_similar, namespace, normalized_page
+                )
+                if cached_response is not None:
+                    logger.info("Using cached Gemini response for near-duplicate page")
+                    return cached_response
         
         try:
             response = await asyncio.wait_for(
@@ -143,6 +217,13 @@ class GeminiClient:
             
             if not response.text:
                 raise ValueError("Empty response from Gemini")
+            
+            if cache_key is not None:
+                self.response_cache.set(cache_key, response.text)
+            if namespace is not None:
+                await asyncio.to_thread(
+                    self.response_cache.add_similar, namespace, normalized_page, response.text
+                )
                 
             return response.text
             
@@ -153,25 +234,21 @@ class GeminiClient:
             logger.error(f"Gemini API error: {str(e)}")
             raise
     
-    def _build_extraction_prompt(
+    def _build_extraction_prompts(
         self,
         page_content: str,
         device_type: str,
         manual_type: str,
         extraction_focus: List[str]
-    ) -> str:
-        """Build specialized prompt for medical device extraction"""
-        
-        from .prompt_templates import MedicalDevicePrompts
-        
-        prompt_builder = MedicalDevicePrompts()
+    ) -> List[str]:
+        """Build specialized prompts for medical device extraction, one per size-bounded chunk"""
         
-        return prompt_builder.build_extraction_prompt(
+        return list(self.prompt_builder.build_extraction_prompts(
             page_content=page_content,
             device_type=device_type,
             manual_type=manual_type,
             extraction_focus=extraction_focus
-        )
+        ))
     
     def _build_hierarchical_extraction_prompt(
         self,
@@ -181,11 +258,7 @@ class GeminiClient:
     ) -> str:
         """Build specialized prompt for hierarchical ontology extraction"""
         
-        from .prompt_templates import MedicalDevicePrompts
-        
-        prompt_builder = MedicalDevicePrompts()
-        
-        return prompt_builder.build_hierarchical_extraction_prompt(
+        return self.prompt_builder.build_hierarchical_extraction_prompt(
             page_content=page_content,
             device_type=device_type,
             focus_subsystem=focus_subsystem
@@ -408,16 +481,15 @@ class GeminiClient:
             from .prompt_templates import build_relationship_detection_prompt
             
             # Build relationship detection prompt
-            prompt = build_relationship_detection_prompt(
+            prompt_parts = build_relationship_detection_prompt(
                 entities=entities,
-                context_text=context_text,
-                device_type=device_type
+                context_text=context_text
             )
             
             logger.info(f"Starting relationship extraction for {len(entities)} entities")
             
-            # Generate response
-            response = await self._generate_response(prompt)
+            # Generate response; the static system part leads the request text
+            response = await self._generate_response(prompt_parts.text)
             
             # Parse response
             relationships = self._parse_gemini_response(response)
@@ -461,15 +533,15 @@ class GeminiClient:
             from .prompt_templates import build_linac_subsystem_prompt
             
             # Build subsystem-specific prompt
-            prompt = build_linac_subsystem_prompt(
+            prompt_parts = build_linac_subsystem_prompt(
                 page_content=page_content,
                 target_subsystem=subsystem_name
             )
             
             logger.info(f"Starting subsystem extraction for {subsystem_name}")
             
-            # Generate response
-            response = await self._generate_response(prompt)
+            # Generate response; the static system part leads the request text
+            response = await self._generate_response(prompt_parts.text)
             
             # Parse response
             entities = self._parse_gemini_response(response)
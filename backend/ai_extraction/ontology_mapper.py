@@ -3,15 +3,27 @@ Ontology Concept Mapper for Medical Device Entities
 Maps extracted entities to standard medical device ontology concepts
 """
 
-import re
 import json
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+import re
+import string
+from typing import Dict, List, Any, Optional, Tuple, FrozenSet
+from dataclasses import dataclass, asdict, field
 from loguru import logger
 import uuid
 from datetime import datetime
 
 
+# Punctuation -> space table used by concept-name normalization of ASCII
+# names. Underscore is kept because it is a word character under ``[^\w\s]``,
+# which still handles names with non-ASCII symbols (dashes, degree signs, ...)
+_PUNCT_TABLE = str.maketrans({c: ' ' for c in string.punctuation if c != '_'})
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+
+# Cached name-based mapping result:
+# (concept_id, concept_name, confidence, mapping_type, evidence, uses_entity_id)
+MappingTemplate = Tuple[str, str, float, str, str, bool]
+
+
 @dataclass
 class OntologyConcept:
     """Standard ontology concept"""
@@ -23,6 +35,12 @@ class OntologyConcept:
     synonyms: List[str] = None
     parent_concepts: List[str] = None
     
+    # Normalized names and word sets, filled in by the mapper at init
+    _normalized_name: str = field(default="", init=False, repr=False, compare=False)
+    _word_set: FrozenSet[str] = field(default=frozenset(), init=False, repr=False, compare=False)
+    _normalized_synonyms: List[str] = field(default_factory=list, init=False, repr=False, compare=False)
+    _synonym_word_sets: List[FrozenSet[str]] = field(default_factory=list, init=False, repr=False, compare=False)
+    
     def __post_init__(self):
         if self.synonyms is None:
             self.synonyms = []
@@ -61,6 +79,14 @@ class MedicalDeviceOntologyMapper:
         
         # Medical device ontology concepts
         self.medical_device_concepts = self._load_medical_device_concepts()
+        self._index_concept_terms()
+        
+        # Flattened (device_type, entity_type) -> concepts lookup
+        self._concepts_by_key: Dict[Tuple[str, str], List[OntologyConcept]] = {
+            (dt, et): concepts
+            for dt, type_concepts in self.medical_device_concepts.items()
+            for et, concepts in type_concepts.items()
+        }
         
         # UMLS terminology mappings
         self.umls_mappings = self._load_umls_mappings()
@@ -79,6 +105,9 @@ class MedicalDeviceOntologyMapper:
             "minimum": 0.5
         }
         
+        # Name-based mapping results keyed by (normalized_name, entity_type, device_type)
+        self._map_cache: Dict[Tuple[str, str, str], List[MappingTemplate]] = {}
+        
         logger.info("Medical device ontology mapper initialized")
     
     def map_entities_to_concepts(
@@ -127,58 +156,88 @@ class MedicalDeviceOntologyMapper:
     ) -> List[ConceptMapping]:
         """Map a single entity to ontology concepts"""
         
-        mappings = []
-        
         # Get entity name and properties
         entity_name = getattr(entity, 'name', getattr(entity, 'code', 'unknown'))
         entity_id = getattr(entity, 'id', str(uuid.uuid4()))
         
+        # Strategies 1-4 only depend on the normalized name, so reuse them
+        # across entities that share a name
+        cache_key = (self._normalize_concept_name(entity_name), entity_type, device_type)
+        templates = self._map_cache.get(cache_key)
+        if templates is None:
+            templates = self._build_mapping_templates(entity_name, entity_type, device_type)
+            self._map_cache[cache_key] = templates
+        
+        mappings = [
+            ConceptMapping(
+                entity_id=entity_id if uses_entity_id else str(uuid.uuid4()),
+                entity_name=entity_name,
+                entity_type=entity_type,
+                concept_id=concept_id,
+                concept_name=concept_name,
+                mapping_confidence=confidence,
+                mapping_type=mapping_type,
+                evidence=evidence
+            )
+            for concept_id, concept_name, confidence, mapping_type, evidence, uses_entity_id in templates
+        ]
+        
+        # 5. IEC 60601 compliance mapping (depends on description/function, never cached)
+        iec_mappings = self._map_to_iec_60601(entity, entity_type)
+        mappings.extend(iec_mappings)
+        
+        return mappings
+    
+    def _build_mapping_templates(
+        self,
+        entity_name: str,
+        entity_type: str,
+        device_type: str
+    ) -> List[MappingTemplate]:
+        """Run the name-based mapping strategies for one entity name"""
+        
+        templates = []
+        
         # Try different mapping strategies
         
         # 1. Exact match in medical device concepts
         exact_matches = self._find_exact_matches(entity_name, entity_type, device_type)
         for concept in exact_matches:
-            mapping = ConceptMapping(
-                entity_id=entity_id,
-                entity_name=entity_name,
-                entity_type=entity_type,
-                concept_id=concept.concept_id,
-                concept_name=concept.concept_name,
-                mapping_confidence=0.95,
-                mapping_type="exact_match",
-                evidence=f"Exact match in {concept.namespace}"
-            )
-            mappings.append(mapping)
+            templates.append((
+                concept.concept_id,
+                concept.concept_name,
+                0.95,
+                "exact_match",
+                f"Exact match in {concept.namespace}",
+                True
+            ))
         
         # 2. Partial match using synonyms
         if not exact_matches:
             partial_matches = self._find_partial_matches(entity_name, entity_type, device_type)
             for concept, confidence in partial_matches:
-                mapping = ConceptMapping(
-                    entity_id=entity_id,
-                    entity_name=entity_name,
-                    entity_type=entity_type,
-                    concept_id=concept.concept_id,
-                    concept_name=concept.concept_name,
-                    mapping_confidence=confidence,
-                    mapping_type="partial_match",
-                    evidence=f"Partial match in {concept.namespace}"
-                )
-                mappings.append(mapping)
+                templates.append((
+                    concept.concept_id,
+                    concept.concept_name,
+                    confidence,
+                    "partial_match",
+                    f"Partial match in {concept.namespace}",
+                    True
+                ))
         
         # 3. UMLS terminology mapping
-        umls_mappings = self._map_to_umls(entity_name, entity_type)
-        mappings.extend(umls_mappings)
-        
         # 4. SNOMED CT mapping
-        snomed_mappings = self._map_to_snomed(entity_name, entity_type)
-        mappings.extend(snomed_mappings)
-        
-        # 5. IEC 60601 compliance mapping
-        iec_mappings = self._map_to_iec_60601(entity, entity_type)
-        mappings.extend(iec_mappings)
-        
-        return mappings
+        for mapping in self._map_to_umls(entity_name, entity_type) + self._map_to_snomed(entity_name, entity_type):
+            templates.append((
+                mapping.concept_id,
+                mapping.concept_name,
+                mapping.mapping_confidence,
+                mapping.mapping_type,
+                mapping.evidence,
+                False
+            ))
+        
+        return templates
     
     def _find_exact_matches(
         self,
@@ -194,20 +253,17 @@ class MedicalDeviceOntologyMapper:
         normalized_name = self._normalize_concept_name(entity_name)
         
         # Search in device-specific concepts
-        device_concepts = self.medical_device_concepts.get(device_type, {})
-        type_concepts = device_concepts.get(entity_type, [])
+        type_concepts = self._concepts_by_key.get((device_type, entity_type), [])
         
         for concept in type_concepts:
             # Check exact match
-            if normalized_name == self._normalize_concept_name(concept.concept_name):
+            if normalized_name == concept._normalized_name:
                 matches.append(concept)
                 continue
             
             # Check synonyms
-            for synonym in concept.synonyms:
-                if normalized_name == self._normalize_concept_name(synonym):
-                    matches.append(concept)
-                    break
+            if normalized_name in concept._normalized_synonyms:
+                matches.append(concept)
         
         return matches
     
@@ -221,23 +277,27 @@ class MedicalDeviceOntologyMapper:
         
         matches = []
         
-        # Normalize entity name
+        # Normalize entity name and tokenize it once for all concepts
         normalized_name = self._normalize_concept_name(entity_name)
+        word_set = frozenset(normalized_name.split())
         
         # Search in device-specific concepts
-        device_concepts = self.medical_device_concepts.get(device_type, {})
-        type_concepts = device_concepts.get(entity_type, [])
+        type_concepts = self._concepts_by_key.get((device_type, entity_type), [])
         
         for concept in type_concepts:
             # Calculate similarity with concept name
-            similarity = self._calculate_name_similarity(normalized_name, concept.concept_name)
+            similarity = self._jaccard_similarity(
+                normalized_name, word_set, concept._normalized_name, concept._word_set
+            )
             
             if similarity >= self.similarity_thresholds["minimum"]:
                 matches.append((concept, similarity))
             
             # Check synonyms
-            for synonym in concept.synonyms:
-                synonym_similarity = self._calculate_name_similarity(normalized_name, synonym)
+            for synonym_name, synonym_words in zip(concept._normalized_synonyms, concept._synonym_word_sets):
+                synonym_similarity = self._jaccard_similarity(
+                    normalized_name, word_set, synonym_name, synonym_words
+                )
                 if synonym_similarity >= self.similarity_thresholds["minimum"]:
                     matches.append((concept, synonym_similarity))
         
@@ -391,14 +451,15 @@ class MedicalDeviceOntologyMapper:
         if not name or name == "unknown":
             return ""
         
-        # Convert to lowercase
+        # Convert to lowercase and replace special characters with spaces
         normalized = name.lower()
+        if normalized.isascii():
+            normalized = normalized.translate(_PUNCT_TABLE)
+        else:
+            normalized = _NON_WORD_RE.sub(' ', normalized)
         
-        # Remove special characters
-        normalized = re.sub(r'[^\w\s]', ' ', normalized)
-        
-        # Remove extra whitespace
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
+        # Collapse extra whitespace
+        normalized = ' '.join(normalized.split())
         
         # Remove common prefixes/suffixes
         prefixes = ['the ', 'a ', 'an ']
@@ -421,6 +482,19 @@ class MedicalDeviceOntologyMapper:
         norm1 = self._normalize_concept_name(name1)
         norm2 = self._normalize_concept_name(name2)
         
+        return self._jaccard_similarity(
+            norm1, frozenset(norm1.split()), norm2, frozenset(norm2.split())
+        )
+    
+    def _jaccard_similarity(
+        self,
+        norm1: str,
+        words1: FrozenSet[str],
+        norm2: str,
+        words2: FrozenSet[str]
+    ) -> float:
+        """Calculate similarity between two normalized names with pre-split word sets"""
+        
         if not norm1 or not norm2:
             return 0.0
         
@@ -429,14 +503,11 @@ class MedicalDeviceOntologyMapper:
             return 1.0
         
         # Jaccard similarity on words
-        words1 = set(norm1.split())
-        words2 = set(norm2.split())
-        
         if not words1 or not words2:
             return 0.0
         
-        intersection = len(words1.intersection(words2))
-        union = len(words1.union(words2))
+        intersection = len(words1 & words2)
+        union = len(words1 | words2)
         
         jaccard_similarity = intersection / union if union > 0 else 0.0
         
@@ -448,6 +519,21 @@ class MedicalDeviceOntologyMapper:
         # Combined similarity
         return min(1.0, jaccard_similarity + substring_similarity)
     
+    def _index_concept_terms(self) -> None:
+        """Cache normalized names and word sets on every loaded concept"""
+        
+        for type_concepts in self.medical_device_concepts.values():
+            for concepts in type_concepts.values():
+                for concept in concepts:
+                    concept._normalized_name = self._normalize_concept_name(concept.concept_name)
+                    concept._word_set = frozenset(concept._normalized_name.split())
+                    concept._normalized_synonyms = [
+                        self._normalize_concept_name(synonym) for synonym in concept.synonyms
+                    ]
+                    concept._synonym_word_sets = [
+                        frozenset(name.split()) for name in concept._normalized_synonyms
+                    ]
+    
     def _count_mappings(self, mappings: Dict[str, List[ConceptMapping]]) -> int:
         """Count total number of mappings"""
         
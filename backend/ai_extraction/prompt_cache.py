@@ -0,0 +1,208 @@
+"""
+Exact-match response cache for Gemini extraction prompts
+"""
+
+import hashlib
+import math
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Tuple, Any, Callable, Sequence
+
+
+def normalize_page_content(text: str) -> str:
+    """Normalize page text for cache keys: NFC form, collapsed whitespace, stripped"""
+    
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class PromptCache:
+    """
+    In-memory cache of model responses keyed by a hash of the prompt
+    
+    Service manuals repeat whole pages (boilerplate, safety notices, error code
+    tables across revisions), so identical prompts are answered from the cache
+    instead of a second Gemini round-trip.
+    """
+    
+    def __init__(self, default_ttl: int = 3600, max_entries: int = 10000):
+        """Initialize prompt cache"""
+        
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        
+        # key -> (expires_at, response)
+        self._entries: Dict[str, Tuple[float, str]] = {}
+        
+        self.stats = {"hits": 0, "misses": 0}
+    
+    @staticmethod
+    def cache_key(*parts: str) -> str:
+        """Build a deterministic cache key from the prompt and model settings"""
+        
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x1f")
+        
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Get cached response, or None on a miss or expired entry"""
+        
+        entry = self._entries.get(key)
+        
+        if entry is None or entry[0] < time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+        
+        self.stats["hits"] += 1
+        return entry[1]
+    
+    def set(self, key: str, response: str, ttl: Optional[int] = None) -> None:
+        """Store a response for the given key"""
+        
+        if len(self._entries) >= self.max_entries and key not in self._entries:
+            # Evict the oldest insertion to stay within the size bound
+            del self._entries[next(iter(self._entries))]
+        
+        self._entries[key] = (time.time() + (ttl or self.default_ttl), response)
+    
+    def clear(self) -> None:
+        """Remove all cached responses and reset statistics"""
+        
+        self._entries.clear()
+        self.stats = {"hits": 0, "misses": 0}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss statistics"""
+        
+        total = self.stats["hits"] + self.stats["misses"]
+        
+        return {
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "hit_rate": self.stats["hits"] / total if total else 0.0,
+            "entries": len(self._entries)
+        }
+
+
+class SemanticPromptCache(PromptCache):
+    """
+    Two-tier response cache: exact prompt hash first, then embedding similarity
+    
+    Consecutive manual revisions produce pages that differ only in page numbers
+    or whitespace. When the exact hash misses, the page content is embedded and
+    compared against previously answered pages that used the same prompt prefix;
+    a cosine similarity above the threshold reuses the stored response.
+    
+    Without an embed_fn the optional sentence-transformers package is used,
+    and ImportError is raised if it is not installed. Embedding is blocking,
+    so async callers run get_similar and add_similar in a worker thread.
+    """
+    
+    def __init__(
+        self,
+        similarity_threshold: float = 0.92,
+        embed_fn: Optional[Callable[[str], Sequence[float]]] = None,
+        default_ttl: int = 3600,
+        max_entries: int = 10000
+    ):
+        """Initialize semantic prompt cache"""
+        
+        super().__init__(default_ttl=default_ttl, max_entries=max_entries)
+        
+        if embed_fn is None:
+            # Optional dependency, imported only when the semantic tier is used
+            from sentence_transformers import SentenceTransformer
+            
+            model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+            embed_fn = lambda value: model.encode(value).tolist()
+        
+        self.similarity_threshold = similarity_threshold
+        self._embed_fn = embed_fn
+        
+        # Guards the vector lists against concurrent lookups from worker threads
+        self._lock = threading.Lock()
+        
+        # namespace -> [(expires_at, unit vector, response)]
+        self._vectors: Dict[str, List[Tuple[float, Tuple[float, ...], str]]] = {}
+        
+        # (page content, unit vector) of the last lookup, so a miss that is
+        # then stored does not embed the same page twice
+        self._last_query: Optional[Tuple[str, Tuple[float, ...]]] = None
+        
+        self.stats["semantic_hits"] = 0
+    
+    def get_similar(self, namespace: str, page_content: str) -> Optional[str]:
+        """Get the response of the most similar cached page under the same prompt prefix"""
+        
+        if not self._vectors.get(namespace):
+            return None
+        
+        query = self._embed(page_content)
+        best_score, best_response = 0.0, None
+        
+        with self._lock:
+            self._last_query = (page_content, query)
+            
+            entries = self._vectors[namespace]
+            now = time.time()
+            entries[:] = [entry for entry in entries if entry[0] >= now]
+            
+            for _, vector, response in entries:
+                score = sum(a * b for a, b in zip(query, vector))
+                if score > best_score:
+                    best_score, best_response = score, response
+            
+            if best_response is not None and best_score >= self.similarity_threshold:
+                self.stats["semantic_hits"] += 1
+                return best_response
+        
+        return None
+    
+    def add_similar(self, namespace: str, page_content: str, response: str, ttl: Optional[int] = None) -> None:
+        """Store a response for similarity lookup under a prompt prefix namespace"""
+        
+        last_query = self._last_query
+        if last_query is not None and last_query[0] == page_content:
+            vector = last_query[1]
+        else:
+            vector = self._embed(page_content)
+        
+        with self._lock:
+            if self._last_query is last_query:
+                self._last_query = None
+            
+            entries = self._vectors.setdefault(namespace, [])
+            if len(entries) >= self.max_entries:
+                entries.pop(0)
+            
+            entries.append((time.time() + (ttl or self.default_ttl), vector, response))
+    
+    def clear(self) -> None:
+        """Remove all cached responses and reset statistics"""
+        
+        super().clear()
+        self._vectors.clear()
+        self._last_query = None
+        self.stats["semantic_hits"] = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss statistics"""
+        
+        stats = super().get_stats()
+        stats["semantic_hits"] = self.stats["semantic_hits"]
+        stats["semantic_entries"] = sum(len(entries) for entries in self._vectors.values())
+        
+        return stats
+    
+    def _embed(self, text: str) -> Tuple[float, ...]:
+        """Embed text as a unit vector"""
+        
+        vector = [float(x) for x in self._embed_fn(text)]
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        
+        return tuple(x / norm for x in vector)
@@ -2,8 +2,447 @@
 Specialized prompt templates for medical device entity extraction using Gemini Flash
 """
 
-from typing import List, Dict, Any
-import json
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+import sys
+import warnings
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively convert dicts to read-only mappings and lists to tuples"""
+    
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    
+    return value
+
+
+# Static prompt data shared by all MedicalDevicePrompts instances so that the
+# prompt fragments built from it can be memoized at class level. Frozen so no
+# caller can mutate data the caches were built from.
+
+# Medical device entity definitions - Enhanced for hierarchical ontology
+_ENTITY_DEFINITIONS = _freeze({
+    "error_codes": {
+        "description": "Diagnostic codes indicating system faults or warnings",
+        "fields": ["code", "software_release", "message", "description", "response", "category", "severity"],
+        "examples": ["7002", "7001", "0000"]
+    },
+    "systems": {
+        "description": "Top-level medical device systems (e.g., LINAC_001, CT_Scanner_A)",
+        "fields": ["name", "type", "model", "manufacturer", "primary_function", "subsystems", "status"],
+        "examples": ["LINAC System", "Beam Delivery System", "Patient Positioning System"]
+    },
+    "subsystems": {
+        "description": "Functional subsystems within medical devices",
+        "fields": ["name", "type", "parent_system", "components", "function", "control_method", "interfaces"],
+        "examples": ["Beam Delivery System", "Patient Positioning System", "MLC Control System"]
+    },
+    "components": {
+        "description": "Individual components within subsystems",
+        "fields": ["name", "type", "function", "parent_subsystem", "specifications", "spare_parts", "maintenance_cycle"],
+        "examples": ["Leaf Motor", "MLC Controller", "Beam Monitor", "Servo Motor"]
+    },
+    "spare_parts": {
+        "description": "Replaceable parts for components",
+        "fields": ["part_number", "name", "component", "supplier", "lifecycle_status", "maintenance_cycle", "specifications"],
+        "examples": ["Motor Assembly P/N 12345", "Sensor Board P/N 67890"]
+    },
+    "relationships": {
+        "description": "Relationships between entities (causal, spatial, functional, temporal)",
+        "fields": ["source_entity", "target_entity", "relationship_type", "description", "confidence"],
+        "examples": ["Motor controls Leaf", "Error causes Component failure", "Subsystem part_of System"]
+    },
+    "procedures": {
+        "description": "Maintenance, calibration, and troubleshooting procedures",
+        "fields": ["name", "type", "steps", "prerequisites", "tools_required", "safety_level", "estimated_time"],
+        "examples": ["Calibration Check", "Motor Alignment", "Safety Interlock Test"]
+    },
+    "safety_protocols": {
+        "description": "Safety warnings, cautions, and danger notices",
+        "fields": ["type", "title", "description", "applicable_procedures", "compliance_standard"],
+        "examples": ["WARNING", "CAUTION", "DANGER"]
+    },
+    "technical_specifications": {
+        "description": "Technical parameters, limits, and measurements",
+        "fields": ["parameter", "value", "unit", "tolerance", "measurement_method"],
+        "examples": ["Voltage: 220V ±5%", "Temperature: 20-25°C"]
+    }
+})
+
+# Device-specific vocabularies with hierarchical structure
+_DEVICE_VOCABULARIES = _freeze({
+    "linear_accelerator": [
+        "MLC", "MLCi", "MLCi2", "leaf", "collimator", "gantry", "couch", 
+        "beam", "monitor", "chamber", "detector", "dose", "treatment",
+        "radiation", "linac", "electron", "photon", "energy", "field"
+    ],
+    "ct_scanner": [
+        "gantry", "detector", "tube", "collimator", "table", "patient",
+        "scan", "reconstruction", "slice", "helical", "axial", "contrast"
+    ],
+    "mri_scanner": [
+        "magnet", "coil", "gradient", "RF", "sequence", "bore", "table",
+        "shimming", "quench", "cryogen", "helium", "field"
+    ]
+})
+
+# LINAC subsystem hierarchy for specialized extraction
+_LINAC_SUBSYSTEMS = _freeze({
+    "BeamDeliverySystem": {
+        "description": "Controls and delivers therapeutic radiation beam",
+        "components": ["Electron Gun", "Accelerating Waveguide", "Bending Magnet", "Target", "Flattening Filter", "Primary Collimator"],
+        "functions": ["beam_generation", "beam_shaping", "dose_delivery"]
+    },
+    "PatientPositioningSystem": {
+        "description": "Positions and immobilizes patient for treatment",
+        "components": ["Treatment Couch", "Couch Drive Motors", "Position Sensors", "Immobilization Devices"],
+        "functions": ["patient_positioning", "position_verification", "motion_monitoring"]
+    },
+    "MLCSystem": {
+        "description": "Multi-Leaf Collimator for beam shaping",
+        "components": ["Leaf Motors", "Leaf Position Sensors", "MLC Controller", "Leaf Assemblies"],
+        "functions": ["beam_shaping", "field_modulation", "dose_conformity"]
+    },
+    "GantrySystem": {
+        "description": "Rotates treatment head around patient",
+        "components": ["Gantry Drive Motor", "Gantry Position Sensors", "Slip Ring Assembly", "Counterweight"],
+        "functions": ["angular_positioning", "rotation_control", "mechanical_stability"]
+    },
+    "ImagingSystem": {
+        "description": "Provides imaging for treatment verification",
+        "components": ["kV Imaging System", "MV Portal Imaging", "CBCT System", "Image Detectors"],
+        "functions": ["patient_verification", "treatment_monitoring", "quality_assurance"]
+    },
+    "SafetySystem": {
+        "description": "Ensures safe operation and radiation protection",
+        "components": ["Safety Interlocks", "Radiation Monitors", "Emergency Stops", "Access Control"],
+        "functions": ["radiation_safety", "personnel_protection", "system_monitoring"]
+    },
+    "ControlSystem": {
+        "description": "Central control and coordination of all subsystems",
+        "components": ["Main Controller", "User Interface", "Network Interface", "Data Storage"],
+        "functions": ["system_coordination", "user_interface", "data_management"]
+    }
+})
+
+# Relationship types for medical device ontology
+_RELATIONSHIP_TYPES = _freeze({
+    "causal": ["causes", "triggers", "results_in", "leads_to", "prevents"],
+    "spatial": ["part_of", "contains", "adjacent_to", "connected_to", "located_in"],
+    "functional": ["controls", "monitors", "regulates", "operates", "interfaces_with"],
+    "temporal": ["precedes", "follows", "concurrent_with", "during", "after"],
+    "dependency": ["requires", "depends_on", "enables", "supports", "affects"]
+})
+
+def _build_entity_definition_blocks() -> Dict[str, str]:
+    """Build the preformatted entity definition prompt blocks"""
+    
+    return {
+        entity_type: (
+            f"**{entity_type.upper().replace('_', ' ')}:**\n"
+            f"- Description: {entity_def['description']}\n"
+            f"- Required Fields: {', '.join(entity_def['fields'])}\n"
+            f"- Examples: {', '.join(entity_def['examples'])}"
+        )
+        for entity_type, entity_def in _ENTITY_DEFINITIONS.items()
+    }
+
+
+def _build_linac_subsystem_descriptions() -> str:
+    """Build the LINAC subsystem summary block"""
+    
+    return "\n".join(
+        f"- **{subsystem}**: {info['description']} (Components: "
+        f"{', '.join(info['components'][:3])}{'...' if len(info['components']) > 3 else ''})"
+        for subsystem, info in _LINAC_SUBSYSTEMS.items()
+    )
+
+# Pre-stripped instruction templates for the flat extraction prompt
+_SYSTEM_INSTRUCTION_TEMPLATE = """
+You are an expert medical device engineer specializing in {device_name} systems. 
+Your task is to extract structured information from {manual_type} content with high accuracy.
+
+**EXPERTISE AREAS:**
+- Medical device maintenance and troubleshooting
+- Error code analysis and interpretation  
+- Component identification and relationships
+- Safety protocol compliance
+- Technical specification extraction
+
+**QUALITY REQUIREMENTS:**
+- High accuracy (>95% for error codes)
+- Complete entity extraction
+- Proper medical terminology usage
+- Safety-first approach
+- Structured JSON output
+""".strip()
+
+_FINAL_INSTRUCTION_TEMPLATE = """
+**FINAL INSTRUCTIONS:**
+
+1. Analyze the content below thoroughly for {entities_list}
+2. Extract ALL relevant entities with high confidence (>0.7)
+3. Provide confidence scores based on text clarity and completeness  
+4. Use medical device terminology consistently
+5. Ensure JSON output is valid and complete
+6. If no entities found for a category, return empty array []
+7. **HIERARCHICAL EXTRACTION**: Identify System→Subsystem→Component→SparePart relationships
+8. **RELATIONSHIP DETECTION**: Extract causal, spatial, functional, and temporal relationships
+9. **LINAC SPECIALIZATION**: Use LINAC subsystem knowledge for accurate classification
+
+**BEGIN EXTRACTION NOW ON THE CONTENT BELOW:**
+""".strip()
+
+# JSON schema properties for each entity type in the flat extraction output
+_BASE_ENTITY_SCHEMA = {"confidence": {"type": "number", "minimum": 0.0, "maximum": 1.0}}
+
+_ENTITY_SCHEMA: Dict[str, Dict[str, Any]] = {
+    "error_codes": {
+        **_BASE_ENTITY_SCHEMA,
+        "code": {"type": "string"},
+        "software_release": {"type": "string"},
+        "message": {"type": "string"},
+        "description": {"type": "string"},
+        "response": {"type": "string"},
+        "category": {"type": "string", "enum": ["Mechanical", "Electrical", "Software", "Safety", "System"]},
+        "severity": {"type": "string", "enum": ["Low", "Medium", "High", "Critical"]}
+    },
+    "components": {
+        **_BASE_ENTITY_SCHEMA,
+        "name": {"type": "string"},
+        "type": {"type": "string"},
+        "function": {"type": "string"},
+        "parent_system": {"type": "string"},
+        "specifications": {"type": "string"}
+    },
+    "procedures": {
+        **_BASE_ENTITY_SCHEMA,
+        "name": {"type": "string"},
+        "type": {"type": "string", "enum": ["Calibration", "Diagnosis", "Repair", "Safety_Check", "Maintenance"]},
+        "description": {"type": "string"},
+        "steps": {"type": "array", "items": {"type": "string"}},
+        "prerequisites": {"type": "array", "items": {"type": "string"}},
+        "safety_level": {"type": "string", "enum": ["Level_1", "Level_2", "Level_3"]},
+        "estimated_time": {"type": "string"}
+    },
+    "safety_protocols": {
+        **_BASE_ENTITY_SCHEMA,
+        "type": {"type": "string", "enum": ["WARNING", "CAUTION", "DANGER", "NOTE"]},
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "applicable_procedures": {"type": "array", "items": {"type": "string"}},
+        "compliance_standard": {"type": "string"}
+    },
+    "technical_specifications": {
+        **_BASE_ENTITY_SCHEMA,
+        "parameter": {"type": "string"},
+        "value": {"type": "string"},
+        "unit": {"type": "string"},
+        "tolerance": {"type": "string"},
+        "measurement_method": {"type": "string"}
+    }
+}
+
+# Output schema wrapper, indented as json.dumps(schema, indent=2) would print it
+_SCHEMA_JSON_HEADER = '{\n  "type": "object",\n  "properties": {'
+_SCHEMA_JSON_FOOTER = '  }\n}'
+
+# Compact wire form of the same wrapper; whitespace only costs input tokens
+_COMPACT_SCHEMA_JSON_HEADER = '{"type":"object","properties":{'
+_COMPACT_SCHEMA_JSON_FOOTER = '}}'
+
+
+def _serialize_schema_property(entity_type: str, properties: Dict[str, Any], pretty: bool = True) -> str:
+    """Serialize one entry of the output schema "properties" object at its nesting depth"""
+    
+    import json
+    
+    entry = {entity_type: {"type": "array", "items": {"type": "object", "properties": properties}}}
+    
+    if not pretty:
+        # Drop the wrapping braces
+        return json.dumps(entry, separators=(",", ":"))[1:-1]
+    
+    # Drop the wrapping braces and indent one level deeper
+    lines = json.dumps(entry, indent=2).split("\n")[1:-1]
+    return "\n".join("  " + line for line in lines)
+
+
+def _build_schema_json(extraction_focus: Tuple[str, ...], pretty: bool) -> str:
+    """Assemble the output JSON schema from the pre-serialized per-entity properties"""
+    
+    table = _get_lazy("ENTITY_SCHEMA_JSON" if pretty else "COMPACT_ENTITY_SCHEMA_JSON")
+    properties = [
+        table.get(entity_type) or _serialize_schema_property(entity_type, _BASE_ENTITY_SCHEMA, pretty)
+        for entity_type in dict.fromkeys(extraction_focus)
+    ]
+    
+    if not pretty:
+        return _COMPACT_SCHEMA_JSON_HEADER + ",".join(properties) + _COMPACT_SCHEMA_JSON_FOOTER
+    if not properties:
+        return _SCHEMA_JSON_HEADER + "}\n}"
+    
+    return _SCHEMA_JSON_HEADER + "\n" + ",\n".join(properties) + "\n" + _SCHEMA_JSON_FOOTER
+
+
+def _build_entity_schema_json(pretty: bool = True) -> Dict[str, str]:
+    """Pre-serialize the output schema properties of every known entity type"""
+    
+    return {
+        entity_type: _serialize_schema_property(entity_type, properties, pretty)
+        for entity_type, properties in _ENTITY_SCHEMA.items()
+    }
+
+
+# Derived prompt blocks are built on first access rather than at import, so
+# workers serving only one prompt flavor never pay for the others
+_LAZY_BUILDERS = {
+    "ENTITY_DEFINITION_BLOCKS": _build_entity_definition_blocks,
+    "LINAC_SUBSYSTEM_DESCRIPTIONS": _build_linac_subsystem_descriptions,
+    "ENTITY_SCHEMA_JSON": _build_entity_schema_json,
+    "COMPACT_ENTITY_SCHEMA_JSON": lambda: _build_entity_schema_json(pretty=False),
+}
+
+_CACHES: Dict[str, Any] = {}
+
+
+def _get_lazy(name: str) -> Any:
+    """Get a lazily built prompt block, building it on first use"""
+    
+    value = _CACHES.get(name)
+    if value is None:
+        value = _CACHES[name] = _LAZY_BUILDERS[name]()
+    
+    return value
+
+
+def __getattr__(name: str) -> Any:
+    """Expose the lazily built prompt blocks as module attributes (PEP 562)"""
+    
+    if name in _LAZY_BUILDERS:
+        return _get_lazy(name)
+    
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Request size budget per prompt, below Gemini's 4 MB payload limit
+MAX_PROMPT_BYTES = 3_500_000
+
+
+def _chunk_page_content(page_content: str, max_bytes: int) -> Iterator[str]:
+    """Split page content at paragraph boundaries into chunks of at most max_bytes UTF-8 bytes"""
+    
+    if max_bytes <= 0:
+        raise ValueError("Prompt preamble leaves no room for page content")
+    
+    if len(page_content.encode("utf-8")) <= max_bytes:
+        yield page_content
+        return
+    
+    chunk: List[str] = []
+    chunk_bytes = 0
+    
+    for paragraph in page_content.split("\n\n"):
+        paragraph_bytes = len(paragraph.encode("utf-8"))
+        separator_bytes = 2 if chunk else 0
+        
+        if chunk and chunk_bytes + separator_bytes + paragraph_bytes > max_bytes:
+            yield "\n\n".join(chunk)
+            chunk, chunk_bytes, separator_bytes = [], 0, 0
+        
+        if paragraph_bytes > max_bytes:
+            # A single oversized paragraph is split by encoded bytes, backing
+            # each cut up to the start of a UTF-8 character
+            encoded = paragraph.encode("utf-8")
+            start = 0
+            while start < paragraph_bytes:
+                end = min(start + max_bytes, paragraph_bytes)
+                while end < paragraph_bytes and encoded[end] & 0xC0 == 0x80:
+                    end -= 1
+                if end == start:
+                    # Budget smaller than one character; emit it whole
+                    end = start + 1
+                    while end < paragraph_bytes and encoded[end] & 0xC0 == 0x80:
+                        end += 1
+                yield encoded[start:end].decode("utf-8")
+                start = end
+            continue
+        
+        chunk.append(paragraph)
+        chunk_bytes += separator_bytes + paragraph_bytes
+    
+    if chunk:
+        yield "\n\n".join(chunk)
+
+
+# Trie node key marking the end of a term; its value is the term's payload
+_TERM_END = "\0"
+
+
+def _build_term_trie(terms: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a character trie of lowercased terms mapping to their payloads"""
+    
+    trie: Dict[str, Any] = {}
+    
+    for term, payload in terms.items():
+        node = trie
+        for char in term.lower():
+            node = node.setdefault(char, {})
+        node[_TERM_END] = payload
+    
+    return trie
+
+
+def _scan_term_trie(trie: Dict[str, Any], text: str) -> List[Any]:
+    """Return payloads of all whole-word trie terms found in text, in order of appearance"""
+    
+    text = text.lower()
+    length = len(text)
+    found = []
+    
+    for start in range(length):
+        # Terms only start at word boundaries
+        if start and text[start - 1].isalnum():
+            continue
+        
+        node = trie
+        position = start
+        match = None
+        
+        while position < length and text[position] in node:
+            node = node[text[position]]
+            position += 1
+            if _TERM_END in node and (position == length or not text[position].isalnum()):
+                match = node[_TERM_END]
+        
+        if match is not None:
+            found.append(match)
+    
+    return found
+
+
+@lru_cache(maxsize=8)
+def _get_vocabulary_trie(device_type: str) -> Dict[str, Any]:
+    """Get the keyword trie for a device vocabulary"""
+    
+    vocabulary = _DEVICE_VOCABULARIES.get(device_type, [])
+    
+    return _build_term_trie({term: term for term in vocabulary})
+
+
+@lru_cache(maxsize=1)
+def _get_linac_component_trie() -> Dict[str, Any]:
+    """Get the trie of LINAC component names mapping to their subsystem"""
+    
+    return _build_term_trie({
+        component: subsystem
+        for subsystem, info in _LINAC_SUBSYSTEMS.items()
+        for component in info["components"]
+    })
 
 
 class MedicalDevicePrompts:
@@ -11,122 +450,33 @@ class MedicalDevicePrompts:
     Prompt templates optimized for extracting entities from medical device service manuals
     """
     
-    def __init__(self):
-        """Initialize prompt templates"""
-        
-        # Medical device entity definitions - Enhanced for hierarchical ontology
-        self.entity_definitions = {
-            "error_codes": {
-                "description": "Diagnostic codes indicating system faults or warnings",
-                "fields": ["code", "software_release", "message", "description", "response", "category", "severity"],
-                "examples": ["7002", "7001", "0000"]
-            },
-            "systems": {
-                "description": "Top-level medical device systems (e.g., LINAC_001, CT_Scanner_A)",
-                "fields": ["name", "type", "model", "manufacturer", "primary_function", "subsystems", "status"],
-                "examples": ["LINAC System", "Beam Delivery System", "Patient Positioning System"]
-            },
-            "subsystems": {
-                "description": "Functional subsystems within medical devices",
-                "fields": ["name", "type", "parent_system", "components", "function", "control_method", "interfaces"],
-                "examples": ["Beam Delivery System", "Patient Positioning System", "MLC Control System"]
-            },
-            "components": {
-                "description": "Individual components within subsystems",
-                "fields": ["name", "type", "function", "parent_subsystem", "specifications", "spare_parts", "maintenance_cycle"],
-                "examples": ["Leaf Motor", "MLC Controller", "Beam Monitor", "Servo Motor"]
-            },
-            "spare_parts": {
-                "description": "Replaceable parts for components",
-                "fields": ["part_number", "name", "component", "supplier", "lifecycle_status", "maintenance_cycle", "specifications"],
-                "examples": ["Motor Assembly P/N 12345", "Sensor Board P/N 67890"]
-            },
-            "relationships": {
-                "description": "Relationships between entities (causal, spatial, functional, temporal)",
-                "fields": ["source_entity", "target_entity", "relationship_type", "description", "confidence"],
-                "examples": ["Motor controls Leaf", "Error causes Component failure", "Subsystem part_of System"]
-            },
-            "procedures": {
-                "description": "Maintenance, calibration, and troubleshooting procedures",
-                "fields": ["name", "type", "steps", "prerequisites", "tools_required", "safety_level", "estimated_time"],
-                "examples": ["Calibration Check", "Motor Alignment", "Safety Interlock Test"]
-            },
-            "safety_protocols": {
-                "description": "Safety warnings, cautions, and danger notices",
-                "fields": ["type", "title", "description", "applicable_procedures", "compliance_standard"],
-                "examples": ["WARNING", "CAUTION", "DANGER"]
-            },
-            "technical_specifications": {
-                "description": "Technical parameters, limits, and measurements",
-                "fields": ["parameter", "value", "unit", "tolerance", "measurement_method"],
-                "examples": ["Voltage: 220V ±5%", "Temperature: 20-25°C"]
-            }
-        }
-        
-        # Device-specific vocabularies with hierarchical structure
-        self.device_vocabularies = {
-            "linear_accelerator": [
-                "MLC", "MLCi", "MLCi2", "leaf", "collimator", "gantry", "couch", 
-                "beam", "monitor", "chamber", "detector", "dose", "treatment",
-                "radiation", "linac", "electron", "photon", "energy", "field"
-            ],
-            "ct_scanner": [
-                "gantry", "detector", "tube", "collimator", "table", "patient",
-                "scan", "reconstruction", "slice", "helical", "axial", "contrast"
-            ],
-            "mri_scanner": [
-                "magnet", "coil", "gradient", "RF", "sequence", "bore", "table",
-                "shimming", "quench", "cryogen", "helium", "field"
-            ]
-        }
+    # Medical device entity definitions - Enhanced for hierarchical ontology
+    entity_definitions = _ENTITY_DEFINITIONS
+    
+    # Device-specific vocabularies with hierarchical structure
+    device_vocabularies = _DEVICE_VOCABULARIES
+    
+    # LINAC subsystem hierarchy for specialized extraction
+    linac_subsystems = _LINAC_SUBSYSTEMS
+    
+    # Relationship types for medical device ontology
+    relationship_types = _RELATIONSHIP_TYPES
+    
+    # Instances only carry the schema formatting flag; every prompt is a function
+    # of its arguments and the module constants, so all caches live at class
+    # level and are shared
+    __slots__ = ("pretty_schema",)
+    
+    def __init__(self, pretty_schema: bool = False):
+        """
+        Initialize prompt templates
         
-        # LINAC subsystem hierarchy for specialized extraction
-        self.linac_subsystems = {
-            "BeamDeliverySystem": {
-                "description": "Controls and delivers therapeutic radiation beam",
-                "components": ["Electron Gun", "Accelerating Waveguide", "Bending Magnet", "Target", "Flattening Filter", "Primary Collimator"],
-                "functions": ["beam_generation", "beam_shaping", "dose_delivery"]
-            },
-            "PatientPositioningSystem": {
-                "description": "Positions and immobilizes patient for treatment",
-                "components": ["Treatment Couch", "Couch Drive Motors", "Position Sensors", "Immobilization Devices"],
-                "functions": ["patient_positioning", "position_verification", "motion_monitoring"]
-            },
-            "MLCSystem": {
-                "description": "Multi-Leaf Collimator for beam shaping",
-                "components": ["Leaf Motors", "Leaf Position Sensors", "MLC Controller", "Leaf Assemblies"],
-                "functions": ["beam_shaping", "field_modulation", "dose_conformity"]
-            },
-            "GantrySystem": {
-                "description": "Rotates treatment head around patient",
-                "components": ["Gantry Drive Motor", "Gantry Position Sensors", "Slip Ring Assembly", "Counterweight"],
-                "functions": ["angular_positioning", "rotation_control", "mechanical_stability"]
-            },
-            "ImagingSystem": {
-                "description": "Provides imaging for treatment verification",
-                "components": ["kV Imaging System", "MV Portal Imaging", "CBCT System", "Image Detectors"],
-                "functions": ["patient_verification", "treatment_monitoring", "quality_assurance"]
-            },
-            "SafetySystem": {
-                "description": "Ensures safe operation and radiation protection",
-                "components": ["Safety Interlocks", "Radiation Monitors", "Emergency Stops", "Access Control"],
-                "functions": ["radiation_safety", "personnel_protection", "system_monitoring"]
-            },
-            "ControlSystem": {
-                "description": "Central control and coordination of all subsystems",
-                "components": ["Main Controller", "User Interface", "Network Interface", "Data Storage"],
-                "functions": ["system_coordination", "user_interface", "data_management"]
-            }
-        }
+        Args:
+            pretty_schema: Indent the output JSON schema in prompts (for debugging);
+                the compact form is sent by default to save input tokens
+        """
         
-        # Relationship types for medical device ontology
-        self.relationship_types = {
-            "causal": ["causes", "triggers", "results_in", "leads_to", "prevents"],
-            "spatial": ["part_of", "contains", "adjacent_to", "connected_to", "located_in"],
-            "functional": ["controls", "monitors", "regulates", "operates", "interfaces_with"],
-            "temporal": ["precedes", "follows", "concurrent_with", "during", "after"],
-            "dependency": ["requires", "depends_on", "enables", "supports", "affects"]
-        }
+        self.pretty_schema = pretty_schema
     
     def build_extraction_prompt(
         self,
@@ -137,72 +487,181 @@ class MedicalDevicePrompts:
     ) -> str:
         """
         Build comprehensive extraction prompt for medical device content
+        
+        All static instructions come first and the page content last, so
+        consecutive pages share a common prefix for provider-side prompt caching.
+        """
+        
+        return "".join(self.iter_prompt_parts(page_content, device_type, manual_type, extraction_focus))
+    
+    def iter_prompt_parts(
+        self,
+        page_content: str,
+        device_type: str = "linear_accelerator",
+        manual_type: str = "service_manual",
+        extraction_focus: List[str] = None
+    ) -> Iterator[str]:
+        """
+        Yield the extraction prompt in pieces without concatenating them
+        
+        Lets a streaming HTTP client send the shared cached prefix and the page
+        content without materializing a full prompt string per page in flight.
+        """
+        
+        yield self.get_cacheable_prefix(device_type, manual_type, extraction_focus)
+        yield page_content
+    
+    def build_extraction_prompt_with_meta(
+        self,
+        page_content: str,
+        device_type: str = "linear_accelerator",
+        manual_type: str = "service_manual",
+        extraction_focus: List[str] = None
+    ) -> Tuple[str, Dict[str, int]]:
+        """
+        Build extraction prompt together with token estimates for request pacing
+        
+        Returns:
+            Tuple of (prompt, {"est_input_tokens", "cacheable_prefix_tokens"}) so a
+            scheduler can stay under tokens-per-minute quotas instead of
+            discovering them through 429 responses
+        """
+        
+        prefix = self.get_cacheable_prefix(device_type, manual_type, extraction_focus)
+        prompt = prefix + page_content
+        
+        return prompt, {
+            "est_input_tokens": self.estimate_tokens(prompt),
+            "cacheable_prefix_tokens": self.estimate_tokens(prefix)
+        }
+    
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Estimate the token count of text (about 4 characters per token)"""
+        
+        return max(1, len(text) // 4)
+    
+    def build_extraction_prompts(
+        self,
+        page_content: str,
+        device_type: str = "linear_accelerator",
+        manual_type: str = "service_manual",
+        extraction_focus: List[str] = None,
+        max_prompt_bytes: int = MAX_PROMPT_BYTES
+    ) -> Iterator[str]:
+        """
+        Build extraction prompts that each stay under the request size limit
+        
+        Page content that does not fit next to the preamble is split at paragraph
+        boundaries; every chunk reuses the same cacheable prefix.
+        """
+        
+        prefix = self.get_cacheable_prefix(device_type, manual_type, extraction_focus)
+        budget = max_prompt_bytes - len(prefix.encode("utf-8"))
+        
+        for chunk in _chunk_page_content(page_content, budget):
+            yield prefix + chunk
+    
+    def get_cacheable_prefix(
+        self,
+        device_type: str = "linear_accelerator",
+        manual_type: str = "service_manual",
+        extraction_focus: List[str] = None
+    ) -> str:
+        """
+        Get the static prompt prefix shared by every page with these options
+        
+        The prompt for a page is exactly this prefix followed by the page content,
+        so the prefix can be uploaded once as Gemini cached content (or marked
+        for Anthropic/OpenAI prompt caching) and reused for the whole run.
         """
         
         if not extraction_focus:
             extraction_focus = ["error_codes", "components", "procedures", "safety_protocols"]
         
-        # Build main prompt
+        # Hashable focus so the cached prefix can be reused across pages
+        return self._build_prefix(device_type, manual_type, tuple(extraction_focus), self.pretty_schema)
+    
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _build_prefix(
+        device_type: str,
+        manual_type: str,
+        focus: Tuple[str, ...],
+        pretty_schema: bool = False
+    ) -> str:
+        """Assemble the static extraction prompt prefix"""
+        
         prompt_parts = [
-            self._get_system_instruction(device_type, manual_type),
-            self._get_entity_definitions(extraction_focus),
-            self._get_extraction_guidelines(device_type),
-            self._get_output_format_instruction(extraction_focus),
-            self._get_examples_section(device_type, extraction_focus),
-            f"\n**CONTENT TO ANALYZE:**\n{page_content}\n",
-            self._get_final_instruction(extraction_focus)
+            MedicalDevicePrompts._get_system_instruction(device_type, manual_type),
+            MedicalDevicePrompts._get_entity_definitions(focus),
+            MedicalDevicePrompts._get_extraction_guidelines(device_type),
+            MedicalDevicePrompts._get_output_format_instruction(focus, pretty_schema),
+            MedicalDevicePrompts._get_examples_section(device_type, focus),
+            MedicalDevicePrompts._get_final_instruction(focus)
         ]
         
-        return "\n\n".join(prompt_parts)
+        return MedicalDevicePrompts._assemble_prefix(prompt_parts)
     
-    def _get_system_instruction(self, device_type: str, manual_type: str) -> str:
-        """Get system instruction based on device and manual type"""
+    @staticmethod
+    def _assemble_prefix(prompt_parts: List[str]) -> str:
+        """Join prompt sections, ending with the content header"""
         
-        device_name = device_type.replace('_', ' ').title()
-        
-        return f"""
-You are an expert medical device engineer specializing in {device_name} systems. 
-Your task is to extract structured information from {manual_type} content with high accuracy.
-
-**EXPERTISE AREAS:**
-- Medical device maintenance and troubleshooting
-- Error code analysis and interpretation  
-- Component identification and relationships
-- Safety protocol compliance
-- Technical specification extraction
-
-**QUALITY REQUIREMENTS:**
-- High accuracy (>95% for error codes)
-- Complete entity extraction
-- Proper medical terminology usage
-- Safety-first approach
-- Structured JSON output
-        """.strip()
+        return "\n\n".join(prompt_parts + ["**CONTENT TO ANALYZE:**\n"])
     
-    def _get_entity_definitions(self, extraction_focus: List[str]) -> str:
-        """Get entity definitions for focused extraction"""
+    @classmethod
+    def reset_prompt_cache(cls) -> None:
+        """Clear all memoized prompt fragments"""
         
-        definitions = []
+        for fragment_builder in (
+            cls._build_prefix,
+            cls._build_hierarchical_prefix,
+            cls._get_system_instruction,
+            cls._get_entity_definitions,
+            cls._get_extraction_guidelines,
+            cls._get_output_format_instruction,
+            cls._get_examples_section,
+            cls._get_final_instruction,
+            cls._get_hierarchical_system_instruction,
+            cls._get_hierarchical_entity_definitions,
+            cls._get_linac_subsystem_guidelines,
+            cls._get_relationship_extraction_guidelines,
+            cls._get_hierarchical_output_format,
+            cls._get_hierarchical_examples,
+            cls._get_hierarchical_final_instruction
+        ):
+            fragment_builder.cache_clear()
+    
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _get_system_instruction(device_type: str, manual_type: str) -> str:
+        """Get system instruction based on device and manual type"""
         
-        for entity_type in extraction_focus:
-            if entity_type in self.entity_definitions:
-                entity_def = self.entity_definitions[entity_type]
-                
-                definitions.append(f"""
-**{entity_type.upper().replace('_', ' ')}:**
-- Description: {entity_def['description']}
-- Required Fields: {', '.join(entity_def['fields'])}
-- Examples: {', '.join(entity_def['examples'])}
-                """.strip())
+        return _SYSTEM_INSTRUCTION_TEMPLATE.format(
+            device_name=device_type.replace('_', ' ').title(),
+            manual_type=manual_type
+        )
+    
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _get_entity_definitions(extraction_focus: Tuple[str, ...]) -> str:
+        """Get entity definitions for focused extraction"""
         
-        header = "**ENTITY TYPES TO EXTRACT:**"
+        blocks = _get_lazy("ENTITY_DEFINITION_BLOCKS")
+        definitions = [
+            blocks[entity_type]
+            for entity_type in extraction_focus
+            if entity_type in blocks
+        ]
         
-        return header + "\n\n" + "\n\n".join(definitions)
+        return "**ENTITY TYPES TO EXTRACT:**\n\n" + "\n\n".join(definitions)
     
-    def _get_extraction_guidelines(self, device_type: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _get_extraction_guidelines(device_type: str) -> str:
         """Get device-specific extraction guidelines"""
         
-        vocab = self.device_vocabularies.get(device_type, [])
+        vocab = _DEVICE_VOCABULARIES.get(device_type, [])
         vocab_text = ", ".join(vocab[:15]) + ("..." if len(vocab) > 15 else "")
         
         return f"""
@@ -241,27 +700,19 @@ Your task is to extract structured information from {manual_type} content with h
    - Identify critical parameters
         """.strip()
     
-    def _get_output_format_instruction(self, extraction_focus: List[str]) -> str:
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _get_output_format_instruction(extraction_focus: Tuple[str, ...], pretty_schema: bool = False) -> str:
         """Get output format instructions"""
         
-        # Build JSON schema
-        schema = {"type": "object", "properties": {}}
-        
-        for entity_type in extraction_focus:
-            schema["properties"][entity_type] = {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": self._get_entity_schema(entity_type)
-                }
-            }
+        schema_json = _build_schema_json(extraction_focus, pretty_schema)
         
         return f"""
 **OUTPUT FORMAT:**
 Provide your response as a valid JSON object with the following structure:
 
 ```json
-{json.dumps(schema, indent=2)}
+{schema_json}
 ```
 
 **FIELD REQUIREMENTS:**
@@ -271,59 +722,9 @@ Provide your response as a valid JSON object with the following structure:
 - Use consistent formatting for similar entities
         """.strip()
     
-    def _get_entity_schema(self, entity_type: str) -> Dict[str, Any]:
-        """Get JSON schema for specific entity type"""
-        
-        base_schema = {"confidence": {"type": "number", "minimum": 0.0, "maximum": 1.0}}
-        
-        if entity_type == "error_codes":
-            base_schema.update({
-                "code": {"type": "string"},
-                "software_release": {"type": "string"},
-                "message": {"type": "string"},
-                "description": {"type": "string"},
-                "response": {"type": "string"},
-                "category": {"type": "string", "enum": ["Mechanical", "Electrical", "Software", "Safety", "System"]},
-                "severity": {"type": "string", "enum": ["Low", "Medium", "High", "Critical"]}
-            })
-        elif entity_type == "components":
-            base_schema.update({
-                "name": {"type": "string"},
-                "type": {"type": "string"},
-                "function": {"type": "string"},
-                "parent_system": {"type": "string"},
-                "specifications": {"type": "string"}
-            })
-        elif entity_type == "procedures":
-            base_schema.update({
-                "name": {"type": "string"},
-                "type": {"type": "string", "enum": ["Calibration", "Diagnosis", "Repair", "Safety_Check", "Maintenance"]},
-                "description": {"type": "string"},
-                "steps": {"type": "array", "items": {"type": "string"}},
-                "prerequisites": {"type": "array", "items": {"type": "string"}},
-                "safety_level": {"type": "string", "enum": ["Level_1", "Level_2", "Level_3"]},
-                "estimated_time": {"type": "string"}
-            })
-        elif entity_type == "safety_protocols":
-            base_schema.update({
-                "type": {"type": "string", "enum": ["WARNING", "CAUTION", "DANGER", "NOTE"]},
-                "title": {"type": "string"},
-                "description": {"type": "string"},
-                "applicable_procedures": {"type": "array", "items": {"type": "string"}},
-                "compliance_standard": {"type": "string"}
-            })
-        elif entity_type == "technical_specifications":
-            base_schema.update({
-                "parameter": {"type": "string"},
-                "value": {"type": "string"},
-                "unit": {"type": "string"},
-                "tolerance": {"type": "string"},
-                "measurement_method": {"type": "string"}
-            })
-        
-        return base_schema
-    
-    def _get_examples_section(self, device_type: str, extraction_focus: List[str]) -> str:
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _get_examples_section(device_type: str, extraction_focus: Tuple[str, ...]) -> str:
         """Get example extractions for the device type"""
         
         examples = []
@@ -408,26 +809,14 @@ Output:
         header = "**EXTRACTION EXAMPLES:**"
         return header + "\n\n" + "\n\n".join(examples)
     
-    def _get_final_instruction(self, extraction_focus: List[str]) -> str:
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _get_final_instruction(extraction_focus: Tuple[str, ...]) -> str:
         """Get final extraction instruction"""
         
         entities_list = ", ".join([e.replace('_', ' ') for e in extraction_focus])
         
-        return f"""
-**FINAL INSTRUCTIONS:**
-
-1. Analyze the provided content thoroughly for {entities_list}
-2. Extract ALL relevant entities with high confidence (>0.7)
-3. Provide confidence scores based on text clarity and completeness  
-4. Use medical device terminology consistently
-5. Ensure JSON output is valid and complete
-6. If no entities found for a category, return empty array []
-7. **HIERARCHICAL EXTRACTION**: Identify System→Subsystem→Component→SparePart relationships
-8. **RELATIONSHIP DETECTION**: Extract causal, spatial, functional, and temporal relationships
-9. **LINAC SPECIALIZATION**: Use LINAC subsystem knowledge for accurate classification
-
-**BEGIN EXTRACTION NOW:**
-        """.strip()
+        return _FINAL_INSTRUCTION_TEMPLATE.format(entities_list=entities_list)
     
     def build_hierarchical_extraction_prompt(
         self,
@@ -444,20 +833,37 @@ Output:
             focus_subsystem: Specific subsystem to focus on (optional)
         """
         
+        return self.get_hierarchical_cacheable_prefix(device_type, focus_subsystem) + page_content
+    
+    def get_hierarchical_cacheable_prefix(
+        self,
+        device_type: str = "linear_accelerator",
+        focus_subsystem: str = None
+    ) -> str:
+        """Get the static prompt prefix shared by every page in hierarchical extraction"""
+        
+        return self._build_hierarchical_prefix(device_type, focus_subsystem)
+    
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _build_hierarchical_prefix(device_type: str, focus_subsystem: Optional[str]) -> str:
+        """Assemble the static hierarchical extraction prompt prefix"""
+        
         prompt_parts = [
-            self._get_hierarchical_system_instruction(device_type, focus_subsystem),
-            self._get_hierarchical_entity_definitions(),
-            self._get_linac_subsystem_guidelines() if device_type == "linear_accelerator" else "",
-            self._get_relationship_extraction_guidelines(),
-            self._get_hierarchical_output_format(),
-            self._get_hierarchical_examples(device_type),
-            f"\n**CONTENT TO ANALYZE:**\n{page_content}\n",
-            self._get_hierarchical_final_instruction()
+            MedicalDevicePrompts._get_hierarchical_system_instruction(device_type, focus_subsystem),
+            MedicalDevicePrompts._get_hierarchical_entity_definitions(),
+            MedicalDevicePrompts._get_linac_subsystem_guidelines() if device_type == "linear_accelerator" else "",
+            MedicalDevicePrompts._get_relationship_extraction_guidelines(),
+            MedicalDevicePrompts._get_hierarchical_output_format(),
+            MedicalDevicePrompts._get_hierarchical_examples(device_type),
+            MedicalDevicePrompts._get_hierarchical_final_instruction()
         ]
         
-        return "\n\n".join([part for part in prompt_parts if part])
+        return MedicalDevicePrompts._assemble_prefix([part for part in prompt_parts if part])
     
-    def _get_hierarchical_system_instruction(self, device_type: str, focus_subsystem: str = None) -> str:
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _get_hierarchical_system_instruction(device_type: str, focus_subsystem: Optional[str] = None) -> str:
         """Get system instruction for hierarchical extraction"""
         
         device_name = device_type.replace('_', ' ').title()
@@ -484,7 +890,9 @@ System (Top Level) → Subsystem → Component → SparePart
 - Structured ontology output
         """.strip()
     
-    def _get_hierarchical_entity_definitions(self) -> str:
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _get_hierarchical_entity_definitions() -> str:
         """Get entity definitions for hierarchical extraction"""
         
         return """
@@ -516,18 +924,17 @@ System (Top Level) → Subsystem → Component → SparePart
 - Fields: source_entity, target_entity, relationship_type, description, confidence
         """.strip()
     
-    def _get_linac_subsystem_guidelines(self) -> str:
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _get_linac_subsystem_guidelines() -> str:
         """Get LINAC-specific subsystem extraction guidelines"""
         
-        subsystem_descriptions = []
-        for subsystem, info in self.linac_subsystems.items():
-            components_text = ", ".join(info["components"][:3]) + ("..." if len(info["components"]) > 3 else "")
-            subsystem_descriptions.append(f"- **{subsystem}**: {info['description']} (Components: {components_text})")
+        subsystem_descriptions = _get_lazy("LINAC_SUBSYSTEM_DESCRIPTIONS")
         
         return f"""
 **LINAC SUBSYSTEM CLASSIFICATION:**
 
-{chr(10).join(subsystem_descriptions)}
+{subsystem_descriptions}
 
 **CLASSIFICATION RULES:**
 1. **BeamDeliverySystem**: Components related to radiation beam generation and delivery
@@ -545,7 +952,9 @@ System (Top Level) → Subsystem → Component → SparePart
 - Note maintenance cycles and replacement schedules
         """.strip()
     
-    def _get_relationship_extraction_guidelines(self) -> str:
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _get_relationship_extraction_guidelines() -> str:
         """Get guidelines for relationship extraction"""
         
         return """
@@ -588,7 +997,9 @@ System (Top Level) → Subsystem → Component → SparePart
 4. Validate relationships against domain knowledge
         """.strip()
     
-    def _get_hierarchical_output_format(self) -> str:
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _get_hierarchical_output_format() -> str:
         """Get output format for hierarchical extraction"""
         
         return """
@@ -660,7 +1071,9 @@ System (Top Level) → Subsystem → Component → SparePart
 ```
         """.strip()
     
-    def _get_hierarchical_examples(self, device_type: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _get_hierarchical_examples(device_type: str) -> str:
         """Get examples for hierarchical extraction"""
         
         if device_type == "linear_accelerator":
@@ -748,13 +1161,15 @@ Output:
         
         return ""
     
-    def _get_hierarchical_final_instruction(self) -> str:
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _get_hierarchical_final_instruction() -> str:
         """Get final instruction for hierarchical extraction"""
         
         return """
 **HIERARCHICAL EXTRACTION INSTRUCTIONS:**
 
-1. **ANALYZE HIERARCHY**: Identify System→Subsystem→Component→SparePart structure
+1. **ANALYZE HIERARCHY**: Identify System→Subsystem→Component→SparePart structure in the content below
 2. **EXTRACT ENTITIES**: Extract all entities at appropriate hierarchy levels
 3. **MAP RELATIONSHIPS**: Identify causal, spatial, functional, temporal, and dependency relationships
 4. **ASSIGN CONFIDENCE**: Provide confidence scores based on text clarity and domain knowledge
@@ -769,61 +1184,117 @@ Output:
 - ✓ Medical device terminology used consistently
 - ✓ JSON format valid and complete
 
-**BEGIN HIERARCHICAL EXTRACTION:**
+**BEGIN HIERARCHICAL EXTRACTION ON THE CONTENT BELOW:**
         """.strip()
+    
+    def find_device_terms(self, text: str, device_type: str = "linear_accelerator") -> List[str]:
+        """Find device vocabulary terms occurring as whole words in text"""
+        
+        return _scan_term_trie(_get_vocabulary_trie(device_type), text)
+    
+    def contains_device_term(self, text: str, device_type: str = "linear_accelerator") -> bool:
+        """Check whether text mentions any device vocabulary term"""
+        
+        return bool(self.find_device_terms(text, device_type))
+    
+    def match_linac_subsystem(self, text: str) -> Optional[str]:
+        """
+        Classify text to a LINAC subsystem from the component names it mentions
+        
+        Returns the subsystem only when every matched component belongs to the
+        same subsystem, so callers can skip the LLM for unambiguous hits.
+        """
+        
+        subsystems = set(_scan_term_trie(_get_linac_component_trie(), text))
+        
+        return subsystems.pop() if len(subsystems) == 1 else None
 
 
 # Utility functions for prompt management
 
-def get_device_specific_vocabulary(device_type: str) -> List[str]:
-    """Get vocabulary specific to device type"""
+@dataclass(frozen=True)
+class PromptParts:
+    """Prompt split into a static system part and the per-call user part"""
+    
+    system: str
+    user: str
     
-    prompt_builder = MedicalDevicePrompts()
-    return prompt_builder.device_vocabularies.get(device_type, [])
+    @property
+    def text(self) -> str:
+        """Get the full prompt as a single string, system part first"""
+        
+        return self.system + "\n\n" + self.user
 
 
-def validate_extraction_focus(focus_list: List[str]) -> List[str]:
-    """Validate and clean extraction focus list"""
-    
-    valid_entities = [
-        "error_codes", "components", "procedures", 
-        "safety_protocols", "technical_specifications",
-        "systems", "subsystems", "spare_parts", "relationships"
+# Example output shapes for the module-level prompts, sent as compact JSON;
+# confidence placeholders are rendered as the bare range the models expect
+_CONFIDENCE_PLACEHOLDER = "<confidence>"
+
+_RELATIONSHIP_SCHEMA = {
+    "relationships": [
+        {
+            "source_entity": "Entity name from the extracted entities list",
+            "target_entity": "Entity name from the extracted entities list",
+            "relationship_type": "causal|spatial|functional|temporal|dependency",
+            "description": "Clear description of the relationship",
+            "confidence": _CONFIDENCE_PLACEHOLDER,
+            "evidence_text": "Text snippet supporting this relationship"
+        }
     ]
-    
-    return [entity for entity in focus_list if entity in valid_entities]
+}
 
 
-def build_relationship_detection_prompt(
-    entities: List[Dict[str, Any]], 
-    context_text: str,
-    device_type: str = "linear_accelerator"
-) -> str:
-    """
-    Build specialized prompt for relationship detection between entities
-    
-    Args:
-        entities: List of already extracted entities
-        context_text: Original text context
-        device_type: Type of medical device
-    """
+def _build_subsystem_schema(subsystem: str) -> Dict[str, Any]:
+    """Build the example output shape for a subsystem extraction prompt"""
     
-    prompt_builder = MedicalDevicePrompts()
-    
-    entity_list = []
-    for entity in entities:
-        entity_name = entity.get('name', entity.get('code', 'Unknown'))
-        entity_type = entity.get('type', 'Unknown')
-        entity_list.append(f"- {entity_name} ({entity_type})")
+    return {
+        "subsystem": {
+            "name": subsystem,
+            "components": [{
+                "name": "string",
+                "type": "string",
+                "function": "string",
+                "specifications": "string",
+                "confidence": _CONFIDENCE_PLACEHOLDER
+            }],
+            "error_codes": [{
+                "code": "string",
+                "description": "string",
+                "related_components": ["array"],
+                "confidence": _CONFIDENCE_PLACEHOLDER
+            }],
+            "procedures": [{
+                "name": "string",
+                "type": "string",
+                "related_components": ["array"],
+                "confidence": _CONFIDENCE_PLACEHOLDER
+            }],
+            "relationships": [{
+                "source_entity": "string",
+                "target_entity": "string",
+                "relationship_type": "string",
+                "description": "string",
+                "confidence": _CONFIDENCE_PLACEHOLDER
+            }]
+        }
+    }
+
+
+def _compact_schema_json(schema: Dict[str, Any]) -> str:
+    """Serialize an example output shape as single-line JSON"""
     
-    entities_text = "\n".join(entity_list)
+    import json
     
-    return f"""
-You are an expert medical device ontology engineer specializing in relationship detection.
-Your task is to identify relationships between extracted entities based on the provided context.
+    return json.dumps(schema, separators=(",", ":")).replace(f'"{_CONFIDENCE_PLACEHOLDER}"', "0.0-1.0")
 
-**EXTRACTED ENTITIES:**
-{entities_text}
+
+# Pre-stripped templates for the module-level relationship and subsystem
+# prompts; the system parts hold the static role, taxonomy, schema and
+# instructions, the user parts only the per-call entities, context and page
+# content
+_RELATIONSHIP_SYSTEM_PROMPT = """
+You are an expert medical device ontology engineer specializing in relationship detection.
+Your task is to identify relationships between extracted entities based on the context text below.
 
 **RELATIONSHIP TYPES TO DETECT:**
 
@@ -855,23 +1326,9 @@ Your task is to identify relationships between extracted entities based on the p
 - Enablement relationships (enables, supports)
 - Impact relationships (affects, influences)
 
-**CONTEXT TEXT:**
-{context_text}
-
 **OUTPUT FORMAT:**
 ```json
-{{
-  "relationships": [
-    {{
-      "source_entity": "Entity name from list above",
-      "target_entity": "Entity name from list above", 
-      "relationship_type": "causal|spatial|functional|temporal|dependency",
-      "description": "Clear description of the relationship",
-      "confidence": 0.0-1.0,
-      "evidence_text": "Text snippet supporting this relationship"
-    }}
-  ]
-}}
+{schema_json}
 ```
 
 **INSTRUCTIONS:**
@@ -881,38 +1338,19 @@ Your task is to identify relationships between extracted entities based on the p
 4. Provide evidence text that supports each relationship
 5. Focus on medically and technically meaningful relationships
 6. Ensure relationship directions are correct (source → target)
+""".strip().format(schema_json=_compact_schema_json(_RELATIONSHIP_SCHEMA))
 
-**BEGIN RELATIONSHIP DETECTION:**
-    """.strip()
-
+# Relationship user part, assembled around the entity list and context text
+_RELATIONSHIP_ENTITIES_HEADER = "**EXTRACTED ENTITIES:**\n"
+_RELATIONSHIP_CONTEXT_HEADER = "\n\n**CONTEXT TEXT:**\n"
+_RELATIONSHIP_SUFFIX = "\n\n**BEGIN RELATIONSHIP DETECTION:**"
 
-def build_linac_subsystem_prompt(
-    page_content: str,
-    target_subsystem: str
-) -> str:
-    """
-    Build specialized prompt for specific LINAC subsystem extraction
-    
-    Args:
-        page_content: Text content to analyze
-        target_subsystem: Specific LINAC subsystem to focus on
-    """
-    
-    prompt_builder = MedicalDevicePrompts()
-    
-    if target_subsystem not in prompt_builder.linac_subsystems:
-        raise ValueError(f"Unknown LINAC subsystem: {target_subsystem}")
-    
-    subsystem_info = prompt_builder.linac_subsystems[target_subsystem]
-    components_text = ", ".join(subsystem_info["components"])
-    functions_text = ", ".join(subsystem_info["functions"])
-    
-    return f"""
+_SUBSYSTEM_SYSTEM_TEMPLATE = """
 You are an expert LINAC engineer specializing in the {target_subsystem}.
-Your task is to extract detailed information about this specific subsystem from the provided content.
+Your task is to extract detailed information about this specific subsystem from the content below.
 
 **TARGET SUBSYSTEM: {target_subsystem}**
-- Description: {subsystem_info["description"]}
+- Description: {description}
 - Key Components: {components_text}
 - Primary Functions: {functions_text}
 
@@ -923,50 +1361,9 @@ Your task is to extract detailed information about this specific subsystem from
 4. **Procedures**: Maintenance and troubleshooting procedures
 5. **Relationships**: How components interact within this subsystem
 
-**CONTENT TO ANALYZE:**
-{page_content}
-
 **OUTPUT FORMAT:**
 ```json
-{{
-  "subsystem": {{
-    "name": "{target_subsystem}",
-    "components": [
-      {{
-        "name": "string",
-        "type": "string", 
-        "function": "string",
-        "specifications": "string",
-        "confidence": 0.0-1.0
-      }}
-    ],
-    "error_codes": [
-      {{
-        "code": "string",
-        "description": "string",
-        "related_components": ["array"],
-        "confidence": 0.0-1.0
-      }}
-    ],
-    "procedures": [
-      {{
-        "name": "string",
-        "type": "string",
-        "related_components": ["array"],
-        "confidence": 0.0-1.0
-      }}
-    ],
-    "relationships": [
-      {{
-        "source_entity": "string",
-        "target_entity": "string",
-        "relationship_type": "string", 
-        "description": "string",
-        "confidence": 0.0-1.0
-      }}
-    ]
-  }}
-}}
+{schema_json}
 ```
 
 **SPECIALIZED INSTRUCTIONS FOR {target_subsystem}:**
@@ -975,6 +1372,169 @@ Your task is to extract detailed information about this specific subsystem from
 - Identify error codes that affect this subsystem
 - Note maintenance procedures specific to subsystem components
 - Map relationships between components within the subsystem
+""".strip()
+
+# Static subsystem system parts, formatted once per subsystem
+_SUBSYSTEM_PREFIXES: Dict[str, str] = {
+    subsystem: _SUBSYSTEM_SYSTEM_TEMPLATE.format(
+        target_subsystem=subsystem,
+        description=info["description"],
+        components_text=", ".join(info["components"]),
+        functions_text=", ".join(info["functions"]),
+        schema_json=_compact_schema_json(_build_subsystem_schema(subsystem))
+    )
+    for subsystem, info in _LINAC_SUBSYSTEMS.items()
+}
+
+_VALID_SUBSYSTEMS = frozenset(_SUBSYSTEM_PREFIXES)
+_SUBSYSTEM_LIST_STR = ", ".join(sorted(_VALID_SUBSYSTEMS))
 
-**BEGIN SUBSYSTEM EXTRACTION:**
-    """.strip()
+# User part wrapped around the page content
+_SUBSYSTEM_CONTENT_HEADER = "**CONTENT TO ANALYZE:**\n"
+_SUBSYSTEM_SUFFIX = "\n\n**BEGIN SUBSYSTEM EXTRACTION:**"
+
+# Entity types accepted in an extraction focus list
+_VALID_ENTITIES = frozenset(sys.intern(entity) for entity in (
+    "error_codes", "components", "procedures", 
+    "safety_protocols", "technical_specifications",
+    "systems", "subsystems", "spare_parts", "relationships"
+))
+
+
+@lru_cache(maxsize=1)
+def _get_builder() -> MedicalDevicePrompts:
+    """Get the shared prompt builder used by the module-level helpers"""
+    
+    return MedicalDevicePrompts()
+
+
+def get_device_specific_vocabulary(device_type: str) -> List[str]:
+    """Get vocabulary specific to device type"""
+    
+    prompt_builder = _get_builder()
+    return list(prompt_builder.device_vocabularies.get(device_type, ()))
+
+
+def validate_extraction_focus(focus_list: List[str]) -> List[str]:
+    """Validate and clean extraction focus list"""
+    
+    # Interned so focus entries parsed from requests share the canonical strings
+    return [sys.intern(entity) for entity in focus_list if entity in _VALID_ENTITIES]
+
+
+def build_relationship_detection_prompt(
+    entities: List[Dict[str, Any]], 
+    context_text: str,
+    device_type: Optional[str] = None
+) -> PromptParts:
+    """
+    Build specialized prompt for relationship detection between entities
+    
+    Args:
+        entities: List of already extracted entities
+        context_text: Original text context
+        device_type: Deprecated and ignored, the prompt is the same for every device
+        
+    Returns:
+        Static system part and the user part with entities and context
+    """
+    
+    if device_type is not None:
+        warnings.warn(
+            "build_relationship_detection_prompt() ignores device_type, which is deprecated",
+            DeprecationWarning,
+            stacklevel=2
+        )
+    
+    # An entity's name is used if it has one at all, otherwise its code; the
+    # code is only looked up for entities without a name. join materializes
+    # its input anyway, so hand it a list directly
+    entities_text = "\n".join([
+        f"- {entity['name'] if 'name' in entity else entity.get('code', 'Unknown')} ({entity.get('type', 'Unknown')})"
+        for entity in entities
+    ])
+    
+    return PromptParts(
+        system=_RELATIONSHIP_SYSTEM_PROMPT,
+        user="".join([
+            _RELATIONSHIP_ENTITIES_HEADER,
+            entities_text,
+            _RELATIONSHIP_CONTEXT_HEADER,
+            context_text,
+            _RELATIONSHIP_SUFFIX
+        ])
+    )
+
+
+def build_linac_subsystem_prompt(
+    page_content: str,
+    target_subsystem: str
+) -> PromptParts:
+    """
+    Build specialized prompt for specific LINAC subsystem extraction
+    
+    Args:
+        page_content: Text content to analyze
+        target_subsystem: Specific LINAC subsystem to focus on
+        
+    Returns:
+        Subsystem-specific system part and the user part with the page content
+    """
+    
+    if target_subsystem not in _VALID_SUBSYSTEMS:
+        raise ValueError(f"Unknown LINAC subsystem: {target_subsystem}. Valid: {_SUBSYSTEM_LIST_STR}")
+    
+    return PromptParts(
+        system=_SUBSYSTEM_PREFIXES[target_subsystem],
+        user=_SUBSYSTEM_CONTENT_HEADER + page_content + _SUBSYSTEM_SUFFIX
+    )
+
+
+def build_linac_subsystem_prompts(
+    pages: List[str],
+    target_subsystem: str
+) -> Iterator[PromptParts]:
+    """
+    Build subsystem extraction prompts for a batch of pages
+    
+    Every prompt shares the same system part object, so callers can send it
+    once as a cached prefix and vary only the user part.
+    
+    Args:
+        pages: Text content of each page to analyze
+        target_subsystem: Specific LINAC subsystem to focus on
+    """
+    
+    if target_subsystem not in _VALID_SUBSYSTEMS:
+        raise ValueError(f"Unknown LINAC subsystem: {target_subsystem}. Valid: {_SUBSYSTEM_LIST_STR}")
+    
+    system_prompt = _SUBSYSTEM_PREFIXES[target_subsystem]
+    
+    return (
+        PromptParts(system=system_prompt, user=_SUBSYSTEM_CONTENT_HEADER + page + _SUBSYSTEM_SUFFIX)
+        for page in pages
+    )
+
+
+def build_all_subsystem_prompts(pages: List[str]) -> Dict[Tuple[int, str], PromptParts]:
+    """
+    Build subsystem extraction prompts for every page and every LINAC subsystem
+    
+    Args:
+        pages: Text content of each page to analyze
+        
+    Returns:
+        Dictionary mapping (page index, subsystem name) to its prompt
+    """
+    
+    return {
+        (page_index, subsystem): prompt_parts
+        for subsystem in sorted(_VALID_SUBSYSTEMS)
+        for page_index, prompt_parts in enumerate(build_linac_subsystem_prompts(pages, subsystem))
+    }
+
+
+def clear_prompt_cache() -> None:
+    """Clear all memoized prompt fragments"""
+    
+    MedicalDevicePrompts.reset_prompt_cache()
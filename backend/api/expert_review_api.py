@@ -3,15 +3,27 @@ Expert Review API for Ontology Dashboard
 Provides REST endpoints for expert review and validation interface
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
-import json
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
+import aiofiles
+import asyncio
+import dataclasses
+import hashlib
+import ijson
+import heapq
+import logging
+import orjson
 import os
-import shutil
+from bisect import bisect_right
+from collections import Counter
 from datetime import datetime
+from fnmatch import fnmatch
+from functools import lru_cache
+from itertools import combinations, count, islice
 import uuid
 from pathlib import Path
 
@@ -24,9 +36,28 @@ from backend.models.ontology_models import (
 )
 from backend.core.ontology_builder import OntologyBuilder
 from backend.verification.ontology_validator import OntologyValidator
+from backend.verification.entity_validator import create_entity_validator, ValidationAction
+from backend.verification.relationship_validator import create_relationship_validator, HIERARCHICAL_RELATIONSHIP_TYPES
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/expert-review", tags=["expert-review"])
 
+# Validators are stateless apart from their rule tables and review log, so
+# one instance of each serves every request
+_entity_validator = create_entity_validator()
+_rel_validator = create_relationship_validator()
+
+# Expert review action names accepted by the review endpoint
+_REVIEW_ACTIONS = {
+    "approve": ValidationAction.APPROVE,
+    "reject": ValidationAction.REJECT,
+    "request_revision": ValidationAction.REQUEST_REVISION,
+    "update_confidence": ValidationAction.UPDATE_CONFIDENCE,
+    "edit_properties": ValidationAction.EDIT_PROPERTIES,
+    "add_comment": ValidationAction.ADD_COMMENT
+}
+
 # Pydantic models for API requests/responses
 class EntityUpdateRequest(BaseModel):
     entity_id: str
@@ -61,6 +92,35 @@ class ImportRequest(BaseModel):
     import_mode: str = "merge"  # "merge", "replace", "append"
     validate_only: bool = False
 
+# Structure of uploaded import files. Only the root object and its arrays
+# are enforced: item fields are optional, untyped and extra fields are kept,
+# so missing or odd values (e.g. numeric ids) are still handled per item by
+# the import pipeline instead of rejecting the whole file
+class ImportEntity(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    
+    id: Any = None
+    entity_type: Any = None
+    label: Any = None
+    name: Any = None
+    description: Any = None
+    metadata: Any = None
+
+class ImportRelationship(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    
+    id: Any = None
+    relationship_type: Any = None
+    source_entity_id: Any = None
+    target_entity_id: Any = None
+    description: Any = None
+
+class ImportPayload(BaseModel):
+    entities: List[ImportEntity] = []
+    relationships: List[ImportRelationship] = []
+
+_IMPORT_ADAPTER = TypeAdapter(ImportPayload)
+
 # Global storage (in production, this would be a proper database)
 ontology_data = {
     "systems": [],
@@ -70,132 +130,539 @@ ontology_data = {
     "relationships": []
 }
 
+# Serializes the request handlers that change ontology_data and its indexes.
+# Changes are only applied on the event loop; the loader and importer hold
+# the lock while they read and parse in the threadpool, then apply their
+# results. Readers take no lock: they work on the lists as they stand
+# between awaits, and hand work for the threadpool a _snapshot
+_write_lock = asyncio.Lock()
+
+def _snapshot(collection_name: str) -> Tuple[Any, ...]:
+    """Get a frozen copy of an ontology_data collection"""
+    return tuple(ontology_data[collection_name])
+
+# The entity collections of ontology_data, sharing its lists, for passes over
+# every entity that have no use for the relationships list
+entity_collections: Dict[str, List[Any]] = {
+    name: items for name, items in ontology_data.items() if name != "relationships"
+}
+
 # Flag to track if PDF results have been loaded
 pdf_results_loaded = False
 
-def load_pdf_results_into_dashboard():
-    """Load the latest PDF processing results into the dashboard"""
-    import os
-    import glob
-    from pathlib import Path
+# Where PDF processing results are picked up from, and the defaults used
+# when converting them for the dashboard
+_RESULTS_DIR = Path("data/real_pdf_results")
+_ENTITIES_GLOB = "*_entities_*.json"
+_ONTOLOGY_GLOB = "*_ontology_*.json"
+_NO_DESC = 'No description available'
+_UNKNOWN = 'Unknown Component'
+
+# Confidence tiers: below 0.6 needs revision, below 0.8 pending review,
+# otherwise approved
+_CONF_THRESHOLDS = (0.6, 0.8)
+_CONF_STATUSES = (
+    ValidationStatus.NEEDS_REVISION,
+    ValidationStatus.PENDING_REVIEW,
+    ValidationStatus.EXPERT_APPROVED
+)
+
+# Enum members by value, for converting request strings without going
+# through the enum constructor
+_STATUS_FROM_STR = {status.value: status for status in ValidationStatus}
+_REL_TYPE_FROM_STR = {rel_type.value: rel_type for rel_type in RelationshipType}
+
+# Base priority of the statuses that put an entity in the validation queue
+_QUEUE_PRIORITY = {
+    ValidationStatus.NOT_VALIDATED: 10,
+    ValidationStatus.NEEDS_REVISION: 8,
+    ValidationStatus.PENDING_REVIEW: 5
+}
+
+def _to_status(value) -> ValidationStatus:
+    """Convert a status value to ValidationStatus, raising ValueError if invalid"""
+    status = _STATUS_FROM_STR.get(value)
+    return status if status is not None else ValidationStatus(value)
+
+def _to_relationship_type(value) -> RelationshipType:
+    """Convert a relationship type value to RelationshipType, raising ValueError if invalid"""
+    rel_type = _REL_TYPE_FROM_STR.get(value)
+    return rel_type if rel_type is not None else RelationshipType(value)
+
+def _last_modified_iso(metadata) -> str:
+    """Get metadata.last_modified as ISO text, cached until last_modified is reassigned"""
+    last_modified = metadata.last_modified
+    cached = metadata.__dict__.get('_last_modified_iso')
+    if cached is None or cached[0] is not last_modified:
+        cached = metadata._last_modified_iso = (last_modified, last_modified.isoformat())
+    return cached[1]
+
+# Review history kept per entity or relationship; older reviews are dropped
+# once the log is full. Entity and relationship payloads carry only the most
+# recent reviews, the kept history is served by the review-history endpoint
+_REVIEW_LOG_SIZE = 500
+_RECENT_REVIEWS = 10
+
+def _record_review(metadata, review: Dict[str, Any]):
+    """Append an expert review to metadata's review history, dropping the oldest past the log size"""
+    reviews = metadata.expert_reviews
+    reviews.append(review)
+    if len(reviews) > _REVIEW_LOG_SIZE:
+        del reviews[:-_REVIEW_LOG_SIZE]
+
+# (path, mtime, size) of the entities and ontology files behind the loaded
+# PDF results, with the data version the load left behind. A reload of
+# unchanged files is skipped only while the data is still at that version,
+# so expert edits and imports are reset by an explicit reload
+_last_loaded_fp: Optional[Tuple[Any, ...]] = None
+
+# Lookup indexes over ontology_data: entity id -> (entity, collection name),
+# relationships by source entity, target entity and id, and entity counts per
+# validation status. They are kept up to date by the mutating helpers below and rebuilt
+# if the collections change size behind their back (e.g. scripts clearing
+# ontology_data directly)
+entity_index: Dict[str, Tuple[Any, str]] = {}
+_rel_by_source: Dict[str, List[OntologyRelationship]] = {}
+_rel_by_target: Dict[str, List[OntologyRelationship]] = {}
+_rel_by_id: Dict[str, OntologyRelationship] = {}
+status_counts: Counter = Counter()
+_indexed_sizes: Tuple[int, ...] = ()
+
+# Validation queue: a heap of (-priority, sequence, entity id) entries for
+# entities whose status needs attention. Entities are re-pushed when their
+# status or confidence changes; superseded entries are dropped lazily when
+# they surface, using the latest entry per entity id
+_pending_queue: List[Tuple[float, int, str]] = []
+_queue_entries: Dict[str, Tuple[float, int, str]] = {}
+_queue_sequence = count()
+
+# Version of ontology_data, bumped by the index and cache helpers on every
+# change; with a per-process tag it forms the ETag of the overview and
+# validation summary responses, and the serialized overview and
+# visualization graph bodies are cached per version
+_DATA_EPOCH = uuid.uuid4().hex[:8]
+_data_version = 0
+_overview_cache: Optional[Tuple[int, bytes]] = None
+_graph_cache: Dict[bool, Tuple[int, bytes]] = {}
+
+def _bump_data_version():
+    """Mark ontology_data as changed"""
+    global _data_version
+    _data_version += 1
+
+def _data_etag(variant: str = "") -> str:
+    """Get the ETag of responses derived from the whole of ontology_data, per response variant"""
+    _sync_indexes()
+    return f'W/"{_DATA_EPOCH}-{_data_version}{variant}"'
+
+def _entity_etag(entity) -> str:
+    """Get the ETag of responses derived from a single entity"""
+    metadata = entity.metadata
+    reviews = getattr(metadata, 'expert_reviews', None) or ()
+    key = f"{_DATA_EPOCH}:{entity.id}:{metadata.last_modified.timestamp()}:{len(reviews)}:{entity.image_url}"
+    return f'"{hashlib.md5(key.encode()).hexdigest()}"'
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the client's If-None-Match header covers etag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
+
+def _with_timestamp(body: bytes, field: str) -> bytes:
+    """Append a field holding the current time to a serialized JSON object"""
+    return b'%s,"%s":%s}' % (body[:-1], field.encode(), orjson.dumps(datetime.now().isoformat()))
+
+# Serialized results of whole-ontology analyses by name, with the data
+# version each was computed from and the field every response stamps with
+# the time it is served; cached bodies leave that field out
+_analysis_cache: Dict[str, Tuple[int, bytes, str]] = {}
+
+def _cached_analysis(name: str) -> Optional[Response]:
+    """Get the cached response of an analysis, or None if the data changed since it ran"""
+    _sync_indexes()
+    cached = _analysis_cache.get(name)
+    if cached is not None and cached[0] == _data_version:
+        return Response(content=_with_timestamp(cached[1], cached[2]), media_type="application/json")
+    return None
+
+def _cache_analysis(name: str, version: int, content: Dict[str, Any], timestamp_field: str) -> Response:
+    """Serialize the result of an analysis of a data version, caching it for that version"""
+    body = orjson.dumps(content)
+    _analysis_cache[name] = (version, body, timestamp_field)
+    return Response(content=_with_timestamp(body, timestamp_field), media_type="application/json")
+
+def _collection_sizes() -> Tuple[int, ...]:
+    """Get the current size of every ontology collection"""
+    return tuple(len(entities) for entities in ontology_data.values())
+
+def _index_entity(entity, collection_name: str):
+    """Register an entity in the id index"""
+    global _indexed_sizes
+    # First registration wins, matching a scan of the collections in order
+    entity_index.setdefault(entity.id, (entity, collection_name))
+    status_counts[entity.metadata.validation_status] += 1
+    _enqueue_entity(entity)
+    _indexed_sizes = _collection_sizes()
+    _bump_data_version()
+
+def _add_relationship_keys(relationship):
+    """Add a relationship to the source, target and id indexes"""
+    _rel_by_source.setdefault(relationship.source_entity_id, []).append(relationship)
+    _rel_by_target.setdefault(relationship.target_entity_id, []).append(relationship)
+    # First registration wins, matching a scan of the relationships in order
+    _rel_by_id.setdefault(relationship.id, relationship)
+
+def _index_relationship(relationship):
+    """Register a relationship in the relationship indexes"""
+    global _indexed_sizes
+    _add_relationship_keys(relationship)
+    _indexed_sizes = _collection_sizes()
+    _bump_data_version()
+
+def _unindex_relationship(relationship):
+    """Remove a relationship from the relationship indexes"""
+    global _indexed_sizes
+    for index, key in ((_rel_by_source, relationship.source_entity_id),
+                       (_rel_by_target, relationship.target_entity_id)):
+        related = index.get(key, [])
+        # Match by identity, equal-valued duplicates are distinct relationships
+        for i, rel in enumerate(related):
+            if rel is relationship:
+                del related[i]
+                break
+    if _rel_by_id.get(relationship.id) is relationship:
+        del _rel_by_id[relationship.id]
+        # Another relationship may share the id
+        for rel in ontology_data["relationships"]:
+            if rel.id == relationship.id and rel is not relationship:
+                _rel_by_id[rel.id] = rel
+                break
+    _indexed_sizes = _collection_sizes()
+    _bump_data_version()
+
+def _rebuild_indexes():
+    """Rebuild the lookup indexes from ontology_data"""
+    global _indexed_sizes
+    entity_index.clear()
+    _rel_by_source.clear()
+    _rel_by_target.clear()
+    _rel_by_id.clear()
+    status_counts.clear()
     
-    global pdf_results_loaded
+    for collection_name, entities in entity_collections.items():
+        for entity in entities:
+            entity_index.setdefault(entity.id, (entity, collection_name))
+            status_counts[entity.metadata.validation_status] += 1
     
-    try:
-        # Look for the latest results in the output directory
-        results_dir = Path("data/real_pdf_results")
-        if not results_dir.exists():
-            return False
-        
-        # Find the most recent entities file
-        entities_files = glob.glob(str(results_dir / "*_entities_*.json"))
-        if not entities_files:
-            return False
-        
-        # Get the most recent file
-        latest_entities_file = max(entities_files, key=os.path.getctime)
-        
-        # Load entities data
-        with open(latest_entities_file, 'r', encoding='utf-8') as f:
-            entities_data = json.load(f)
-        
-        # Clear existing data
-        ontology_data["systems"].clear()
-        ontology_data["subsystems"].clear()
-        ontology_data["components"].clear()
-        ontology_data["spare_parts"].clear()
-        ontology_data["relationships"].clear()
-        
-        # Keep track of loaded entity IDs and content to prevent duplicates
-        loaded_entity_ids = set()
-        loaded_entity_content = set()
-        
-        # Convert entities to ontology models
-        from backend.models.entity import ErrorCode, Component as EntityComponent, Procedure
-        
-        for entity_data in entities_data.get('entities', []):
-            try:
-                # Skip if we've already loaded this entity (prevent duplicates by ID)
-                entity_id = entity_data.get('id')
-                if entity_id in loaded_entity_ids:
-                    continue
-                
-                # Also check for content-based duplicates
-                content_key = _generate_content_key(entity_data)
-                if content_key in loaded_entity_content:
-                    continue
-                
-                loaded_entity_ids.add(entity_id)
-                loaded_entity_content.add(content_key)
-                
-                # Determine entity type - check for specific fields to identify type
-                entity_type = None
-                if 'code' in entity_data and entity_data.get('code'):
-                    entity_type = 'error_code'
-                elif 'name' in entity_data:
-                    entity_type = 'component'
-                else:
-                    entity_type = 'component'  # Default fallback
-                
-                # Create component for dashboard display (all entities shown as components for now)
-                if entity_type == 'error_code':
-                    component = Component(
-                        label=f"Error Code: {entity_data.get('code', 'Unknown')}",
-                        description=entity_data.get('description', 'No description available'),
-                        component_type="Error Code"
-                    )
-                else:
-                    component = Component(
-                        label=entity_data.get('name', entity_data.get('label', 'Unknown Component')),
-                        description=entity_data.get('description', 'No description available'),
-                        component_type=entity_data.get('component_type', 'Generic'),
-                        part_number=entity_data.get('part_number', ''),
-                        manufacturer=entity_data.get('manufacturer', '')
-                    )
-                
-                # Set confidence score
-                confidence = entity_data.get('confidence', entity_data.get('confidence_score', 0.5))
-                component.metadata.confidence_score = float(confidence)
-                
-                # Set validation status based on confidence
-                if confidence >= 0.8:
-                    component.metadata.validation_status = ValidationStatus.EXPERT_APPROVED
-                elif confidence >= 0.6:
-                    component.metadata.validation_status = ValidationStatus.PENDING_REVIEW
-                else:
-                    component.metadata.validation_status = ValidationStatus.NEEDS_REVISION
-                
-                # Use the original entity ID if available
-                if entity_id:
-                    component.id = entity_id
-                
-                ontology_data["components"].append(component)
-                    
-            except Exception as e:
-                print(f"Error processing entity: {e}")
+    for relationship in ontology_data["relationships"]:
+        _add_relationship_keys(relationship)
+    
+    _rebuild_queue()
+    
+    _indexed_sizes = _collection_sizes()
+    _bump_data_version()
+
+def _queue_priority(entity) -> Optional[float]:
+    """Get an entity's validation queue priority, or None if it does not need validation"""
+    metadata = entity.metadata
+    base_priority = _QUEUE_PRIORITY.get(metadata.validation_status)
+    if base_priority is None:
+        return None
+    # Lower confidence = higher priority
+    return base_priority + (1.0 - metadata.confidence_score) * 5
+
+def _enqueue_entity(entity):
+    """Queue an entity for validation at its current priority, superseding earlier entries"""
+    priority = _queue_priority(entity)
+    if priority is None:
+        _queue_entries.pop(entity.id, None)
+        return
+    
+    entry = (-priority, next(_queue_sequence), entity.id)
+    _queue_entries[entity.id] = entry
+    heapq.heappush(_pending_queue, entry)
+    
+    # Compact once superseded entries dominate the heap
+    if len(_pending_queue) > 2 * len(_queue_entries) + 64:
+        _pending_queue[:] = _queue_entries.values()
+        heapq.heapify(_pending_queue)
+
+def _rebuild_queue():
+    """Rebuild the validation queue from the entity index"""
+    _pending_queue.clear()
+    _queue_entries.clear()
+    for entity, _ in entity_index.values():
+        priority = _queue_priority(entity)
+        if priority is not None:
+            entry = (-priority, next(_queue_sequence), entity.id)
+            _queue_entries[entity.id] = entry
+            _pending_queue.append(entry)
+    heapq.heapify(_pending_queue)
+
+def _sync_indexes():
+    """Rebuild the lookup indexes if ontology_data was resized outside the helpers"""
+    if _indexed_sizes != _collection_sizes():
+        _rebuild_indexes()
+
+def _track_status_change(old_status: ValidationStatus, new_status: ValidationStatus):
+    """Move an entity between validation status counts"""
+    if old_status != new_status:
+        status_counts[old_status] -= 1
+        status_counts[new_status] += 1
+
+def _lookup_entity(entity_id: str) -> Optional[Tuple[Any, str]]:
+    """Get (entity, collection name) for an entity id, or None if not found"""
+    _sync_indexes()
+    
+    entry = entity_index.get(entity_id)
+    if entry is not None and entry[0].id != entity_id:
+        # The entity's id was edited in place; resync once before giving up
+        _rebuild_indexes()
+        entry = entity_index.get(entity_id)
+    
+    return entry
+
+def _entity_to_dict(entity) -> Dict[str, Any]:
+    """Get the API dictionary of an entity or relationship, cached on it until it is modified"""
+    cached = entity.__dict__.get('_cached_dict')
+    if cached is None:
+        if not hasattr(entity, 'to_dict'):
+            return entity.__dict__
+        cached = entity.to_dict()
+        metadata = cached.get('metadata')
+        if isinstance(metadata, dict) and len(metadata.get('expert_reviews') or ()) > _RECENT_REVIEWS:
+            cached['metadata'] = {**metadata, 'expert_reviews': metadata['expert_reviews'][-_RECENT_REVIEWS:]}
+        entity._cached_dict = cached
+    return cached
+
+def _invalidate_entity_dict(entity):
+    """Drop the cached API dictionary of a modified entity or relationship"""
+    entity.__dict__.pop('_cached_dict', None)
+    _bump_data_version()
+
+def _get_entity_relationships(entity_id: str) -> List[OntologyRelationship]:
+    """Get relationships whose source or target is the given entity"""
+    _sync_indexes()
+    
+    outgoing = [rel for rel in _rel_by_source.get(entity_id, ()) if rel.source_entity_id == entity_id]
+    incoming = [
+        rel for rel in _rel_by_target.get(entity_id, ())
+        if rel.target_entity_id == entity_id and rel.source_entity_id != entity_id
+    ]
+    return outgoing + incoming
+
+def _lookup_relationship(relationship_id: str) -> Optional[OntologyRelationship]:
+    """Get a relationship by id, or None if not found"""
+    _sync_indexes()
+    
+    relationship = _rel_by_id.get(relationship_id)
+    if relationship is not None and relationship.id != relationship_id:
+        # The relationship's id was edited in place; resync once before giving up
+        _rebuild_indexes()
+        relationship = _rel_by_id.get(relationship_id)
+    
+    return relationship
+
+@lru_cache(maxsize=1)
+def _find_latest_result_files(results_dir: str, dir_mtime_ns: int) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Find the most recent entities and ontology files in the results directory
+    
+    Cached on the directory mtime, which changes whenever result files are
+    added, removed or renamed, so unchanged directories are not rescanned.
+    """
+    latest_entities = (None, 0.0)
+    latest_ontology = (None, 0.0)
+    
+    with os.scandir(results_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith('.'):
                 continue
-        
-        # Try to load ontology file for relationships
-        ontology_files = glob.glob(str(results_dir / "*_ontology_*.json"))
-        if ontology_files:
-            latest_ontology_file = max(ontology_files, key=os.path.getctime)
-            try:
-                with open(latest_ontology_file, 'r', encoding='utf-8') as f:
-                    ontology_result = json.load(f)
+            
+            if fnmatch(name, _ENTITIES_GLOB):
+                ctime = entry.stat().st_ctime
+                if latest_entities[0] is None or ctime > latest_entities[1]:
+                    latest_entities = (entry.path, ctime)
+            elif fnmatch(name, _ONTOLOGY_GLOB):
+                ctime = entry.stat().st_ctime
+                if latest_ontology[0] is None or ctime > latest_ontology[1]:
+                    latest_ontology = (entry.path, ctime)
+    
+    return latest_entities[0], latest_ontology[0]
+
+def _file_fingerprint(path: Optional[str]) -> Optional[Tuple[str, float, int]]:
+    """Get (path, mtime, size) for a file, or None if there is no file"""
+    if not path:
+        return None
+    stat = os.stat(path)
+    return path, stat.st_mtime, stat.st_size
+
+def _locate_pdf_results() -> Optional[Tuple[str, Optional[str], Any]]:
+    """Find the latest entities and ontology result files with their fingerprints, or None if there are none"""
+    # Look for the latest results in the output directory
+    results_dir = _RESULTS_DIR
+    if not results_dir.exists():
+        return None
+    
+    # Find the most recent entities and ontology files
+    latest_entities_file, latest_ontology_file = _find_latest_result_files(
+        str(results_dir), results_dir.stat().st_mtime_ns
+    )
+    if not latest_entities_file:
+        return None
+    
+    fp = (_file_fingerprint(latest_entities_file), _file_fingerprint(latest_ontology_file))
+    return latest_entities_file, latest_ontology_file, fp
+
+def _read_pdf_results(latest_entities_file: str, latest_ontology_file: Optional[str]) -> Tuple[List[Component], Any]:
+    """Parse PDF result files into dashboard components and the ontology's hierarchical structure"""
+    # Load entities data
+    with open(latest_entities_file, 'rb') as f:
+        entities_data = orjson.loads(f.read())
+    
+    # Keep track of loaded entity IDs and content to prevent duplicates
+    loaded_entity_ids = set()
+    loaded_entity_content = set()
+    
+    # Convert entities to ontology models
+    from backend.models.entity import ErrorCode, Component as EntityComponent, Procedure
+    
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+    failed_entities = 0
+    
+    # Components are collected locally and replace the stored data in one go
+    new_components: List[Component] = []
+    new_components_append = new_components.append
+    
+    for entity_data in entities_data.get('entities', []):
+        try:
+            get = entity_data.get
+            
+            # Skip if we've already loaded this entity (prevent duplicates by ID)
+            entity_id = get('id')
+            if entity_id in loaded_entity_ids:
+                continue
+            
+            # Also check for content-based duplicates
+            content_key = _generate_content_key(entity_data)
+            if content_key in loaded_entity_content:
+                continue
+            
+            loaded_entity_ids.add(entity_id)
+            loaded_entity_content.add(content_key)
+            
+            # Determine entity type - check for specific fields to identify type
+            entity_type = None
+            if 'code' in entity_data and get('code'):
+                entity_type = 'error_code'
+            elif 'name' in entity_data:
+                entity_type = 'component'
+            else:
+                entity_type = 'component'  # Default fallback
+            
+            # Create component for dashboard display (all entities shown as components for now)
+            if entity_type == 'error_code':
+                component = Component(
+                    label=f"Error Code: {get('code', 'Unknown')}",
+                    description=get('description', _NO_DESC),
+                    component_type="Error Code"
+                )
+            else:
+                component = Component(
+                    label=get('name', get('label', _UNKNOWN)),
+                    description=get('description', _NO_DESC),
+                    component_type=get('component_type', 'Generic'),
+                    part_number=get('part_number', ''),
+                    manufacturer=get('manufacturer', '')
+                )
+            
+            # Set confidence score
+            confidence = get('confidence', get('confidence_score', 0.5))
+            metadata = component.metadata
+            metadata.confidence_score = float(confidence)
+            
+            # Set validation status based on confidence
+            metadata.validation_status = _CONF_STATUSES[bisect_right(_CONF_THRESHOLDS, confidence)]
+            
+            # Use the original entity ID if available
+            if entity_id:
+                component.id = entity_id
+            
+            new_components_append(component)
                 
-                # Create relationships from ontology structure
-                if 'hierarchical_structure' in ontology_result:
-                    create_relationships_from_structure(ontology_result['hierarchical_structure'])
-                    
-            except Exception as e:
-                print(f"Error loading ontology file: {e}")
+        except Exception as e:
+            failed_entities += 1
+            if debug_enabled:
+                logger.debug("Error processing entity: %s", e)
+            continue
+    
+    if failed_entities:
+        logger.warning("Skipped %d entities that could not be processed from %s",
+                       failed_entities, latest_entities_file)
+    
+    # Try to load ontology file for relationships
+    structure = None
+    if latest_ontology_file:
+        try:
+            # Only the hierarchical structure is needed; stream it out of the
+            # file instead of materializing the whole ontology document
+            with open(latest_ontology_file, 'rb') as f:
+                structure = next(ijson.items(f, 'hierarchical_structure', use_float=True), None)
+        except Exception:
+            logger.exception("Error loading ontology file %s", latest_ontology_file)
+    
+    return new_components, structure
+
+async def load_pdf_results_into_dashboard():
+    """Load the latest PDF processing results into the dashboard"""
+    global pdf_results_loaded, _last_loaded_fp
+    
+    try:
+        async with _write_lock:
+            # File I/O and parsing run off the event loop
+            located = await run_in_threadpool(_locate_pdf_results)
+            if located is None:
+                return False
+            latest_entities_file, latest_ontology_file, fp = located
+            
+            # Skip re-parsing if the same files are already loaded and the
+            # dashboard has not been changed since
+            if pdf_results_loaded and _last_loaded_fp == (fp, _data_version):
+                return True
+            
+            new_components, structure = await run_in_threadpool(
+                _read_pdf_results, latest_entities_file, latest_ontology_file
+            )
+            
+            # Replace the existing data only once the files have been read
+            ontology_data["systems"].clear()
+            ontology_data["subsystems"].clear()
+            ontology_data["components"].clear()
+            ontology_data["spare_parts"].clear()
+            ontology_data["relationships"].clear()
+            _rebuild_indexes()
+            
+            ontology_data["components"].extend(new_components)
+            for component in new_components:
+                _index_entity(component, "components")
+            
+            # Create relationships from ontology structure
+            if structure is not None:
+                try:
+                    create_relationships_from_structure(structure)
+                except Exception:
+                    logger.exception("Error creating relationships from %s", latest_ontology_file)
+            
+            # Mark as loaded to prevent reloading
+            pdf_results_loaded = True
+            _last_loaded_fp = (fp, _data_version)
         
-        # Mark as loaded to prevent reloading
-        pdf_results_loaded = True
         return True
         
-    except Exception as e:
-        print(f"Error loading PDF results: {e}")
+    except Exception:
+        logger.exception("Error loading PDF results")
         return False
 
 def create_relationships_from_structure(structure, parent_id=None, level=0):
@@ -203,25 +670,45 @@ def create_relationships_from_structure(structure, parent_id=None, level=0):
     if not isinstance(structure, dict):
         return
     
+    # Lowercased labels are computed once and each structure key is matched
+    # against them at most once, however often it repeats in the hierarchy
+    component_labels = [(c.label.lower(), c.id) for c in ontology_data["components"]]
+    matches = {}
+    
+    def find_component_id(key):
+        key_lower = key.lower()
+        if key_lower not in matches:
+            matches[key_lower] = next(
+                (component_id for label, component_id in component_labels if key_lower in label),
+                None
+            )
+        return matches[key_lower]
+    
+    relationships = []
+    _collect_structure_relationships(structure, parent_id, level, find_component_id, relationships)
+    ontology_data["relationships"].extend(relationships)
+    for relationship in relationships:
+        _index_relationship(relationship)
+
+def _collect_structure_relationships(structure, parent_id, level, find_component_id, relationships):
+    """Collect hierarchical relationships from a structure level and its children"""
     for key, value in structure.items():
         if isinstance(value, dict):
             # Create relationship if we have a parent
-            if parent_id and ontology_data["components"]:
-                # Find components that match the key
-                matching_components = [c for c in ontology_data["components"] 
-                                     if key.lower() in c.label.lower()]
-                if matching_components:
-                    target_id = matching_components[0].id
+            if parent_id:
+                # Find the first component that matches the key
+                target_id = find_component_id(key)
+                if target_id:
                     relationship = OntologyRelationship(
                         relationship_type=RelationshipType.HAS_COMPONENT,
                         source_entity_id=parent_id,
                         target_entity_id=target_id,
                         description=f"Hierarchical relationship: {key}"
                     )
-                    ontology_data["relationships"].append(relationship)
+                    relationships.append(relationship)
             
             # Recurse into nested structure
-            create_relationships_from_structure(value, parent_id, level + 1)
+            _collect_structure_relationships(value, parent_id, level + 1, find_component_id, relationships)
 
 def _generate_content_key(entity_data: dict) -> str:
     """Generate a content-based key for deduplication"""
@@ -249,20 +736,20 @@ def _generate_content_key(entity_data: dict) -> str:
 async def load_pdf_results():
     """Load the latest PDF processing results into the dashboard"""
     try:
-        global pdf_results_loaded
-        # Reset the flag to allow manual reloading
-        pdf_results_loaded = False
+        # Rescan the results directory to allow manual reloading; files that
+        # have not changed since the last load are not parsed again
+        _find_latest_result_files.cache_clear()
         
-        success = load_pdf_results_into_dashboard()
+        success = await load_pdf_results_into_dashboard()
         if success:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": True,
                 "message": "PDF results loaded successfully",
                 "entities_loaded": len(ontology_data["components"]),
                 "relationships_loaded": len(ontology_data["relationships"])
             })
         else:
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "success": False,
                 "message": "No PDF results found or failed to load"
             })
@@ -273,28 +760,32 @@ async def load_pdf_results():
 async def clear_data():
     """Clear all ontology data from the dashboard"""
     try:
-        global pdf_results_loaded
-        
-        print("Clearing ontology data...")  # Debug log
-        
-        # Clear all data
-        ontology_data["systems"].clear()
-        ontology_data["subsystems"].clear()
-        ontology_data["components"].clear()
-        ontology_data["spare_parts"].clear()
-        ontology_data["relationships"].clear()
+        global pdf_results_loaded, _last_loaded_fp
         
-        # Reset the loaded flag
-        pdf_results_loaded = False
-        
-        print("Data cleared successfully")  # Debug log
-        
-        return JSONResponse(content={
-            "success": True,
-            "message": "All data cleared successfully"
-        })
+        async with _write_lock:
+            logger.debug("Clearing ontology data")
+            
+            # Clear all data
+            ontology_data["systems"].clear()
+            ontology_data["subsystems"].clear()
+            ontology_data["components"].clear()
+            ontology_data["spare_parts"].clear()
+            ontology_data["relationships"].clear()
+            _rebuild_indexes()
+            
+            # Reset the loaded flag and the cached result file lookup
+            pdf_results_loaded = False
+            _last_loaded_fp = None
+            _find_latest_result_files.cache_clear()
+            
+            logger.debug("Data cleared successfully")
+            
+            return ORJSONResponse(content={
+                "success": True,
+                "message": "All data cleared successfully"
+            })
     except Exception as e:
-        print(f"Error in clear_data: {e}")  # Debug log
+        logger.exception("Error in clear_data")
         raise HTTPException(status_code=500, detail=f"Error clearing data: {str(e)}")
 
 @router.post("/import-entities")
@@ -305,17 +796,21 @@ async def import_entities_file(file: UploadFile = File(...), expert_id: str = "c
         if not file.filename.endswith('.json'):
             raise HTTPException(status_code=400, detail="Only JSON files are supported")
         
-        # Read and parse JSON
+        # Parse and validate the file structure in one pass over the raw bytes,
+        # off the event loop since uploads can be several megabytes
         content = await file.read()
         try:
-            data = json.loads(content.decode('utf-8'))
-        except json.JSONDecodeError as e:
-            raise HTTPException(status_code=400, detail=f"Invalid JSON format: {str(e)}")
+            payload = await run_in_threadpool(_IMPORT_ADAPTER.validate_json, content)
+        except ValidationError as e:
+            if any(error["type"] == "json_invalid" for error in e.errors()):
+                raise HTTPException(status_code=400, detail=f"Invalid JSON format: {str(e)}")
+            raise HTTPException(status_code=400, detail=f"Invalid import file: {str(e)}")
+        data = payload.model_dump(exclude_unset=True)
         
         # Process import
         result = await process_import_data(data, expert_id, import_mode)
         
-        return JSONResponse(content=result)
+        return ORJSONResponse(content=result)
         
     except HTTPException:
         raise
@@ -332,7 +827,7 @@ async def import_entities_json(request: ImportRequest):
             request.import_mode,
             request.validate_only
         )
-        return JSONResponse(content=result)
+        return ORJSONResponse(content=result)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error importing data: {str(e)}")
@@ -355,90 +850,32 @@ async def process_import_data(data: Dict[str, Any], expert_id: str, import_mode:
         if not isinstance(data, dict):
             raise ValueError("Import data must be a JSON object")
         
-        # Clear existing data if replace mode
-        if import_mode == "replace" and not validate_only:
-            ontology_data["systems"].clear()
-            ontology_data["subsystems"].clear()
-            ontology_data["components"].clear()
-            ontology_data["spare_parts"].clear()
-            ontology_data["relationships"].clear()
-        
-        # Process entities
-        entities_data = data.get('entities', [])
-        if not isinstance(entities_data, list):
-            import_stats["errors"].append("'entities' field must be an array")
-        else:
-            for i, entity_data in enumerate(entities_data):
-                try:
-                    import_stats["entities_processed"] += 1
-                    
-                    # Validate required fields
-                    if not isinstance(entity_data, dict):
-                        import_stats["errors"].append(f"Entity {i}: Must be an object")
-                        continue
-                    
-                    entity_type = entity_data.get('entity_type', 'component')
-                    label = entity_data.get('label', entity_data.get('name', ''))
-                    
-                    if not label:
-                        import_stats["errors"].append(f"Entity {i}: Missing required 'label' or 'name' field")
-                        continue
-                    
-                    # Check for duplicates if merge mode
-                    if import_mode == "merge":
-                        content_key = _generate_content_key_for_import(entity_data)
-                        if _is_duplicate_entity(content_key, entity_type):
-                            import_stats["entities_skipped"] += 1
-                            import_stats["warnings"].append(f"Entity '{label}': Skipped duplicate")
-                            continue
-                    
-                    # Create entity based on type
-                    if not validate_only:
-                        entity = _create_entity_from_import(entity_data, entity_type, expert_id)
-                        if entity:
-                            _add_entity_to_collection(entity, entity_type)
-                            import_stats["entities_imported"] += 1
-                        else:
-                            import_stats["errors"].append(f"Entity '{label}': Failed to create")
-                    else:
-                        import_stats["entities_imported"] += 1
-                        
-                except Exception as e:
-                    import_stats["errors"].append(f"Entity {i}: {str(e)}")
-        
-        # Process relationships
-        relationships_data = data.get('relationships', [])
-        if relationships_data and isinstance(relationships_data, list):
-            for i, rel_data in enumerate(relationships_data):
-                try:
-                    import_stats["relationships_processed"] += 1
-                    
-                    if not isinstance(rel_data, dict):
-                        import_stats["errors"].append(f"Relationship {i}: Must be an object")
-                        continue
-                    
-                    # Validate required fields
-                    required_fields = ['relationship_type', 'source_entity_id', 'target_entity_id']
-                    missing_fields = [f for f in required_fields if not rel_data.get(f)]
-                    if missing_fields:
-                        import_stats["errors"].append(f"Relationship {i}: Missing fields: {missing_fields}")
-                        continue
-                    
-                    if not validate_only:
-                        relationship = _create_relationship_from_import(rel_data, expert_id)
-                        if relationship:
-                            ontology_data["relationships"].append(relationship)
-                            import_stats["relationships_imported"] += 1
-                        else:
-                            import_stats["errors"].append(f"Relationship {i}: Failed to create")
-                    else:
-                        import_stats["relationships_imported"] += 1
-                        
-                except Exception as e:
-                    import_stats["errors"].append(f"Relationship {i}: {str(e)}")
+        async with _write_lock:
+            # Deduplication and entity construction are CPU-bound; keep the event loop free
+            new_entities, new_relationships = await run_in_threadpool(
+                _build_import_data, data, expert_id, import_mode, validate_only, import_stats
+            )
+            
+            # Clear existing data if replace mode
+            if import_mode == "replace" and not validate_only:
+                ontology_data["systems"].clear()
+                ontology_data["subsystems"].clear()
+                ontology_data["components"].clear()
+                ontology_data["spare_parts"].clear()
+                ontology_data["relationships"].clear()
+                _rebuild_indexes()
+            
+            for collection_name, entities in new_entities.items():
+                _add_entities_to_collection(entities, collection_name)
+            if new_relationships:
+                ontology_data["relationships"].extend(new_relationships)
+                for relationship in new_relationships:
+                    _index_relationship(relationship)
         
         # Generate summary
         success = len(import_stats["errors"]) == 0
+        if not success:
+            logger.warning("Import finished with %d errors", len(import_stats["errors"]))
         message = "Import completed successfully" if success else "Import completed with errors"
         if validate_only:
             message = "Validation completed - " + message
@@ -459,6 +896,101 @@ async def process_import_data(data: Dict[str, Any], expert_id: str, import_mode:
             "validation_only": validate_only
         }
 
+def _build_import_data(data: Dict[str, Any], expert_id: str, import_mode: str, validate_only: bool,
+                       import_stats: Dict[str, Any]) -> Tuple[Dict[str, List[Any]], List[OntologyRelationship]]:
+    """Build the entities and relationships of imported data, counting them in import_stats"""
+    # Content keys of existing entities, built once per entity type on first use
+    existing_keys = {}
+    
+    # New entities per collection and new relationships, added to the
+    # store in one go once every item has been processed
+    new_entities: Dict[str, List[Any]] = {}
+    new_relationships: List[OntologyRelationship] = []
+    new_relationships_append = new_relationships.append
+    
+    # Process entities
+    entities_data = data.get('entities', [])
+    if not isinstance(entities_data, list):
+        import_stats["errors"].append("'entities' field must be an array")
+    else:
+        for i, entity_data in enumerate(entities_data):
+            try:
+                import_stats["entities_processed"] += 1
+                
+                # Validate required fields
+                if not isinstance(entity_data, dict):
+                    import_stats["errors"].append(f"Entity {i}: Must be an object")
+                    continue
+                
+                entity_type = entity_data.get('entity_type', 'component')
+                label = entity_data.get('label', entity_data.get('name', ''))
+                
+                if not label:
+                    import_stats["errors"].append(f"Entity {i}: Missing required 'label' or 'name' field")
+                    continue
+                
+                # Check for duplicates if merge mode
+                content_key = None
+                if import_mode == "merge":
+                    content_key = _generate_content_key_for_import(entity_data)
+                    if entity_type not in existing_keys:
+                        existing_keys[entity_type] = _collect_content_keys(entity_type)
+                    if content_key in existing_keys[entity_type]:
+                        import_stats["entities_skipped"] += 1
+                        import_stats["warnings"].append(f"Entity '{label}': Skipped duplicate")
+                        continue
+                
+                # Create entity based on type
+                if not validate_only:
+                    entity = _create_entity_from_import(entity_data, entity_type, expert_id, label)
+                    if entity:
+                        new_entities.setdefault(_collection_for_type(entity_type), []).append(entity)
+                        import_stats["entities_imported"] += 1
+                        
+                        # Catch duplicates within the same import batch
+                        if content_key is not None:
+                            existing_keys[entity_type].add(content_key)
+                    else:
+                        import_stats["errors"].append(f"Entity '{label}': Failed to create")
+                else:
+                    import_stats["entities_imported"] += 1
+                    
+            except Exception as e:
+                import_stats["errors"].append(f"Entity {i}: {str(e)}")
+    
+    # Process relationships
+    relationships_data = data.get('relationships', [])
+    if relationships_data and isinstance(relationships_data, list):
+        for i, rel_data in enumerate(relationships_data):
+            try:
+                import_stats["relationships_processed"] += 1
+                
+                if not isinstance(rel_data, dict):
+                    import_stats["errors"].append(f"Relationship {i}: Must be an object")
+                    continue
+                
+                # Validate required fields
+                required_fields = ['relationship_type', 'source_entity_id', 'target_entity_id']
+                missing_fields = [f for f in required_fields if not rel_data.get(f)]
+                if missing_fields:
+                    import_stats["errors"].append(f"Relationship {i}: Missing fields: {missing_fields}")
+                    continue
+                
+                if not validate_only:
+                    relationship = _create_relationship_from_import(rel_data, expert_id)
+                    if relationship:
+                        new_relationships_append(relationship)
+                        import_stats["relationships_imported"] += 1
+                    else:
+                        import_stats["errors"].append(f"Relationship {i}: Failed to create")
+                else:
+                    import_stats["relationships_imported"] += 1
+                    
+            except Exception as e:
+                import_stats["errors"].append(f"Relationship {i}: {str(e)}")
+    
+    return new_entities, new_relationships
+
 def _generate_content_key_for_import(entity_data: dict) -> str:
     """Generate content key for import deduplication"""
     entity_type = entity_data.get('entity_type', 'component')
@@ -467,8 +999,8 @@ def _generate_content_key_for_import(entity_data: dict) -> str:
     
     return f"{entity_type}:{label}:{description}".lower().strip()
 
-def _is_duplicate_entity(content_key: str, entity_type: str) -> bool:
-    """Check if entity already exists based on content"""
+def _collect_content_keys(entity_type: str) -> set:
+    """Collect content keys of existing entities for import deduplication"""
     collection_map = {
         'system': ontology_data["systems"],
         'subsystem': ontology_data["subsystems"], 
@@ -478,23 +1010,39 @@ def _is_duplicate_entity(content_key: str, entity_type: str) -> bool:
     
     entities = collection_map.get(entity_type, ontology_data["components"])
     
-    for entity in entities:
-        existing_key = f"{entity_type}:{entity.label}:{entity.description[:100]}".lower().strip()
-        if existing_key == content_key:
-            return True
-    return False
+    return {_entity_content_key(entity, entity_type) for entity in entities}
+
+def _entity_content_key(entity, entity_type: str) -> str:
+    """Get the content key of an existing entity, cached until its label or description changes"""
+    label = entity.label
+    description = entity.description
+    cached = entity.__dict__.get('_content_key')
+    if cached is not None and cached[0] == entity_type and cached[1] is label and cached[2] is description:
+        return cached[3]
+    
+    content_key = f"{entity_type}:{label}:{description[:100]}".lower().strip()
+    entity._content_key = (entity_type, label, description, content_key)
+    return content_key
+
+def _is_duplicate_entity(content_key: str, entity_type: str) -> bool:
+    """Check if entity already exists based on content"""
+    return content_key in _collect_content_keys(entity_type)
 
-def _create_entity_from_import(entity_data: dict, entity_type: str, expert_id: str):
+def _create_entity_from_import(entity_data: dict, entity_type: str, expert_id: str, label: Optional[str] = None):
     """Create entity object from import data"""
     try:
-        # Common fields
-        label = entity_data.get('label', entity_data.get('name', ''))
-        description = entity_data.get('description', '')
+        # Bound once, the field reads below run once per imported entity
+        get = entity_data.get
+        
+        # Common fields; the import loop passes the label it already resolved
+        if label is None:
+            label = get('label', get('name', ''))
+        description = get('description', '')
         
         # Create metadata
         metadata = OntologyMetadata()
         metadata.extraction_method = "import"
-        metadata.expert_reviews.append({
+        _record_review(metadata, {
             "expert_id": expert_id,
             "timestamp": datetime.now().isoformat(),
             "comment": "Entity imported",
@@ -508,13 +1056,12 @@ def _create_entity_from_import(entity_data: dict, entity_type: str, expert_id: s
                 metadata.confidence_score = float(meta['confidence_score'])
             if 'validation_status' in meta:
                 try:
-                    metadata.validation_status = ValidationStatus(meta['validation_status'])
+                    metadata.validation_status = _to_status(meta['validation_status'])
                 except ValueError:
                     metadata.validation_status = ValidationStatus.NOT_VALIDATED
         
         # Create entity based on type
         if entity_type == 'system':
-            from backend.models.ontology_models import SystemType
             system_type = SystemType.GENERIC
             if 'system_type' in entity_data:
                 try:
@@ -526,13 +1073,12 @@ def _create_entity_from_import(entity_data: dict, entity_type: str, expert_id: s
                 label=label,
                 description=description,
                 system_type=system_type,
-                model_number=entity_data.get('model_number', ''),
-                manufacturer=entity_data.get('manufacturer', ''),
+                model_number=get('model_number', ''),
+                manufacturer=get('manufacturer', ''),
                 metadata=metadata
             )
             
         elif entity_type == 'subsystem':
-            from backend.models.ontology_models import SubsystemType
             subsystem_type = SubsystemType.MECHANICAL
             if 'subsystem_type' in entity_data:
                 try:
@@ -544,7 +1090,7 @@ def _create_entity_from_import(entity_data: dict, entity_type: str, expert_id: s
                 label=label,
                 description=description,
                 subsystem_type=subsystem_type,
-                parent_system_id=entity_data.get('parent_system_id', ''),
+                parent_system_id=get('parent_system_id', ''),
                 metadata=metadata
             )
             
@@ -552,10 +1098,10 @@ def _create_entity_from_import(entity_data: dict, entity_type: str, expert_id: s
             entity = SparePart(
                 label=label,
                 description=description,
-                parent_component_id=entity_data.get('parent_component_id', ''),
-                part_number=entity_data.get('part_number', ''),
-                manufacturer=entity_data.get('manufacturer', ''),
-                supplier=entity_data.get('supplier', ''),
+                parent_component_id=get('parent_component_id', ''),
+                part_number=get('part_number', ''),
+                manufacturer=get('manufacturer', ''),
+                supplier=get('supplier', ''),
                 metadata=metadata
             )
             
@@ -563,10 +1109,10 @@ def _create_entity_from_import(entity_data: dict, entity_type: str, expert_id: s
             entity = Component(
                 label=label,
                 description=description,
-                component_type=entity_data.get('component_type', 'Generic'),
-                parent_subsystem_id=entity_data.get('parent_subsystem_id', ''),
-                part_number=entity_data.get('part_number', ''),
-                manufacturer=entity_data.get('manufacturer', ''),
+                component_type=get('component_type', 'Generic'),
+                parent_subsystem_id=get('parent_subsystem_id', ''),
+                part_number=get('part_number', ''),
+                manufacturer=get('manufacturer', ''),
                 metadata=metadata
             )
         
@@ -577,17 +1123,18 @@ def _create_entity_from_import(entity_data: dict, entity_type: str, expert_id: s
         return entity
         
     except Exception as e:
-        print(f"Error creating entity: {e}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Error creating entity %r: %s", entity_data.get('id'), e)
         return None
 
 def _create_relationship_from_import(rel_data: dict, expert_id: str):
     """Create relationship object from import data"""
     try:
-        relationship_type = RelationshipType(rel_data['relationship_type'])
+        relationship_type = _to_relationship_type(rel_data['relationship_type'])
         
         metadata = OntologyMetadata()
         metadata.extraction_method = "import"
-        metadata.expert_reviews.append({
+        _record_review(metadata, {
             "expert_id": expert_id,
             "timestamp": datetime.now().isoformat(),
             "comment": "Relationship imported",
@@ -608,58 +1155,68 @@ def _create_relationship_from_import(rel_data: dict, expert_id: str):
         return relationship
         
     except Exception as e:
-        print(f"Error creating relationship: {e}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Error creating relationship %r: %s", rel_data.get('id'), e)
         return None
 
-def _add_entity_to_collection(entity, entity_type: str):
-    """Add entity to appropriate collection"""
+def _collection_for_type(entity_type: str) -> str:
+    """Get the ontology_data collection name for an entity type"""
     collection_map = {
-        'system': ontology_data["systems"],
-        'subsystem': ontology_data["subsystems"],
-        'component': ontology_data["components"],
-        'spare_part': ontology_data["spare_parts"]
+        'system': "systems",
+        'subsystem': "subsystems",
+        'component': "components",
+        'spare_part': "spare_parts"
     }
     
-    collection = collection_map.get(entity_type, ontology_data["components"])
-    collection.append(entity)
+    return collection_map.get(entity_type, "components")
+
+def _add_entities_to_collection(entities: List[Any], collection_name: str):
+    """Add a batch of entities to a collection"""
+    ontology_data[collection_name].extend(entities)
+    for entity in entities:
+        _index_entity(entity, collection_name)
 
 @router.get("/dashboard/overview")
-async def get_dashboard_overview():
+async def get_dashboard_overview(request: Request):
     """Get overview statistics for the expert review dashboard""" 
+    global _overview_cache
     try:
         # If no data exists and PDF results haven't been loaded yet, try to load PDF results
         total_entities = (len(ontology_data["systems"]) + len(ontology_data["subsystems"]) + 
                          len(ontology_data["components"]) + len(ontology_data["spare_parts"]))
         
         if total_entities == 0 and not pdf_results_loaded:
-            load_pdf_results_into_dashboard()
-        
-        stats = get_ontology_statistics(
-            ontology_data["systems"],
-            ontology_data["subsystems"], 
-            ontology_data["components"],
-            ontology_data["spare_parts"],
-            ontology_data["relationships"]
-        )
-        
-        # Add review-specific metrics
-        pending_review_count = sum(
-            1 for entities in [ontology_data["systems"], ontology_data["subsystems"], 
-                             ontology_data["components"], ontology_data["spare_parts"]]
-            for entity in entities
-            if entity.metadata.validation_status == ValidationStatus.PENDING_REVIEW
-        )
-        
-        stats["pending_review_count"] = pending_review_count
-        stats["last_updated"] = datetime.now().isoformat()
+            await load_pdf_results_into_dashboard()
+        
+        # Unchanged data is answered from the client's copy or the cached body
+        etag = _data_etag()
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        if _overview_cache is None or _overview_cache[0] != _data_version:
+            stats = get_ontology_statistics(
+                ontology_data["systems"],
+                ontology_data["subsystems"], 
+                ontology_data["components"],
+                ontology_data["spare_parts"],
+                ontology_data["relationships"]
+            )
+            
+            # Add review-specific metrics
+            stats["pending_review_count"] = status_counts[ValidationStatus.PENDING_REVIEW]
+            
+            _overview_cache = (_data_version, orjson.dumps(stats))
         
-        return JSONResponse(content=stats)
+        # last_updated is the time of each response, not of the cached body
+        return Response(content=_with_timestamp(_overview_cache[1], "last_updated"),
+                        media_type="application/json", headers={"ETag": etag})
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting overview: {str(e)}")
 
 @router.get("/entities")
 async def get_entities(
+    request: Request,
     entity_type: Optional[str] = Query(None, description="Filter by entity type"),
     validation_status: Optional[str] = Query(None, description="Filter by validation status"),
     page: int = Query(1, ge=1, description="Page number"),
@@ -667,42 +1224,50 @@ async def get_entities(
 ):
     """Get paginated list of entities for review"""
     try:
-        all_entities = []
-        
-        # Collect all entities with type information
-        for entity in ontology_data["systems"]:
-            entity_dict = entity.to_dict() if hasattr(entity, 'to_dict') else entity.__dict__
-            entity_dict["entity_type"] = "system"
-            all_entities.append(entity_dict)
-        for entity in ontology_data["subsystems"]:
-            entity_dict = entity.to_dict() if hasattr(entity, 'to_dict') else entity.__dict__
-            entity_dict["entity_type"] = "subsystem"
-            all_entities.append(entity_dict)
-        for entity in ontology_data["components"]:
-            entity_dict = entity.to_dict() if hasattr(entity, 'to_dict') else entity.__dict__
-            entity_dict["entity_type"] = "component"
-            all_entities.append(entity_dict)
-        for entity in ontology_data["spare_parts"]:
-            entity_dict = entity.to_dict() if hasattr(entity, 'to_dict') else entity.__dict__
-            entity_dict["entity_type"] = "spare_part"
-            all_entities.append(entity_dict)
+        # Unchanged data is answered from the client's copy
+        etag = _data_etag()
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        collections = [
+            ("system", ontology_data["systems"]),
+            ("subsystem", ontology_data["subsystems"]),
+            ("component", ontology_data["components"]),
+            ("spare_part", ontology_data["spare_parts"])
+        ]
         
-        # Apply filters
+        # Apply filters on the entities themselves, before any serialization
         if entity_type:
-            all_entities = [e for e in all_entities if e["entity_type"] == entity_type]
+            collections = [(tag, entities) for tag, entities in collections if tag == entity_type]
         
-        if validation_status:
-            status_enum = ValidationStatus(validation_status)
-            all_entities = [e for e in all_entities 
-                          if e["metadata"].validation_status == status_enum]
+        status_enum = _to_status(validation_status) if validation_status else None
         
-        # Pagination
-        total_count = len(all_entities)
-        start_idx = (page - 1) * page_size
+        def matching_entities():
+            for tag, entities in collections:
+                for entity in entities:
+                    if status_enum is None or entity.metadata.validation_status == status_enum:
+                        yield tag, entity
+        
+        # Totals come from collection sizes or the status counts where possible,
+        # so only a combined type and status filter needs a counting pass
+        if status_enum is None:
+            total_count = sum(len(entities) for _, entities in collections)
+        elif not entity_type:
+            _sync_indexes()
+            total_count = status_counts[status_enum]
+        else:
+            total_count = sum(1 for _ in matching_entities())
+        
+        # Pagination; iteration stops at the end of the requested page and
+        # only that page is serialized
+        start_idx = (page - 1) * page_size
         end_idx = start_idx + page_size
-        paginated_entities = all_entities[start_idx:end_idx]
+        paginated_entities = [
+            {**_entity_to_dict(entity), "entity_type": tag}
+            for tag, entity in islice(matching_entities(), start_idx, end_idx)
+        ]
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "entities": paginated_entities,
             "pagination": {
                 "page": page,
@@ -710,7 +1275,7 @@ async def get_entities(
                 "total_count": total_count,
                 "total_pages": (total_count + page_size - 1) // page_size
             }
-        })
+        }, headers={"ETag": etag})
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting entities: {str(e)}")
@@ -719,75 +1284,120 @@ async def get_entities(
 async def get_entity_details(entity_id: str):
     """Get detailed information about a specific entity"""
     try:
-        # Search for entity in all collections
-        for collection_name, entities in ontology_data.items():
-            if collection_name == "relationships":
-                continue
-            for entity in entities:
-                if entity.id == entity_id:
-                    # Get related entities and relationships
-                    related_relationships = [
-                        rel for rel in ontology_data["relationships"]
-                        if rel.source_entity_id == entity_id or rel.target_entity_id == entity_id
-                    ]
-                    
-                    return JSONResponse(content={
-                        "entity": entity.to_dict() if hasattr(entity, 'to_dict') else entity.__dict__,
-                        "entity_type": collection_name[:-1],  # Remove 's' from plural
-                        "relationships": [rel.to_dict() if hasattr(rel, 'to_dict') else rel.__dict__ for rel in related_relationships]
-                    })
+        entry = _lookup_entity(entity_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Entity not found")
         
-        raise HTTPException(status_code=404, detail="Entity not found")
+        entity, collection_name = entry
         
+        # Get related entities and relationships
+        related_relationships = _get_entity_relationships(entity_id)
+        
+        return ORJSONResponse(content={
+            "entity": _entity_to_dict(entity),
+            "entity_type": collection_name[:-1],  # Remove 's' from plural
+            "relationships": [_entity_to_dict(rel) for rel in related_relationships]
+        })
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting entity details: {str(e)}")
 
+def _delete_image_file(image_url: str):
+    """Delete the uploaded image file behind an image URL, if it exists"""
+    try:
+        # Extract filename from URL
+        filename = image_url.split('/')[-1]
+        file_path = Path("frontend/static/uploads/entity_images") / filename
+        if file_path.exists():
+            file_path.unlink()
+    except Exception as e:
+        logger.warning("Could not delete image file: %s", e)
+
+# Read size for streaming uploads to disk, and the largest accepted image
+# (matching the dashboard's 5MB client-side limit)
+_UPLOAD_CHUNK_SIZE = 1 << 20
+_MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+# Accepted image content types, by the image format they declare
+_IMAGE_CONTENT_TYPES = {
+    "image/jpeg": "jpeg",
+    "image/jpg": "jpeg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp"
+}
+
+_IMAGE_EXTENSIONS = {"jpeg": "jpg", "png": "png", "gif": "gif", "webp": "webp"}
+
+def _sniff_image_format(header: bytes) -> Optional[str]:
+    """Get the image format from a file's leading bytes, or None if not a supported image"""
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
 @router.post("/entities/{entity_id}/upload-image")
 async def upload_entity_image(entity_id: str, file: UploadFile = File(...)):
     """Upload an image for an entity"""
     try:
         # Validate file type
-        allowed_types = ["image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"]
-        if file.content_type not in allowed_types:
+        declared_format = _IMAGE_CONTENT_TYPES.get(file.content_type)
+        if declared_format is None:
             raise HTTPException(status_code=400, detail="Only image files (JPEG, PNG, GIF, WebP) are allowed")
         
+        # Find the entity before anything is written to disk
+        entry = _lookup_entity(entity_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Entity not found")
+        entity = entry[0]
+        
+        # The content type is client-supplied, so check it against the file's
+        # actual leading bytes
+        chunk = await file.read(_UPLOAD_CHUNK_SIZE)
+        if _sniff_image_format(chunk[:16]) != declared_format:
+            raise HTTPException(status_code=400, detail="File content is not a valid image of the declared type")
+        
         # Create uploads directory if it doesn't exist
         uploads_dir = Path("frontend/static/uploads/entity_images")
         uploads_dir.mkdir(parents=True, exist_ok=True)
         
-        # Generate unique filename
-        file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
+        # Generate unique filename, named after the verified format rather
+        # than the client-supplied filename
+        file_extension = _IMAGE_EXTENSIONS[declared_format]
         unique_filename = f"{entity_id}_{uuid.uuid4().hex[:8]}.{file_extension}"
         file_path = uploads_dir / unique_filename
         
-        # Save the file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Stream the file to disk in large chunks without blocking the event
+        # loop, giving up once it exceeds the size limit
+        total = 0
+        try:
+            async with aiofiles.open(file_path, "wb") as out:
+                while chunk:
+                    total += len(chunk)
+                    if total > _MAX_IMAGE_BYTES:
+                        raise HTTPException(status_code=413, detail="Image file must be smaller than 5MB")
+                    await out.write(chunk)
+                    chunk = await file.read(_UPLOAD_CHUNK_SIZE)
+        except BaseException:
+            # Don't leave a partial file behind
+            await run_in_threadpool(file_path.unlink, missing_ok=True)
+            raise
         
         # Update entity with image URL
         image_url = f"/static/uploads/entity_images/{unique_filename}"
-        entity_updated = False
-        
-        # Find and update the entity
-        for collection_name, entities in ontology_data.items():
-            if collection_name == "relationships":
-                continue
-            for entity in entities:
-                if entity.id == entity_id:
-                    entity.image_url = image_url
-                    entity.metadata.last_modified = datetime.now()
-                    entity_updated = True
-                    break
-            if entity_updated:
-                break
+        async with _write_lock:
+            entity.image_url = image_url
+            entity.metadata.last_modified = datetime.now()
+            _invalidate_entity_dict(entity)
         
-        if not entity_updated:
-            # Clean up uploaded file if entity not found
-            if file_path.exists():
-                file_path.unlink()
-            raise HTTPException(status_code=404, detail="Entity not found")
-        
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Image uploaded successfully",
             "image_url": image_url,
@@ -803,38 +1413,23 @@ async def upload_entity_image(entity_id: str, file: UploadFile = File(...)):
 async def delete_entity_image(entity_id: str):
     """Delete an entity's image"""
     try:
-        entity_updated = False
-        old_image_url = None
-        
         # Find and update the entity
-        for collection_name, entities in ontology_data.items():
-            if collection_name == "relationships":
-                continue
-            for entity in entities:
-                if entity.id == entity_id:
-                    old_image_url = entity.image_url
-                    entity.image_url = None
-                    entity.metadata.last_modified = datetime.now()
-                    entity_updated = True
-                    break
-            if entity_updated:
-                break
-        
-        if not entity_updated:
+        entry = _lookup_entity(entity_id)
+        if entry is None:
             raise HTTPException(status_code=404, detail="Entity not found")
         
+        entity = entry[0]
+        async with _write_lock:
+            old_image_url = entity.image_url
+            entity.image_url = None
+            entity.metadata.last_modified = datetime.now()
+            _invalidate_entity_dict(entity)
+        
         # Delete the physical file if it exists
         if old_image_url:
-            try:
-                # Extract filename from URL
-                filename = old_image_url.split('/')[-1]
-                file_path = Path("frontend/static/uploads/entity_images") / filename
-                if file_path.exists():
-                    file_path.unlink()
-            except Exception as e:
-                print(f"Warning: Could not delete image file: {e}")
+            await run_in_threadpool(_delete_image_file, old_image_url)
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Image deleted successfully"
         })
@@ -845,21 +1440,23 @@ async def delete_entity_image(entity_id: str):
         raise HTTPException(status_code=500, detail=f"Error deleting image: {str(e)}")
 
 @router.get("/entities/{entity_id}/image")
-async def get_entity_image(entity_id: str):
+async def get_entity_image(entity_id: str, request: Request):
     """Get an entity's image URL"""
     try:
         # Find the entity
-        for collection_name, entities in ontology_data.items():
-            if collection_name == "relationships":
-                continue
-            for entity in entities:
-                if entity.id == entity_id:
-                    return JSONResponse(content={
-                        "image_url": entity.image_url,
-                        "has_image": entity.image_url is not None
-                    })
+        entry = _lookup_entity(entity_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Entity not found")
         
-        raise HTTPException(status_code=404, detail="Entity not found")
+        entity = entry[0]
+        etag = _entity_etag(entity)
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        return ORJSONResponse(content={
+            "image_url": entity.image_url,
+            "has_image": entity.image_url is not None
+        }, headers={"ETag": etag})
         
     except HTTPException:
         raise
@@ -870,49 +1467,67 @@ async def get_entity_image(entity_id: str):
 async def update_entity(entity_id: str, request: EntityUpdateRequest):
     """Update entity properties"""
     try:
-        # Find and update entity
-        for collection_name, entities in ontology_data.items():
-            if collection_name == "relationships":
-                continue
-            for i, entity in enumerate(entities):
-                if entity.id == entity_id:
-                    # Update entity properties
-                    for key, value in request.updates.items():
-                        if '.' in key:
-                            # Handle nested attributes like 'metadata.validation_status'
-                            parts = key.split('.')
-                            obj = entity
-                            for part in parts[:-1]:
-                                if hasattr(obj, part):
-                                    obj = getattr(obj, part)
-                                else:
-                                    break
-                            else:
-                                if hasattr(obj, parts[-1]):
-                                    if parts[-1] == 'validation_status' and isinstance(value, str):
-                                        # Convert string to ValidationStatus enum
-                                        setattr(obj, parts[-1], ValidationStatus(value))
-                                    else:
-                                        setattr(obj, parts[-1], value)
+        async with _write_lock:
+            # Find and update entity
+            entry = _lookup_entity(entity_id)
+            if entry is None:
+                raise HTTPException(status_code=404, detail="Entity not found")
+            
+            entity = entry[0]
+            old_status = entity.metadata.validation_status
+            
+            # Resolve and convert every update before anything is changed, so
+            # an invalid value leaves the entity untouched
+            changes = []
+            for key, value in request.updates.items():
+                if '.' in key:
+                    # Handle nested attributes like 'metadata.validation_status'
+                    parts = key.split('.')
+                    obj = entity
+                    for part in parts[:-1]:
+                        if hasattr(obj, part):
+                            obj = getattr(obj, part)
                         else:
-                            # Handle direct attributes
-                            if hasattr(entity, key):
-                                setattr(entity, key, value)
-                    
-                    # Update metadata
-                    entity.metadata.last_modified = datetime.now()
-                    if request.review_comment:
-                        entity.metadata.expert_reviews.append({
-                            "expert_id": request.expert_id,
-                            "timestamp": datetime.now().isoformat(),
-                            "comment": request.review_comment,
-                            "action": "update"
-                        })
-                    
-                    return JSONResponse(content={"success": True, "entity": entity.to_dict() if hasattr(entity, 'to_dict') else entity.__dict__})
-        
-        raise HTTPException(status_code=404, detail="Entity not found")
+                            break
+                    else:
+                        if hasattr(obj, parts[-1]):
+                            if parts[-1] == 'validation_status' and isinstance(value, str):
+                                # Convert string to ValidationStatus enum
+                                try:
+                                    value = _to_status(value)
+                                except ValueError:
+                                    raise HTTPException(status_code=400, detail=f"Invalid validation status: {value}")
+                            changes.append((obj, parts[-1], value))
+                else:
+                    # Handle direct attributes
+                    if hasattr(entity, key):
+                        changes.append((entity, key, value))
+            
+            # Update entity properties, keeping the indexes, status counts,
+            # cached payload and validation queue in step even if one fails
+            try:
+                for obj, attr, value in changes:
+                    setattr(obj, attr, value)
+            finally:
+                _track_status_change(old_status, entity.metadata.validation_status)
+                if entity.id != entity_id:
+                    _rebuild_indexes()
+                entity.metadata.last_modified = datetime.now()
+                _invalidate_entity_dict(entity)
+                _enqueue_entity(entity)
+            
+            if request.review_comment:
+                _record_review(entity.metadata, {
+                    "expert_id": request.expert_id,
+                    "timestamp": _last_modified_iso(entity.metadata),
+                    "comment": request.review_comment,
+                    "action": "update"
+                })
+            
+            return ORJSONResponse(content={"success": True, "entity": _entity_to_dict(entity)})
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating entity: {str(e)}")
 
@@ -920,37 +1535,44 @@ async def update_entity(entity_id: str, request: EntityUpdateRequest):
 async def validate_entity(entity_id: str, request: ValidationRequest):
     """Validate or reject an entity""" 
     try:
-        # Find entity and update validation status
-        for collection_name, entities in ontology_data.items():
-            if collection_name == "relationships":
-                continue
-            for entity in entities:
-                if entity.id == entity_id:
-                    # Update validation status
-                    entity.metadata.validation_status = ValidationStatus(request.validation_status)
-                    entity.metadata.last_modified = datetime.now()
-                    
-                    # Override confidence if provided
-                    if request.confidence_override is not None:
-                        entity.metadata.confidence_score = request.confidence_override
-                    
-                    # Add expert review
-                    entity.metadata.expert_reviews.append({
-                        "expert_id": request.expert_id,
-                        "timestamp": datetime.now().isoformat(),
-                        "comment": request.review_comment,
-                        "action": "validation",
-                        "status": request.validation_status
-                    })
-                    
-                    return JSONResponse(content={
-                        "success": True, 
-                        "entity": entity.to_dict() if hasattr(entity, 'to_dict') else entity.__dict__,
-                        "validation_status": request.validation_status
-                    })
-        
-        raise HTTPException(status_code=404, detail="Entity not found")
+        async with _write_lock:
+            # Find entity and update validation status
+            entry = _lookup_entity(entity_id)
+            if entry is None:
+                raise HTTPException(status_code=404, detail="Entity not found")
+            
+            entity = entry[0]
+            
+            # Update validation status
+            new_status = _to_status(request.validation_status)
+            _track_status_change(entity.metadata.validation_status, new_status)
+            entity.metadata.validation_status = new_status
+            now = datetime.now()
+            entity.metadata.last_modified = now
+            _invalidate_entity_dict(entity)
+            
+            # Override confidence if provided
+            if request.confidence_override is not None:
+                entity.metadata.confidence_score = request.confidence_override
+            _enqueue_entity(entity)
+            
+            # Add expert review
+            _record_review(entity.metadata, {
+                "expert_id": request.expert_id,
+                "timestamp": now.isoformat(),
+                "comment": request.review_comment,
+                "action": "validation",
+                "status": request.validation_status
+            })
+            
+            return ORJSONResponse(content={
+                "success": True, 
+                "entity": _entity_to_dict(entity),
+                "validation_status": request.validation_status
+            })
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error validating entity: {str(e)}")
 
@@ -962,7 +1584,14 @@ async def get_relationships(
 ):
     """Get relationships with optional filtering"""
     try:
-        relationships = ontology_data["relationships"]
+        # Start from the index for the most selective entity filter
+        _sync_indexes()
+        if source_entity_id:
+            relationships = _rel_by_source.get(source_entity_id, [])
+        elif target_entity_id:
+            relationships = _rel_by_target.get(target_entity_id, [])
+        else:
+            relationships = ontology_data["relationships"]
         
         # Apply filters
         if source_entity_id:
@@ -970,11 +1599,11 @@ async def get_relationships(
         if target_entity_id:
             relationships = [r for r in relationships if r.target_entity_id == target_entity_id]
         if relationship_type:
-            rel_type = RelationshipType(relationship_type)
+            rel_type = _to_relationship_type(relationship_type)
             relationships = [r for r in relationships if r.relationship_type == rel_type]
         
-        return JSONResponse(content={
-            "relationships": [rel.to_dict() if hasattr(rel, 'to_dict') else rel.__dict__ for rel in relationships]
+        return ORJSONResponse(content={
+            "relationships": [_entity_to_dict(rel) for rel in relationships]
         })
         
     except Exception as e:
@@ -984,41 +1613,39 @@ async def get_relationships(
 async def create_relationship(request: RelationshipRequest):
     """Create a new relationship between entities"""
     try:
-        # Validate that source and target entities exist
-        all_entity_ids = set()
-        for collection_name, entities in ontology_data.items():
-            if collection_name == "relationships":
-                continue
-            all_entity_ids.update(entity.id for entity in entities)
-        
-        if request.source_entity_id not in all_entity_ids:
-            raise HTTPException(status_code=400, detail="Source entity not found")
-        if request.target_entity_id not in all_entity_ids:
-            raise HTTPException(status_code=400, detail="Target entity not found")
-        
-        # Create relationship
-        relationship = OntologyRelationship(
-            relationship_type=RelationshipType(request.relationship_type),
-            source_entity_id=request.source_entity_id,
-            target_entity_id=request.target_entity_id,
-            description=request.description or ""
-        )
-        
-        # Add expert review metadata
-        relationship.metadata.expert_reviews.append({
-            "expert_id": request.expert_id,
-            "timestamp": datetime.now().isoformat(),
-            "comment": "Relationship created",
-            "action": "create"
-        })
-        
-        ontology_data["relationships"].append(relationship)
-        
-        return JSONResponse(content={
-            "success": True,
-            "relationship": relationship.__dict__
-        })
+        async with _write_lock:
+            # Validate that source and target entities exist
+            if _lookup_entity(request.source_entity_id) is None:
+                raise HTTPException(status_code=400, detail="Source entity not found")
+            if _lookup_entity(request.target_entity_id) is None:
+                raise HTTPException(status_code=400, detail="Target entity not found")
+            
+            # Create relationship
+            relationship = OntologyRelationship(
+                relationship_type=_to_relationship_type(request.relationship_type),
+                source_entity_id=request.source_entity_id,
+                target_entity_id=request.target_entity_id,
+                description=request.description or ""
+            )
+            
+            # Add expert review metadata
+            _record_review(relationship.metadata, {
+                "expert_id": request.expert_id,
+                "timestamp": datetime.now().isoformat(),
+                "comment": "Relationship created",
+                "action": "create"
+            })
+            
+            ontology_data["relationships"].append(relationship)
+            _index_relationship(relationship)
+            
+            return ORJSONResponse(content={
+                "success": True,
+                "relationship": _entity_to_dict(relationship)
+            })
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating relationship: {str(e)}")
 
@@ -1026,59 +1653,67 @@ async def create_relationship(request: RelationshipRequest):
 async def bulk_edit_entities(request: BulkEditRequest):
     """Perform bulk edits on multiple entities"""
     try:
-        updated_entities = []
-        
-        for entity_id in request.entity_ids:
-            # Find and update each entity
-            for collection_name, entities in ontology_data.items():
-                if collection_name == "relationships":
-                    continue
-                for entity in entities:
-                    if entity.id == entity_id:
-                        # Apply updates
-                        for key, value in request.updates.items():
-                            if hasattr(entity, key):
-                                setattr(entity, key, value)
-                        
-                        # Update metadata
-                        entity.metadata.last_modified = datetime.now()
-                        entity.metadata.expert_reviews.append({
-                            "expert_id": request.expert_id,
-                            "timestamp": datetime.now().isoformat(),
-                            "comment": request.review_comment,
-                            "action": "bulk_edit"
-                        })
-                        
-                        updated_entities.append(entity.__dict__)
-                        break
-        
-        return JSONResponse(content={
-            "success": True,
-            "updated_count": len(updated_entities),
-            "updated_entities": updated_entities
-        })
+        async with _write_lock:
+            updated_entities = []
+            now = datetime.now()
+            now_iso = now.isoformat()
+            
+            updates_items = list(request.updates.items())
+            
+            try:
+                for entity_id in request.entity_ids:
+                    entry = _lookup_entity(entity_id)
+                    if entry is None:
+                        continue
+                    entity = entry[0]
+                    old_status = entity.metadata.validation_status
+                    changes = [(key, value) for key, value in updates_items if hasattr(entity, key)]
+                    
+                    # Apply updates, keeping status counts, the cached payload
+                    # and the validation queue in step even if one fails
+                    try:
+                        for key, value in changes:
+                            setattr(entity, key, value)
+                    finally:
+                        _track_status_change(old_status, entity.metadata.validation_status)
+                        entity.metadata.last_modified = now
+                        _invalidate_entity_dict(entity)
+                        _enqueue_entity(entity)
+                    
+                    _record_review(entity.metadata, {
+                        "expert_id": request.expert_id,
+                        "timestamp": now_iso,
+                        "comment": request.review_comment,
+                        "action": "bulk_edit"
+                    })
+                    
+                    updated_entities.append(_entity_to_dict(entity))
+            finally:
+                # Entity ids edited in bulk invalidate the id index
+                if 'id' in request.updates:
+                    _rebuild_indexes()
+            
+            return ORJSONResponse(content={
+                "success": True,
+                "updated_count": len(updated_entities),
+                "updated_entities": updated_entities
+            })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in bulk edit: {str(e)}")
 
 @router.get("/validation/summary")
-async def get_validation_summary():
+async def get_validation_summary(request: Request):
     """Get summary of validation status across all entities"""
     try:
-        summary = {}
+        etag = _data_etag()
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
         
-        for status in ValidationStatus:
-            summary[status.value] = 0
-        
-        # Count entities by validation status
-        for collection_name, entities in ontology_data.items():
-            if collection_name == "relationships":
-                continue
-            for entity in entities:
-                status = entity.metadata.validation_status.value
-                summary[status] += 1
+        # Counts are maintained as entities are indexed and change status
+        summary = {status.value: status_counts[status] for status in ValidationStatus}
         
-        return JSONResponse(content=summary)
+        return ORJSONResponse(content=summary, headers={"ETag": etag})
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting validation summary: {str(e)}")
@@ -1088,30 +1723,17 @@ async def get_entity_validation_report(entity_id: str):
     """Get detailed validation report for an entity"""
     try:
         # Find entity
-        entity = None
-        entity_type = None
-        
-        for collection_name, entities in ontology_data.items():
-            if collection_name == "relationships":
-                continue
-            for e in entities:
-                if e.id == entity_id:
-                    entity = e
-                    entity_type = collection_name[:-1]  # Remove 's' from plural
-                    break
-            if entity:
-                break
-        
-        if not entity:
+        entry = _lookup_entity(entity_id)
+        if entry is None:
             raise HTTPException(status_code=404, detail="Entity not found")
         
-        # Import validator and generate report
-        from backend.verification.entity_validator import create_entity_validator
-        validator = create_entity_validator()
+        entity, collection_name = entry
+        entity_type = collection_name[:-1]  # Remove 's' from plural
         
-        validation_result = validator.validate_entity(entity, entity_type)
+        # Generate report
+        validation_result = await run_in_threadpool(_entity_validator.validate_entity, entity, entity_type)
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "entity_id": entity_id,
             "entity_type": entity_type,
             "validation_result": {
@@ -1123,6 +1745,8 @@ async def get_entity_validation_report(entity_id: str):
             }
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating validation report: {str(e)}")
 
@@ -1130,101 +1754,78 @@ async def get_entity_validation_report(entity_id: str):
 async def submit_expert_review(entity_id: str, request: dict):
     """Submit expert review for an entity"""
     try:
-        # Find entity
-        entity = None
-        entity_type = None
-        
-        for collection_name, entities in ontology_data.items():
-            if collection_name == "relationships":
-                continue
-            for e in entities:
-                if e.id == entity_id:
-                    entity = e
-                    entity_type = collection_name[:-1]
-                    break
-            if entity:
-                break
-        
-        if not entity:
-            raise HTTPException(status_code=404, detail="Entity not found")
-        
-        # Import validator and submit review
-        from backend.verification.entity_validator import create_entity_validator, ValidationAction
-        validator = create_entity_validator()
-        
-        # Map action string to enum
-        action_mapping = {
-            "approve": ValidationAction.APPROVE,
-            "reject": ValidationAction.REJECT,
-            "request_revision": ValidationAction.REQUEST_REVISION,
-            "update_confidence": ValidationAction.UPDATE_CONFIDENCE,
-            "edit_properties": ValidationAction.EDIT_PROPERTIES,
-            "add_comment": ValidationAction.ADD_COMMENT
-        }
-        
-        action = action_mapping.get(request.get("action"), ValidationAction.ADD_COMMENT)
-        
-        review = validator.submit_expert_review(
-            entity_id=entity_id,
-            expert_id=request.get("expert_id", "current_expert"),
-            action=action,
-            comment=request.get("comment", ""),
-            confidence_override=request.get("confidence_override"),
-            field_changes=request.get("field_changes", {}),
-            session_id=request.get("session_id")
-        )
-        
-        # Update entity status based on review
-        entity.metadata.validation_status = review.new_status
-        entity.metadata.last_modified = datetime.now()
-        
-        # Add review to entity metadata
-        entity.metadata.expert_reviews.append({
-            "review_id": review.review_id,
-            "expert_id": review.expert_id,
-            "action": review.action.value,
-            "comment": review.comment,
-            "timestamp": review.timestamp.isoformat()
-        })
-        
-        return JSONResponse(content={
-            "success": True,
-            "review_id": review.review_id,
-            "new_status": review.new_status.value,
-            "entity": entity.__dict__
-        })
+        async with _write_lock:
+            # Find entity
+            entry = _lookup_entity(entity_id)
+            if entry is None:
+                raise HTTPException(status_code=404, detail="Entity not found")
+            
+            entity, collection_name = entry
+            entity_type = collection_name[:-1]
+            
+            # Map action string to enum
+            action = _REVIEW_ACTIONS.get(request.get("action"), ValidationAction.ADD_COMMENT)
+            
+            review = _entity_validator.submit_expert_review(
+                entity_id=entity_id,
+                expert_id=request.get("expert_id", "current_expert"),
+                action=action,
+                comment=request.get("comment", ""),
+                confidence_override=request.get("confidence_override"),
+                field_changes=request.get("field_changes", {}),
+                session_id=request.get("session_id")
+            )
+            
+            # Update entity status based on review
+            _track_status_change(entity.metadata.validation_status, review.new_status)
+            entity.metadata.validation_status = review.new_status
+            entity.metadata.last_modified = datetime.now()
+            _invalidate_entity_dict(entity)
+            _enqueue_entity(entity)
+            
+            # Add review to entity metadata
+            _record_review(entity.metadata, {
+                "review_id": review.review_id,
+                "expert_id": review.expert_id,
+                "action": review.action.value,
+                "comment": review.comment,
+                "timestamp": review.timestamp.isoformat()
+            })
+            
+            return ORJSONResponse(content={
+                "success": True,
+                "review_id": review.review_id,
+                "new_status": review.new_status.value,
+                "entity": _entity_to_dict(entity)
+            })
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error submitting expert review: {str(e)}")
 
 @router.get("/entities/{entity_id}/review-history")
-async def get_entity_review_history(entity_id: str):
+async def get_entity_review_history(entity_id: str, request: Request):
     """Get review history for an entity"""
     try:
         # Find entity
-        entity = None
-        
-        for collection_name, entities in ontology_data.items():
-            if collection_name == "relationships":
-                continue
-            for e in entities:
-                if e.id == entity_id:
-                    entity = e
-                    break
-            if entity:
-                break
-        
-        if not entity:
+        entry = _lookup_entity(entity_id)
+        if entry is None:
             raise HTTPException(status_code=404, detail="Entity not found")
         
-        # Return review history from entity metadata
-        reviews = entity.metadata.expert_reviews if hasattr(entity.metadata, 'expert_reviews') else []
+        entity = entry[0]
+        etag = _entity_etag(entity)
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
         
-        return JSONResponse(content={
+        # Return review history from entity metadata
+        return ORJSONResponse(content={
             "entity_id": entity_id,
-            "review_history": reviews
-        })
+            "review_history": entity.metadata.expert_reviews
+        }, headers={"ETag": etag})
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting review history: {str(e)}")
 
@@ -1235,131 +1836,126 @@ async def get_validation_queue(
 ):
     """Get prioritized queue of entities needing validation"""
     try:
-        validation_queue = []
+        _sync_indexes()
         
-        # Collect all entities that need validation
-        for collection_name, entities in ontology_data.items():
-            if collection_name == "relationships":
+        # Pop the highest priority entries that are still current, then put
+        # them back for the next request; nothing awaits in between, so no
+        # lock is needed
+        validation_queue = []
+        served = []
+        while _pending_queue and len(validation_queue) < limit:
+            entry = heapq.heappop(_pending_queue)
+            neg_priority, _, entity_id = entry
+            if _queue_entries.get(entity_id) is not entry:
                 continue
             
-            for entity in entities:
-                # Prioritize based on validation status and confidence
-                priority_score = 0
-                
-                if entity.metadata.validation_status == ValidationStatus.NOT_VALIDATED:
-                    priority_score += 10
-                elif entity.metadata.validation_status == ValidationStatus.NEEDS_REVISION:
-                    priority_score += 8
-                elif entity.metadata.validation_status == ValidationStatus.PENDING_REVIEW:
-                    priority_score += 5
-                
-                # Lower confidence = higher priority
-                priority_score += (1.0 - entity.metadata.confidence_score) * 5
-                
-                # Add to queue if needs attention
-                if entity.metadata.validation_status in [
-                    ValidationStatus.NOT_VALIDATED,
-                    ValidationStatus.NEEDS_REVISION,
-                    ValidationStatus.PENDING_REVIEW
-                ]:
-                    validation_queue.append({
-                        "entity_id": entity.id,
-                        "entity_type": collection_name[:-1],
-                        "label": entity.label,
-                        "confidence_score": entity.metadata.confidence_score,
-                        "validation_status": entity.metadata.validation_status.value,
-                        "priority_score": priority_score,
-                        "last_modified": entity.metadata.last_modified.isoformat()
-                    })
-        
-        # Sort by priority score (highest first)
-        validation_queue.sort(key=lambda x: x["priority_score"], reverse=True)
+            indexed = entity_index.get(entity_id)
+            if indexed is None or indexed[0].metadata.validation_status not in _QUEUE_PRIORITY:
+                # Removed or changed without going through the endpoints
+                del _queue_entries[entity_id]
+                continue
+            
+            served.append(entry)
+            entity, collection_name = indexed
+            metadata = entity.metadata
+            validation_queue.append({
+                "entity_id": entity_id,
+                "entity_type": collection_name[:-1],
+                "label": entity.label,
+                "confidence_score": metadata.confidence_score,
+                "validation_status": metadata.validation_status.value,
+                "priority_score": -neg_priority,
+                "last_modified": _last_modified_iso(metadata)
+            })
         
-        # Apply limit
-        validation_queue = validation_queue[:limit]
+        for entry in served:
+            heapq.heappush(_pending_queue, entry)
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "validation_queue": validation_queue,
             "total_pending": len(validation_queue),
             "queue_generated": datetime.now().isoformat()
         })
-        
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting validation queue: {str(e)}")
 
+# Part number formatting replaces spaces with dashes
+_PART_TRANSLATE = str.maketrans({' ': '-'})
+
 @router.post("/validation/auto-fix")
 async def auto_fix_validation_issues(request: dict):
     """Automatically fix validation issues where possible"""
     try:
-        entity_ids = request.get("entity_ids", [])
-        fix_types = request.get("fix_types", ["normalize_text", "format_part_numbers"])
-        
-        fixed_entities = []
-        
-        for entity_id in entity_ids:
-            # Find entity
-            entity = None
-            entity_type = None
-            
-            for collection_name, entities in ontology_data.items():
-                if collection_name == "relationships":
-                    continue
-                for e in entities:
-                    if e.id == entity_id:
-                        entity = e
-                        entity_type = collection_name[:-1]
-                        break
-                if entity:
-                    break
-            
-            if not entity:
-                continue
+        async with _write_lock:
+            entity_ids = request.get("entity_ids", [])
+            fix_types = request.get("fix_types", ["normalize_text", "format_part_numbers"])
+            normalize_text = "normalize_text" in fix_types
+            format_part_numbers = "format_part_numbers" in fix_types
             
-            # Apply auto-fixes
-            fixes_applied = {}
+            fixed_entities = []
+            now = datetime.now()
+            now_iso = now.isoformat()
             
-            if "normalize_text" in fix_types:
-                # Normalize label and description
-                if entity.label:
-                    original_label = entity.label
-                    entity.label = entity.label.strip().title()
-                    if original_label != entity.label:
-                        fixes_applied["label"] = {"from": original_label, "to": entity.label}
+            for entity_id in entity_ids:
+                # Find entity
+                entry = _lookup_entity(entity_id)
+                if entry is None:
+                    continue
+                
+                entity, collection_name = entry
+                entity_type = collection_name[:-1]
                 
-                if entity.description:
+                # Apply auto-fixes
+                fixes_applied = {}
+                
+                if normalize_text:
+                    # Normalize label and description
+                    # Fields are only reassigned when a fix changes them
+                    original_label = entity.label
+                    if original_label:
+                        label = original_label.strip().title()
+                        if label != original_label:
+                            entity.label = label
+                            fixes_applied["label"] = {"from": original_label, "to": label}
+                    
                     original_desc = entity.description
-                    entity.description = entity.description.strip()
-                    if original_desc != entity.description:
-                        fixes_applied["description"] = {"from": original_desc, "to": entity.description}
-            
-            if "format_part_numbers" in fix_types and hasattr(entity, 'part_number'):
-                if entity.part_number:
-                    original_part = entity.part_number
-                    entity.part_number = entity.part_number.upper().replace(' ', '-')
-                    if original_part != entity.part_number:
-                        fixes_applied["part_number"] = {"from": original_part, "to": entity.part_number}
-            
-            if fixes_applied:
-                entity.metadata.last_modified = datetime.now()
-                entity.metadata.expert_reviews.append({
-                    "expert_id": "auto_fix_system",
-                    "action": "auto_fix",
-                    "comment": f"Auto-fixed: {', '.join(fixes_applied.keys())}",
-                    "timestamp": datetime.now().isoformat(),
-                    "fixes_applied": fixes_applied
-                })
+                    if original_desc:
+                        description = original_desc.strip()
+                        if description != original_desc:
+                            entity.description = description
+                            fixes_applied["description"] = {"from": original_desc, "to": description}
                 
-                fixed_entities.append({
-                    "entity_id": entity_id,
-                    "entity_type": entity_type,
-                    "fixes_applied": fixes_applied
-                })
-        
-        return JSONResponse(content={
-            "success": True,
-            "fixed_entities": fixed_entities,
-            "total_fixed": len(fixed_entities)
-        })
+                if format_part_numbers:
+                    original_part = getattr(entity, 'part_number', None)
+                    if original_part:
+                        part_number = original_part.translate(_PART_TRANSLATE).upper()
+                        if part_number != original_part:
+                            entity.part_number = part_number
+                            fixes_applied["part_number"] = {"from": original_part, "to": part_number}
+                
+                if fixes_applied:
+                    entity.metadata.last_modified = now
+                    _invalidate_entity_dict(entity)
+                    _record_review(entity.metadata, {
+                        "expert_id": "auto_fix_system",
+                        "action": "auto_fix",
+                        "comment": f"Auto-fixed: {', '.join(fixes_applied.keys())}",
+                        "timestamp": now_iso,
+                        "fixes_applied": fixes_applied
+                    })
+                    
+                    fixed_entities.append({
+                        "entity_id": entity_id,
+                        "entity_type": entity_type,
+                        "fixes_applied": fixes_applied
+                    })
+            
+            return ORJSONResponse(content={
+                "success": True,
+                "fixed_entities": fixed_entities,
+                "total_fixed": len(fixed_entities)
+            })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error applying auto-fixes: {str(e)}")
@@ -1369,45 +1965,28 @@ async def validate_relationship(relationship_id: str):
     """Validate a specific relationship"""
     try:
         # Find relationship
-        relationship = None
-        for rel in ontology_data["relationships"]:
-            if rel.id == relationship_id:
-                relationship = rel
-                break
-        
-        if not relationship:
+        relationship = _lookup_relationship(relationship_id)
+        if relationship is None:
             raise HTTPException(status_code=404, detail="Relationship not found")
         
         # Find source and target entities
-        source_entity = None
-        target_entity = None
-        source_type = None
-        target_type = None
-        
-        for collection_name, entities in ontology_data.items():
-            if collection_name == "relationships":
-                continue
-            for entity in entities:
-                if entity.id == relationship.source_entity_id:
-                    source_entity = entity
-                    source_type = collection_name[:-1]
-                elif entity.id == relationship.target_entity_id:
-                    target_entity = entity
-                    target_type = collection_name[:-1]
-        
-        if not source_entity or not target_entity:
+        source_entry = _lookup_entity(relationship.source_entity_id)
+        target_entry = _lookup_entity(relationship.target_entity_id)
+        if source_entry is None or target_entry is None:
             raise HTTPException(status_code=400, detail="Source or target entity not found")
         
-        # Import validator and validate
-        from backend.verification.relationship_validator import create_relationship_validator
-        validator = create_relationship_validator()
+        source_entity, source_collection = source_entry
+        target_entity, target_collection = target_entry
+        source_type = source_collection[:-1]
+        target_type = target_collection[:-1]
         
-        validation_result = validator.validate_relationship(
+        validation_result = await run_in_threadpool(
+            _rel_validator.validate_relationship,
             relationship, source_entity, target_entity, source_type, target_type,
-            ontology_data["relationships"]
+            _snapshot("relationships")
         )
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "relationship_id": relationship_id,
             "validation_result": {
                 "is_valid": validation_result.is_valid,
@@ -1417,6 +1996,8 @@ async def validate_relationship(relationship_id: str):
             }
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error validating relationship: {str(e)}")
 
@@ -1432,17 +2013,14 @@ async def infer_relationships(request: dict):
         entities = {}
         
         if entity_scope == "all":
-            for collection_name, entity_list in ontology_data.items():
-                if collection_name == "relationships":
-                    continue
+            for collection_name, entity_list in entity_collections.items():
                 for entity in entity_list:
                     entities[entity.id] = (entity, collection_name[:-1])
         
-        # Import validator and generate suggestions
-        from backend.verification.relationship_validator import create_relationship_validator
-        validator = create_relationship_validator()
-        
-        suggestions = validator.infer_relationships(entities, ontology_data["relationships"])
+        # Generate suggestions
+        suggestions = await run_in_threadpool(
+            _rel_validator.infer_relationships, entities, _snapshot("relationships")
+        )
         
         # Filter by confidence threshold
         filtered_suggestions = [
@@ -1450,7 +2028,7 @@ async def infer_relationships(request: dict):
             if s.confidence_score >= confidence_threshold
         ]
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "suggestions": [suggestion.__dict__ for suggestion in filtered_suggestions],
             "total_suggestions": len(filtered_suggestions),
             "confidence_threshold": confidence_threshold,
@@ -1460,41 +2038,58 @@ async def infer_relationships(request: dict):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error inferring relationships: {str(e)}")
 
+# Relationship fields clients may update; the id and metadata are managed here
+_MUTABLE_REL_FIELDS = frozenset(
+    f.name for f in dataclasses.fields(OntologyRelationship)
+) - {"id", "metadata"}
+
 @router.put("/relationships/{relationship_id}")
 async def update_relationship(relationship_id: str, request: dict):
     """Update relationship properties"""
     try:
-        # Find relationship
-        relationship = None
-        for i, rel in enumerate(ontology_data["relationships"]):
-            if rel.id == relationship_id:
-                relationship = rel
-                break
-        
-        if not relationship:
-            raise HTTPException(status_code=404, detail="Relationship not found")
-        
-        # Update properties
-        updates = request.get("updates", {})
-        for key, value in updates.items():
-            if hasattr(relationship, key):
-                setattr(relationship, key, value)
-        
-        # Update metadata
-        relationship.metadata.last_modified = datetime.now()
-        if request.get("expert_comment"):
-            relationship.metadata.expert_reviews.append({
-                "expert_id": request.get("expert_id", "current_expert"),
-                "timestamp": datetime.now().isoformat(),
-                "comment": request.get("expert_comment"),
-                "action": "update"
+        async with _write_lock:
+            # Find relationship
+            relationship = _lookup_relationship(relationship_id)
+            if relationship is None:
+                raise HTTPException(status_code=404, detail="Relationship not found")
+            
+            # Check and convert every update before anything is changed
+            changes = {}
+            for key, value in request.get("updates", {}).items():
+                if key in _MUTABLE_REL_FIELDS:
+                    if key == 'relationship_type' and isinstance(value, str):
+                        try:
+                            value = _to_relationship_type(value)
+                        except ValueError:
+                            raise HTTPException(status_code=400, detail=f"Invalid relationship type: {value}")
+                    changes[key] = value
+            
+            # Update properties, reindexing in case the endpoints change
+            _unindex_relationship(relationship)
+            try:
+                for key, value in changes.items():
+                    setattr(relationship, key, value)
+            finally:
+                _index_relationship(relationship)
+            
+            # Update metadata
+            relationship.metadata.last_modified = datetime.now()
+            _invalidate_entity_dict(relationship)
+            if request.get("expert_comment"):
+                _record_review(relationship.metadata, {
+                    "expert_id": request.get("expert_id", "current_expert"),
+                    "timestamp": _last_modified_iso(relationship.metadata),
+                    "comment": request.get("expert_comment"),
+                    "action": "update"
+                })
+            
+            return ORJSONResponse(content={
+                "success": True,
+                "relationship": _entity_to_dict(relationship)
             })
         
-        return JSONResponse(content={
-            "success": True,
-            "relationship": relationship.__dict__
-        })
-        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating relationship: {str(e)}")
 
@@ -1502,70 +2097,82 @@ async def update_relationship(relationship_id: str, request: dict):
 async def delete_relationship(relationship_id: str):
     """Delete a relationship"""
     try:
-        # Find and remove relationship
-        for i, rel in enumerate(ontology_data["relationships"]):
-            if rel.id == relationship_id:
-                del ontology_data["relationships"][i]
-                return JSONResponse(content={"success": True, "deleted_id": relationship_id})
-        
-        raise HTTPException(status_code=404, detail="Relationship not found")
+        async with _write_lock:
+            # Find and remove relationship
+            relationship = _lookup_relationship(relationship_id)
+            if relationship is None:
+                raise HTTPException(status_code=404, detail="Relationship not found")
+            
+            relationships = ontology_data["relationships"]
+            # Remove by identity, equal-valued duplicates are distinct relationships
+            del relationships[next(i for i, rel in enumerate(relationships) if rel is relationship)]
+            _unindex_relationship(relationship)
+            return ORJSONResponse(content={"success": True, "deleted_id": relationship_id})
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting relationship: {str(e)}")
 
+def _validate_relationships(validator, relationships: Sequence[OntologyRelationship],
+                            entities: Dict[str, Tuple[Any, str]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Validate every relationship whose endpoints are among entities, returning (results, total issue count)"""
+    validation_results = []
+    total_issues = 0
+    find_entity = entities.get
+    
+    for relationship in relationships:
+        # Find source and target entities
+        source_entry = find_entity(relationship.source_entity_id)
+        target_entry = find_entity(relationship.target_entity_id)
+        
+        if source_entry is not None and target_entry is not None:
+            source_entity, source_collection = source_entry
+            target_entity, target_collection = target_entry
+            source_type = source_collection[:-1]
+            target_type = target_collection[:-1]
+            result = validator.validate_relationship(
+                relationship, source_entity, target_entity, source_type, target_type,
+                relationships
+            )
+            
+            validation_results.append({
+                "relationship_id": relationship.id,
+                "is_valid": result.is_valid,
+                "issue_count": len(result.issues),
+                "issues": [issue.__dict__ for issue in result.issues]
+            })
+            
+            total_issues += len(result.issues)
+    
+    return validation_results, total_issues
+
 @router.post("/relationships/validate-all")
 async def validate_all_relationships():
     """Validate all relationships in the ontology"""
     try:
-        from backend.verification.relationship_validator import create_relationship_validator
-        validator = create_relationship_validator()
-        
-        validation_results = []
-        total_issues = 0
-        
-        for relationship in ontology_data["relationships"]:
-            # Find source and target entities
-            source_entity = None
-            target_entity = None
-            source_type = None
-            target_type = None
-            
-            for collection_name, entities in ontology_data.items():
-                if collection_name == "relationships":
-                    continue
-                for entity in entities:
-                    if entity.id == relationship.source_entity_id:
-                        source_entity = entity
-                        source_type = collection_name[:-1]
-                    elif entity.id == relationship.target_entity_id:
-                        target_entity = entity
-                        target_type = collection_name[:-1]
-            
-            if source_entity and target_entity:
-                result = validator.validate_relationship(
-                    relationship, source_entity, target_entity, source_type, target_type,
-                    ontology_data["relationships"]
-                )
-                
-                validation_results.append({
-                    "relationship_id": relationship.id,
-                    "is_valid": result.is_valid,
-                    "issue_count": len(result.issues),
-                    "issues": [issue.__dict__ for issue in result.issues]
-                })
-                
-                total_issues += len(result.issues)
+        cached = _cached_analysis("validate-all")
+        if cached is not None:
+            return cached
+        version = _data_version
+        
+        # Validation is CPU-bound; keep the event loop free. It works on
+        # snapshots of the indexed data, which may change while it runs
+        relationships = _snapshot("relationships")
+        validation_results, total_issues = await run_in_threadpool(
+            _validate_relationships, _rel_validator, relationships, dict(entity_index)
+        )
+        valid_count = sum(1 for r in validation_results if r["is_valid"])
         
-        return JSONResponse(content={
+        return _cache_analysis("validate-all", version, {
             "validation_results": validation_results,
             "summary": {
-                "total_relationships": len(ontology_data["relationships"]),
-                "valid_relationships": len([r for r in validation_results if r["is_valid"]]),
-                "invalid_relationships": len([r for r in validation_results if not r["is_valid"]]),
+                "total_relationships": len(relationships),
+                "valid_relationships": valid_count,
+                "invalid_relationships": len(validation_results) - valid_count,
                 "total_issues": total_issues
-            },
-            "validation_timestamp": datetime.now().isoformat()
-        })
+            }
+        }, "validation_timestamp")
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error validating all relationships: {str(e)}")
@@ -1574,167 +2181,243 @@ async def validate_all_relationships():
 async def detect_duplicate_relationships():
     """Detect duplicate relationships"""
     try:
+        cached = _cached_analysis("duplicates")
+        if cached is not None:
+            return cached
+        
         duplicates = []
         relationships = ontology_data["relationships"]
         
-        for i, rel1 in enumerate(relationships):
-            for j, rel2 in enumerate(relationships[i+1:], i+1):
-                if (rel1.source_entity_id == rel2.source_entity_id and
-                    rel1.target_entity_id == rel2.target_entity_id and
-                    rel1.relationship_type == rel2.relationship_type):
-                    
-                    duplicates.append({
-                        "relationship_1": rel1.__dict__,
-                        "relationship_2": rel2.__dict__,
-                        "duplicate_type": "exact_match"
-                    })
+        # Group relationship positions by (source, target, type); only groups
+        # with more than one member hold duplicate pairs
+        groups = {}
+        for i, rel in enumerate(relationships):
+            key = (rel.source_entity_id, rel.target_entity_id, rel.relationship_type)
+            groups.setdefault(key, []).append(i)
+        
+        # Report pairs in the order of a pairwise scan of the list
+        pairs = sorted(pair for group in groups.values() if len(group) > 1
+                       for pair in combinations(group, 2))
+        for i, j in pairs:
+            duplicates.append({
+                "relationship_1": _entity_to_dict(relationships[i]),
+                "relationship_2": _entity_to_dict(relationships[j]),
+                "duplicate_type": "exact_match"
+            })
         
-        return JSONResponse(content={
+        return _cache_analysis("duplicates", _data_version, {
             "duplicates": duplicates,
-            "duplicate_count": len(duplicates),
-            "detection_timestamp": datetime.now().isoformat()
-        })
+            "duplicate_count": len(duplicates)
+        }, "detection_timestamp")
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error detecting duplicates: {str(e)}")
 
+def _cyclic_components(graph: Dict[str, Sequence[str]]) -> List[List[str]]:
+    """Get the strongly connected components of a directed graph that contain a cycle"""
+    # Iterative Tarjan's algorithm
+    index: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    scc_stack: List[str] = []
+    on_scc_stack = set()
+    components = []
+    
+    def visit(node):
+        index[node] = lowlink[node] = len(index)
+        scc_stack.append(node)
+        on_scc_stack.add(node)
+        work.append((node, iter(graph.get(node, ()))))
+    
+    for root in graph:
+        if root in index:
+            continue
+        
+        work = []
+        visit(root)
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    visit(successor)
+                    break
+                if successor in on_scc_stack and index[successor] < lowlink[node]:
+                    lowlink[node] = index[successor]
+            else:
+                # All successors done; leave the node
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+                
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = scc_stack.pop()
+                        on_scc_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in graph.get(node, ()):
+                        component.reverse()
+                        components.append(component)
+    
+    return components
+
+def _find_cycles(graph: Dict[str, Sequence[str]]) -> Tuple[List[List[str]], List[List[str]]]:
+    """
+    Find cycles in a directed graph, returning (cycles, cyclic strongly connected components)
+    
+    Every cycle lies within one cyclic component, so the depth-first search
+    that reports a cycle, as a closed node path, for every edge back into the
+    current path only walks those components, not the acyclic rest.
+    """
+    components = _cyclic_components(graph)
+    if not components:
+        return [], components
+    
+    # Keep only the edges inside a component, as compact target tuples
+    component_of = {node: i for i, component in enumerate(components) for node in component}
+    subgraph = {
+        node: tuple(target for target in graph.get(node, ()) if component_of.get(target) == i)
+        for node, i in component_of.items()
+    }
+    
+    cycles = []
+    visited = set()
+    path: List[str] = []
+    on_path = set()
+    
+    for root in graph:
+        if root in visited or root not in subgraph:
+            continue
+        
+        visited.add(root)
+        path.append(root)
+        on_path.add(root)
+        work = [iter(subgraph[root])]
+        while work:
+            for successor in work[-1]:
+                if successor in on_path:
+                    cycles.append(path[path.index(successor):] + [successor])
+                elif successor not in visited:
+                    visited.add(successor)
+                    path.append(successor)
+                    on_path.add(successor)
+                    work.append(iter(subgraph[successor]))
+                    break
+            else:
+                work.pop()
+                on_path.discard(path.pop())
+    
+    return cycles, components
+
 @router.post("/relationships/detect-cycles")
 async def detect_circular_dependencies():
     """Detect circular dependencies in hierarchical relationships"""
     try:
-        from backend.verification.relationship_validator import create_relationship_validator
-        validator = create_relationship_validator()
+        cached = _cached_analysis("cycles")
+        if cached is not None:
+            return cached
         
-        # Build graph of hierarchical relationships
-        hierarchical_types = ["has_subsystem", "has_component", "has_spare_part", "part_of"]
+        # Build graph of hierarchical relationships; the traversal only needs
+        # each source's targets, frozen into tuples once collected
         graph = {}
         
         for rel in ontology_data["relationships"]:
-            if rel.relationship_type.value in hierarchical_types:
-                if rel.source_entity_id not in graph:
-                    graph[rel.source_entity_id] = []
-                graph[rel.source_entity_id].append({
-                    "target": rel.target_entity_id,
-                    "relationship_id": rel.id,
-                    "relationship_type": rel.relationship_type.value
-                })
-        
-        # Detect cycles using DFS
-        cycles = []
-        visited = set()
-        rec_stack = set()
-        
-        def dfs(node, path):
-            if node in rec_stack:
-                # Found cycle
-                cycle_start = path.index(node)
-                cycle_path = path[cycle_start:] + [node]
-                cycles.append(cycle_path)
-                return
-            
-            if node in visited:
-                return
-            
-            visited.add(node)
-            rec_stack.add(node)
-            
-            for edge in graph.get(node, []):
-                dfs(edge["target"], path + [node])
-            
-            rec_stack.remove(node)
+            if rel.relationship_type in HIERARCHICAL_RELATIONSHIP_TYPES:
+                graph.setdefault(rel.source_entity_id, []).append(rel.target_entity_id)
         
-        for node in graph:
-            if node not in visited:
-                dfs(node, [])
+        adjacency = {source_id: tuple(targets) for source_id, targets in graph.items()}
+        cycles, cyclic_components = _find_cycles(adjacency)
         
-        return JSONResponse(content={
+        return _cache_analysis("cycles", _data_version, {
             "cycles": cycles,
             "cycle_count": len(cycles),
-            "detection_timestamp": datetime.now().isoformat()
-        })
+            "cyclic_components": cyclic_components
+        }, "detection_timestamp")
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error detecting cycles: {str(e)}")
 
+# Graph node settings per entity collection: (collection, group, level,
+# label for unnamed entities, tooltip lines before the confidence)
+_GRAPH_NODE_SPECS = (
+    ("systems", "system", 0, "Unnamed System",
+     lambda e: f"System: {e.label}\nType: {e.system_type.value}"),
+    ("subsystems", "subsystem", 1, "Unnamed Subsystem",
+     lambda e: f"Subsystem: {e.label}\nType: {e.subsystem_type.value}"),
+    ("components", "component", 2, "Unnamed Component",
+     lambda e: f"Component: {e.label}\nType: {e.component_type}"),
+    ("spare_parts", "spare_part", 3, "Unnamed Spare Part",
+     lambda e: f"Spare Part: {e.label}\nPart Number: {e.part_number}")
+)
+
 @router.get("/visualization/graph")
-async def get_visualization_graph():
+async def get_visualization_graph(
+    request: Request,
+    include_tooltips: bool = Query(True, description="Include formatted hover text for nodes and edges")
+):
     """Get graph data for ontology visualization"""
     try:
-        nodes = []
-        edges = []
-        
-        # Add system nodes
-        for system in ontology_data["systems"]:
-            nodes.append({
-                "id": system.id,
-                "label": system.label or "Unnamed System",
-                "group": "system",
-                "level": 0,
-                "title": f"System: {system.label}\nType: {system.system_type.value}\nConfidence: {system.metadata.confidence_score:.1%}",
-                "confidence": system.metadata.confidence_score,
-                "validation_status": system.metadata.validation_status.value
-            })
-        
-        # Add subsystem nodes
-        for subsystem in ontology_data["subsystems"]:
-            nodes.append({
-                "id": subsystem.id,
-                "label": subsystem.label or "Unnamed Subsystem",
-                "group": "subsystem", 
-                "level": 1,
-                "title": f"Subsystem: {subsystem.label}\nType: {subsystem.subsystem_type.value}\nConfidence: {subsystem.metadata.confidence_score:.1%}",
-                "confidence": subsystem.metadata.confidence_score,
-                "validation_status": subsystem.metadata.validation_status.value
-            })
-        
-        # Add component nodes
-        for component in ontology_data["components"]:
-            nodes.append({
-                "id": component.id,
-                "label": component.label or "Unnamed Component",
-                "group": "component",
-                "level": 2,
-                "title": f"Component: {component.label}\nType: {component.component_type}\nConfidence: {component.metadata.confidence_score:.1%}",
-                "confidence": component.metadata.confidence_score,
-                "validation_status": component.metadata.validation_status.value
-            })
-        
-        # Add spare part nodes
-        for spare_part in ontology_data["spare_parts"]:
-            nodes.append({
-                "id": spare_part.id,
-                "label": spare_part.label or "Unnamed Spare Part",
-                "group": "spare_part",
-                "level": 3,
-                "title": f"Spare Part: {spare_part.label}\nPart Number: {spare_part.part_number}\nConfidence: {spare_part.metadata.confidence_score:.1%}",
-                "confidence": spare_part.metadata.confidence_score,
-                "validation_status": spare_part.metadata.validation_status.value
-            })
-        
-        # Add relationship edges
-        for relationship in ontology_data["relationships"]:
-            edges.append({
-                "id": relationship.id,
-                "from": relationship.source_entity_id,
-                "to": relationship.target_entity_id,
-                "label": relationship.relationship_type.value.replace('_', ' '),
-                "title": f"Relationship: {relationship.relationship_type.value}\nDescription: {relationship.description or 'No description'}\nConfidence: {relationship.metadata.confidence_score:.1%}",
-                "confidence": relationship.metadata.confidence_score,
-                "arrows": "to"
-            })
-        
-        return JSONResponse(content={
-            "nodes": nodes,
-            "edges": edges,
-            "statistics": {
-                "total_nodes": len(nodes),
-                "total_edges": len(edges),
-                "systems": len(ontology_data["systems"]),
-                "subsystems": len(ontology_data["subsystems"]),
-                "components": len(ontology_data["components"]),
-                "spare_parts": len(ontology_data["spare_parts"])
+        # Unchanged data is answered from the client's copy
+        etag = _data_etag("-tooltips" if include_tooltips else "")
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        # The serialized graph is built once per data version and variant
+        cached = _graph_cache.get(include_tooltips)
+        if cached is None or cached[0] != _data_version:
+            nodes = []
+            edges = []
+            
+            # Add entity nodes, one level of the hierarchy per collection
+            for collection_name, group, level, unnamed_label, describe in _GRAPH_NODE_SPECS:
+                for entity in ontology_data[collection_name]:
+                    metadata = entity.metadata
+                    node = {
+                        "id": entity.id,
+                        "label": entity.label or unnamed_label,
+                        "group": group,
+                        "level": level,
+                        "confidence": metadata.confidence_score,
+                        "validation_status": metadata.validation_status.value
+                    }
+                    if include_tooltips:
+                        node["title"] = f"{describe(entity)}\nConfidence: {metadata.confidence_score:.1%}"
+                    nodes.append(node)
+            
+            # Add relationship edges
+            for relationship in ontology_data["relationships"]:
+                rel_type = relationship.relationship_type.value
+                confidence = relationship.metadata.confidence_score
+                edge = {
+                    "id": relationship.id,
+                    "from": relationship.source_entity_id,
+                    "to": relationship.target_entity_id,
+                    "label": rel_type.replace('_', ' '),
+                    "confidence": confidence,
+                    "arrows": "to"
+                }
+                if include_tooltips:
+                    edge["title"] = f"Relationship: {rel_type}\nDescription: {relationship.description or 'No description'}\nConfidence: {confidence:.1%}"
+                edges.append(edge)
+            
+            graph = {
+                "nodes": nodes,
+                "edges": edges,
+                "statistics": {
+                    "total_nodes": len(nodes),
+                    "total_edges": len(edges),
+                    "systems": len(ontology_data["systems"]),
+                    "subsystems": len(ontology_data["subsystems"]),
+                    "components": len(ontology_data["components"]),
+                    "spare_parts": len(ontology_data["spare_parts"])
+                }
             }
-        })
+            cached = _graph_cache[include_tooltips] = (_data_version, orjson.dumps(graph))
+        
+        return Response(content=cached[1], media_type="application/json", headers={"ETag": etag})
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting visualization data: {str(e)}")
\ No newline at end of file
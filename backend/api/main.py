@@ -6,19 +6,39 @@ Includes expert review dashboard and ontology management APIs
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+import atexit
+import logging
+import queue
 import uvicorn
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 # Import API routers
 from .expert_review_api import router as expert_review_router
 
+def configure_logging():
+    """Route root log records through a queue so handler I/O runs off request threads"""
+    root = logging.getLogger()
+    if any(isinstance(handler, QueueHandler) for handler in root.handlers):
+        return
+    
+    handlers = root.handlers[:] or [logging.StreamHandler()]
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    atexit.register(listener.stop)
+
+configure_logging()
+
 # Create FastAPI app
 app = FastAPI(
     title="Troubleshooting Ontology System",
     description="Expert Review Dashboard for Medical Device Ontology",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
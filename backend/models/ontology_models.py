@@ -3,6 +3,7 @@ OWL Ontology data models for the troubleshooting ontology system
 Extends existing entity models with hierarchical structure and OWL support
 """
 
+from collections import Counter
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional, Set, Union
 from enum import Enum
@@ -703,22 +704,20 @@ def get_ontology_statistics(
     
     total_entities = len(systems) + len(subsystems) + len(components) + len(spare_parts)
     
-    # Count validation statuses
-    all_entities = systems + subsystems + components + spare_parts
-    validation_counts = {}
-    for status in ValidationStatus:
-        validation_counts[status.value] = sum(
-            1 for entity in all_entities 
-            if entity.metadata.validation_status == status
-        )
+    # Count validation statuses and sum confidences in a single pass over
+    # the entities, touching each metadata object once
+    status_tally = Counter()
+    confidence_total = 0.0
+    for entities in (systems, subsystems, components, spare_parts):
+        for entity in entities:
+            metadata = entity.metadata
+            status_tally[metadata.validation_status] += 1
+            confidence_total += metadata.confidence_score
+    validation_counts = {status.value: status_tally[status] for status in ValidationStatus}
     
     # Count relationship types
-    relationship_counts = {}
-    for rel_type in RelationshipType:
-        relationship_counts[rel_type.value] = sum(
-            1 for rel in relationships 
-            if rel.relationship_type == rel_type
-        )
+    type_tally = Counter(rel.relationship_type for rel in relationships)
+    relationship_counts = {rel_type.value: type_tally[rel_type] for rel_type in RelationshipType}
     
     return {
         "total_entities": total_entities,
@@ -731,9 +730,7 @@ def get_ontology_statistics(
         "total_relationships": len(relationships),
         "relationship_counts": relationship_counts,
         "validation_status": validation_counts,
-        "average_confidence": sum(
-            entity.metadata.confidence_score for entity in all_entities
-        ) / total_entities if total_entities > 0 else 0.0
+        "average_confidence": confidence_total / total_entities if total_entities > 0 else 0.0
     }
 
 
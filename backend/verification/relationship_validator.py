@@ -65,6 +65,14 @@ class RelationshipValidationResult:
     suggestions: List[RelationshipSuggestion] = field(default_factory=list)
     validation_timestamp: datetime = field(default_factory=datetime.now)
 
+# Relationship types that form the containment hierarchy checked for cycles
+HIERARCHICAL_RELATIONSHIP_TYPES = frozenset({
+    RelationshipType.HAS_SUBSYSTEM,
+    RelationshipType.HAS_COMPONENT,
+    RelationshipType.HAS_SPARE_PART,
+    RelationshipType.PART_OF
+})
+
 class RelationshipValidator:
     """Validates relationships and provides domain-based suggestions"""
     
@@ -72,6 +80,9 @@ class RelationshipValidator:
         self.domain_rules = self._initialize_domain_rules()
         self.relationship_constraints = self._initialize_constraints()
         self.inference_patterns = self._initialize_inference_patterns()
+        # (relationships, summary) for the last tuple of existing relationships
+        # validated against, shared by every relationship checked against it
+        self._summary_cache: Optional[Tuple[Tuple[OntologyRelationship, ...], Dict[str, Any]]] = None
     
     def _initialize_domain_rules(self) -> Dict[str, Any]:
         """Initialize domain-specific relationship rules"""
@@ -234,12 +245,10 @@ class RelationshipValidator:
         
         # Check for duplicates
         if existing_relationships:
-            duplicates = [r for r in existing_relationships 
-                         if (r.source_entity_id == relationship.source_entity_id and 
-                             r.target_entity_id == relationship.target_entity_id and
-                             r.relationship_type == relationship.relationship_type and
-                             r.id != relationship.id)]
-            if duplicates:
+            summary = self._summarize_relationships(existing_relationships)
+            key = (relationship.source_entity_id, relationship.target_entity_id, relationship.relationship_type)
+            ids = summary["ids_by_key"].get(key, ())
+            if len(ids) > (relationship.id in ids):
                 issues.append(RelationshipValidationIssue(
                     relationship_id=relationship.id,
                     error_type=RelationshipValidationError.DUPLICATE_RELATIONSHIP,
@@ -298,50 +307,91 @@ class RelationshipValidator:
         """Check if adding this relationship would create a circular dependency"""
         
         # Only check for hierarchical relationships that could create cycles
-        hierarchical_types = [
-            RelationshipType.HAS_SUBSYSTEM,
-            RelationshipType.HAS_COMPONENT,
-            RelationshipType.HAS_SPARE_PART,
-            RelationshipType.PART_OF
-        ]
-        
-        if new_relationship.relationship_type not in hierarchical_types:
+        if new_relationship.relationship_type not in HIERARCHICAL_RELATIONSHIP_TYPES:
             return False
         
-        # Build graph of hierarchical relationships
-        graph = {}
+        summary = self._summarize_relationships(existing_relationships)
+        if summary["has_cycle"]:
+            return True
+        
+        # An acyclic hierarchy gains a cycle only from a new edge whose target
+        # already reaches its source
+        source_id = new_relationship.source_entity_id
+        target_id = new_relationship.target_entity_id
+        if (source_id, target_id) in summary["edges"]:
+            return False
+        return source_id == target_id or self._reaches(summary["graph"], target_id, source_id)
+    
+    def _summarize_relationships(self, existing_relationships) -> Dict[str, Any]:
+        """
+        Get the hierarchy graph of existing relationships, its edges, whether it
+        has a cycle, and the relationship ids per (source, target, type)
+        
+        Tuples cannot change, so the summary of the last tuple is reused while
+        the relationships of one snapshot are validated against it.
+        """
+        cached = self._summary_cache
+        if cached is not None and cached[0] is existing_relationships:
+            return cached[1]
+        
+        graph: Dict[str, List[str]] = {}
+        ids_by_key: Dict[Tuple[str, str, RelationshipType], Set[str]] = {}
         for rel in existing_relationships:
-            if rel.relationship_type in hierarchical_types:
-                if rel.source_entity_id not in graph:
-                    graph[rel.source_entity_id] = []
-                graph[rel.source_entity_id].append(rel.target_entity_id)
-        
-        # Add the new relationship
-        if new_relationship.source_entity_id not in graph:
-            graph[new_relationship.source_entity_id] = []
-        graph[new_relationship.source_entity_id].append(new_relationship.target_entity_id)
-        
-        # Check for cycles using DFS
-        def has_cycle(node, visited, rec_stack):
-            visited.add(node)
-            rec_stack.add(node)
+            if rel.relationship_type in HIERARCHICAL_RELATIONSHIP_TYPES:
+                graph.setdefault(rel.source_entity_id, []).append(rel.target_entity_id)
+            key = (rel.source_entity_id, rel.target_entity_id, rel.relationship_type)
+            ids_by_key.setdefault(key, set()).add(rel.id)
+        
+        summary = {
+            "graph": graph,
+            "edges": {(source_id, target_id) for source_id, targets in graph.items() for target_id in targets},
+            "has_cycle": self._has_cycle(graph),
+            "ids_by_key": ids_by_key
+        }
+        if isinstance(existing_relationships, tuple):
+            self._summary_cache = (existing_relationships, summary)
+        return summary
+    
+    @staticmethod
+    def _has_cycle(graph: Dict[str, List[str]]) -> bool:
+        """Check a directed graph for a cycle with an iterative depth-first search"""
+        done: Set[str] = set()
+        on_path: Set[str] = set()
+        
+        for root in graph:
+            if root in done:
+                continue
             
-            for neighbor in graph.get(node, []):
-                if neighbor not in visited:
-                    if has_cycle(neighbor, visited, rec_stack):
+            on_path.add(root)
+            work = [(root, iter(graph[root]))]
+            while work:
+                node, neighbors = work[-1]
+                for neighbor in neighbors:
+                    if neighbor in on_path:
                         return True
-                elif neighbor in rec_stack:
-                    return True
-            
-            rec_stack.remove(node)
-            return False
+                    if neighbor not in done:
+                        on_path.add(neighbor)
+                        work.append((neighbor, iter(graph.get(neighbor, ()))))
+                        break
+                else:
+                    work.pop()
+                    on_path.discard(node)
+                    done.add(node)
         
-        visited = set()
-        for node in graph:
-            if node not in visited:
-                if has_cycle(node, visited, set()):
+        return False
+    
+    @staticmethod
+    def _reaches(graph: Dict[str, List[str]], start: str, goal: str) -> bool:
+        """Check whether a path leads from start to goal in a directed graph"""
+        seen = {start}
+        pending = [start]
+        while pending:
+            for neighbor in graph.get(pending.pop(), ()):
+                if neighbor == goal:
                     return True
-        
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    pending.append(neighbor)
         return False
     
     def _generate_domain_suggestions(
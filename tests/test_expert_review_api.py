@@ -0,0 +1,890 @@
+"""
+Test suite for the Expert Review API
+Tests that the lookup indexes, status counts and data version stay consistent
+across edits, and the cycle detection used by the relationship analyses
+"""
+
+import asyncio
+import random
+import threading
+from datetime import datetime
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.api import expert_review_api as api
+from backend.models.ontology_models import OntologyRelationship, RelationshipType, ValidationStatus
+
+
+PREFIX = "/api/expert-review"
+
+
+def _index_state():
+    """Capture the lookup indexes, status counts and queue in comparable form"""
+    return (
+        {key: (id(entity), collection) for key, (entity, collection) in api.entity_index.items()},
+        {key: [id(rel) for rel in rels] for key, rels in api._rel_by_source.items() if rels},
+        {key: [id(rel) for rel in rels] for key, rels in api._rel_by_target.items() if rels},
+        {key: id(rel) for key, rel in api._rel_by_id.items()},
+        {status: count for status, count in api.status_counts.items() if count},
+        set(api._queue_entries)
+    )
+
+
+def assert_indexes_consistent():
+    """Check the incrementally maintained indexes against a full rebuild"""
+    api._sync_indexes()
+    maintained = _index_state()
+    api._rebuild_indexes()
+    assert maintained == _index_state()
+
+
+@pytest.fixture
+def client():
+    """Test client over a freshly cleared ontology"""
+    app = FastAPI()
+    app.include_router(api.router)
+
+    with TestClient(app) as test_client:
+        test_client.post(f"{PREFIX}/clear-data")
+        yield test_client
+        test_client.post(f"{PREFIX}/clear-data")
+
+
+def _import_entities(client, entities):
+    """Import entities and return their ids by label"""
+    response = client.post(f"{PREFIX}/import-entities-json", json={
+        "data": {"entities": entities},
+        "expert_id": "tester"
+    })
+    assert response.status_code == 200
+    assert response.json()["success"]
+
+    listed = client.get(f"{PREFIX}/entities", params={"page_size": 100}).json()["entities"]
+    return {entity["label"]: entity["id"] for entity in listed}
+
+
+class TestIndexInvariants:
+    """Test index, status count and data version bookkeeping of mutating endpoints"""
+
+    def test_create_update_delete_relationship(self, client):
+        """Test relationship indexes through creation, update and deletion"""
+        ids = _import_entities(client, [
+            {"entity_type": "subsystem", "label": "Beam Delivery"},
+            {"entity_type": "component", "label": "MLC"},
+            {"entity_type": "component", "label": "Jaw"}
+        ])
+        assert_indexes_consistent()
+
+        version = api._data_version
+        response = client.post(f"{PREFIX}/relationships", json={
+            "relationship_type": "has_component",
+            "source_entity_id": ids["Beam Delivery"],
+            "target_entity_id": ids["MLC"],
+            "expert_id": "tester"
+        })
+        assert response.status_code == 200
+        relationship_id = response.json()["relationship"]["id"]
+        assert api._data_version > version
+        assert_indexes_consistent()
+
+        version = api._data_version
+        response = client.put(f"{PREFIX}/relationships/{relationship_id}", json={
+            "updates": {"target_entity_id": ids["Jaw"]}
+        })
+        assert response.status_code == 200
+        assert api._data_version > version
+        assert [rel.id for rel in api._get_entity_relationships(ids["Jaw"])] == [relationship_id]
+        assert api._get_entity_relationships(ids["MLC"]) == []
+        assert_indexes_consistent()
+
+        version = api._data_version
+        response = client.delete(f"{PREFIX}/relationships/{relationship_id}")
+        assert response.status_code == 200
+        assert api._data_version > version
+        assert api._lookup_relationship(relationship_id) is None
+        assert_indexes_consistent()
+
+    def test_failing_relationship_update_keeps_indexes(self, client):
+        """Test that a rejected relationship update leaves the relationship indexed and unchanged"""
+        ids = _import_entities(client, [
+            {"entity_type": "subsystem", "label": "Beam Delivery"},
+            {"entity_type": "component", "label": "MLC"},
+            {"entity_type": "component", "label": "Jaw"}
+        ])
+        relationship_id = client.post(f"{PREFIX}/relationships", json={
+            "relationship_type": "has_component",
+            "source_entity_id": ids["Beam Delivery"],
+            "target_entity_id": ids["MLC"],
+            "expert_id": "tester"
+        }).json()["relationship"]["id"]
+
+        response = client.put(f"{PREFIX}/relationships/{relationship_id}", json={
+            "updates": {"target_entity_id": ids["Jaw"], "relationship_type": "not_a_type"}
+        })
+        assert response.status_code == 400
+
+        relationship = api._lookup_relationship(relationship_id)
+        assert relationship is not None
+        assert relationship.target_entity_id == ids["MLC"]
+        assert [rel.id for rel in api._get_entity_relationships(ids["MLC"])] == [relationship_id]
+        assert_indexes_consistent()
+
+    def test_entity_status_update(self, client):
+        """Test status counts and data version after an entity status update"""
+        ids = _import_entities(client, [{"entity_type": "component", "label": "MLC"}])
+        entity = api._lookup_entity(ids["MLC"])[0]
+        old_status = entity.metadata.validation_status
+        before = api.status_counts[ValidationStatus.EXPERT_APPROVED]
+
+        version = api._data_version
+        response = client.put(f"{PREFIX}/entities/{ids['MLC']}", json={
+            "entity_id": ids["MLC"],
+            "entity_type": "component",
+            "updates": {"label": "Multi-leaf Collimator", "metadata.validation_status": "expert_approved"},
+            "expert_id": "tester"
+        })
+        assert response.status_code == 200
+        assert api._data_version > version
+        assert entity.label == "Multi-leaf Collimator"
+        assert api.status_counts[ValidationStatus.EXPERT_APPROVED] == before + 1
+        assert old_status == ValidationStatus.EXPERT_APPROVED or api.status_counts[old_status] == 0
+        assert_indexes_consistent()
+
+    def test_failing_entity_update_changes_nothing(self, client):
+        """Test that an invalid status rejects the whole entity update"""
+        ids = _import_entities(client, [{"entity_type": "component", "label": "MLC"}])
+        entity = api._lookup_entity(ids["MLC"])[0]
+        old_status = entity.metadata.validation_status
+
+        version = api._data_version
+        response = client.put(f"{PREFIX}/entities/{ids['MLC']}", json={
+            "entity_id": ids["MLC"],
+            "entity_type": "component",
+            "updates": {"label": "Renamed", "metadata.validation_status": "not_a_status"},
+            "expert_id": "tester"
+        })
+        assert response.status_code == 400
+        assert entity.label == "MLC"
+        assert entity.metadata.validation_status == old_status
+        assert api._data_version == version
+        assert_indexes_consistent()
+
+
+class TestConditionalResponses:
+    """Test ETag validation of responses derived from the ontology data"""
+
+    def _assert_revalidates(self, client, path, change):
+        """Check that path answers its ETag with 304 until change() is made"""
+        response = client.get(f"{PREFIX}{path}")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+
+        unchanged = client.get(f"{PREFIX}{path}", headers={"If-None-Match": etag})
+        assert unchanged.status_code == 304
+        assert unchanged.headers["ETag"] == etag
+        assert unchanged.content == b""
+
+        other = client.get(f"{PREFIX}{path}", headers={"If-None-Match": '"other", ' + etag})
+        assert other.status_code == 304
+
+        change()
+        changed = client.get(f"{PREFIX}{path}", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        return response.json(), changed.json()
+
+    def test_overview(self, client):
+        """Test that the overview revalidates until an entity is added"""
+        _import_entities(client, [{"entity_type": "component", "label": "MLC"}])
+
+        before, after = self._assert_revalidates(
+            client, "/dashboard/overview",
+            lambda: _import_entities(client, [{"entity_type": "component", "label": "Jaw"}])
+        )
+
+        assert after["entity_counts"]["components"] == before["entity_counts"]["components"] + 1
+
+    def test_entity_list(self, client):
+        """Test that the entity list revalidates until an entity is edited"""
+        ids = _import_entities(client, [{"entity_type": "component", "label": "MLC"}])
+
+        def rename():
+            client.put(f"{PREFIX}/entities/{ids['MLC']}", json={
+                "entity_id": ids["MLC"],
+                "entity_type": "component",
+                "updates": {"label": "Multi-leaf Collimator"},
+                "expert_id": "tester"
+            })
+
+        before, after = self._assert_revalidates(client, "/entities", rename)
+
+        assert [entity["label"] for entity in before["entities"]] == ["MLC"]
+        assert [entity["label"] for entity in after["entities"]] == ["Multi-leaf Collimator"]
+
+    def _validate(self, client, entity_id, status="expert_approved"):
+        """Record a validation review of an entity"""
+        response = client.post(f"{PREFIX}/entities/{entity_id}/validate", json={
+            "entity_id": entity_id,
+            "validation_status": status,
+            "expert_id": "tester",
+            "review_comment": "checked"
+        })
+        assert response.status_code == 200
+
+    def test_review_history(self, client):
+        """Test that an entity's review history revalidates until it is reviewed"""
+        ids = _import_entities(client, [{"entity_type": "component", "label": "MLC"}])
+
+        before, after = self._assert_revalidates(
+            client, f"/entities/{ids['MLC']}/review-history", lambda: self._validate(client, ids["MLC"])
+        )
+
+        assert len(after["review_history"]) == len(before["review_history"]) + 1
+
+    def test_review_history_is_per_entity(self, client):
+        """Test that reviewing one entity leaves another entity's tag valid"""
+        ids = _import_entities(client, [
+            {"entity_type": "component", "label": "MLC"},
+            {"entity_type": "component", "label": "Jaw"}
+        ])
+        path = f"{PREFIX}/entities/{ids['Jaw']}/review-history"
+        etag = client.get(path).headers["ETag"]
+
+        self._validate(client, ids["MLC"])
+
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    def test_entity_image(self, client):
+        """Test that an entity's image URL revalidates until the entity changes"""
+        ids = _import_entities(client, [{"entity_type": "component", "label": "MLC"}])
+
+        before, after = self._assert_revalidates(
+            client, f"/entities/{ids['MLC']}/image", lambda: client.delete(f"{PREFIX}/entities/{ids['MLC']}/image")
+        )
+
+        assert before == after == {"image_url": None, "has_image": False}
+
+    def test_validation_summary(self, client):
+        """Test that the validation summary revalidates until a status changes"""
+        ids = _import_entities(client, [{"entity_type": "component", "label": "MLC"}])
+
+        before, after = self._assert_revalidates(
+            client, "/validation/summary", lambda: self._validate(client, ids["MLC"], "expert_rejected")
+        )
+
+        assert after["expert_rejected"] == before["expert_rejected"] + 1
+
+    def test_visualization_graph(self, client):
+        """Test that the graph revalidates until a relationship is added"""
+        ids = _import_entities(client, [
+            {"entity_type": "subsystem", "label": "Beam Delivery"},
+            {"entity_type": "component", "label": "MLC"}
+        ])
+
+        def relate():
+            client.post(f"{PREFIX}/relationships", json={
+                "relationship_type": "has_component",
+                "source_entity_id": ids["Beam Delivery"],
+                "target_entity_id": ids["MLC"],
+                "expert_id": "tester"
+            })
+
+        before, after = self._assert_revalidates(client, "/visualization/graph", relate)
+
+        assert before["edges"] == []
+        assert [(edge["from"], edge["to"]) for edge in after["edges"]] == [(ids["Beam Delivery"], ids["MLC"])]
+
+    def test_graph_variants_have_own_tags(self, client):
+        """Test that the graph with and without tooltips do not share an ETag"""
+        _import_entities(client, [{"entity_type": "component", "label": "MLC"}])
+        path = f"{PREFIX}/visualization/graph"
+
+        with_tooltips = client.get(path)
+        without_tooltips = client.get(path, params={"include_tooltips": False})
+
+        assert with_tooltips.headers["ETag"] != without_tooltips.headers["ETag"]
+        assert "title" in with_tooltips.json()["nodes"][0]
+        assert "title" not in without_tooltips.json()["nodes"][0]
+        response = client.get(path, params={"include_tooltips": False},
+                              headers={"If-None-Match": with_tooltips.headers["ETag"]})
+        assert response.status_code == 200
+        assert response.json() == without_tooltips.json()
+
+
+class TestImportFile:
+    """Test parsing and validation of uploaded import files"""
+
+    def _upload(self, client, content, filename="import.json"):
+        """Upload raw import file bytes"""
+        return client.post(f"{PREFIX}/import-entities", files={"file": (filename, content, "application/json")},
+                           params={"expert_id": "tester"})
+
+    def test_items_are_passed_through(self, client):
+        """Test that item fields are kept as given, including extra and non-string fields"""
+        content = orjson.dumps({
+            "entities": [
+                {"id": 7, "entity_type": "component", "name": "MLC", "manufacturer": "Elekta"},
+                {"entity_type": "component", "label": "Jaw", "metadata": {"confidence_score": 0.4}},
+                {"entity_type": "component"}
+            ],
+            "relationships": []
+        })
+
+        response = self._upload(client, content)
+
+        assert response.status_code == 200
+        stats = response.json()["stats"]
+        assert stats["entities_processed"] == 3
+        assert stats["entities_imported"] == 2
+        assert stats["errors"] == ["Entity 2: Missing required 'label' or 'name' field"]
+
+        mlc = api._lookup_entity(7)[0]
+        assert mlc.label == "MLC"
+        assert mlc.manufacturer == "Elekta"
+        jaw = next(entity for entity in api.ontology_data["components"] if entity.label == "Jaw")
+        assert jaw.metadata.confidence_score == 0.4
+
+    def test_missing_arrays_default_to_empty(self, client):
+        """Test that a file without entities or relationships imports nothing"""
+        response = self._upload(client, b"{}")
+
+        assert response.status_code == 200
+        assert response.json()["stats"]["entities_processed"] == 0
+
+    @pytest.mark.parametrize("content, detail", [
+        (b'{"entities": [', "Invalid JSON format"),
+        (b'[{"label": "MLC"}]', "Invalid import file"),
+        (b'{"entities": {"label": "MLC"}}', "Invalid import file"),
+        (b'{"entities": ["MLC"]}', "Invalid import file"),
+        (b'{"relationships": 3}', "Invalid import file")
+    ])
+    def test_malformed_files_are_rejected(self, client, content, detail):
+        """Test that invalid JSON and a wrong file structure are rejected whole"""
+        response = self._upload(client, content)
+
+        assert response.status_code == 400
+        assert response.json()["detail"].startswith(detail)
+        assert api.ontology_data["components"] == []
+
+    def test_only_json_files(self, client):
+        """Test that files without a .json name are rejected"""
+        assert self._upload(client, b"{}", filename="import.csv").status_code == 400
+
+
+def _queue_entity(label, status, confidence):
+    """Import data for an entity with the given validation status and confidence"""
+    return {
+        "entity_type": "component",
+        "label": label,
+        "metadata": {"validation_status": status, "confidence_score": confidence}
+    }
+
+
+def _reference_queue(limit):
+    """Reference queue built by scoring and sorting every entity"""
+    scored = []
+    for entities in api.entity_collections.values():
+        for entity in entities:
+            priority = api._queue_priority(entity)
+            if priority is not None:
+                scored.append((priority, entity.id))
+    scored.sort(key=lambda item: -item[0])
+    return [(entity_id, priority) for priority, entity_id in scored[:limit]]
+
+
+class TestValidationQueue:
+    """Test the maintained validation priority heap"""
+
+    def _served(self, client, limit=50):
+        """Served (entity id, priority score) pairs in queue order"""
+        response = client.get(f"{PREFIX}/validation/queue", params={"limit": limit})
+        assert response.status_code == 200
+        return [(item["entity_id"], item["priority_score"]) for item in response.json()["validation_queue"]]
+
+    def test_matches_full_sort(self, client):
+        """Test that the queue serves what sorting every entity by priority gives"""
+        _import_entities(client, [
+            _queue_entity("New", "not_validated", 0.9),
+            _queue_entity("Revise", "needs_revision", 0.2),
+            _queue_entity("Pending", "pending_review", 0.7),
+            _queue_entity("Approved", "expert_approved", 0.1),
+            _queue_entity("Unsure", "not_validated", 0.3)
+        ])
+
+        assert self._served(client) == _reference_queue(50)
+        assert self._served(client, limit=2) == _reference_queue(2)
+        # Serving does not consume the queue
+        assert self._served(client) == _reference_queue(50)
+
+    def test_updates_supersede_entries(self, client):
+        """Test that changed entities are served once, at their new priority or not at all"""
+        ids = _import_entities(client, [
+            _queue_entity("MLC", "pending_review", 0.7),
+            _queue_entity("Jaw", "pending_review", 0.75),
+            _queue_entity("Gantry", "not_validated", 0.5)
+        ])
+
+        for _ in range(3):
+            response = client.post(f"{PREFIX}/entities/{ids['MLC']}/validate", json={
+                "entity_id": ids["MLC"],
+                "validation_status": "not_validated",
+                "expert_id": "tester",
+                "review_comment": "recheck",
+                "confidence_override": 0.1
+            })
+            assert response.status_code == 200
+        client.post(f"{PREFIX}/entities/{ids['Jaw']}/validate", json={
+            "entity_id": ids["Jaw"],
+            "validation_status": "expert_approved",
+            "expert_id": "tester",
+            "review_comment": "fine"
+        })
+
+        served = self._served(client)
+        assert served == _reference_queue(50)
+        assert [entity_id for entity_id, _ in served] == [ids["MLC"], ids["Gantry"]]
+
+    def test_changes_outside_endpoints_are_dropped(self, client):
+        """Test that entries of entities no longer needing validation are skipped lazily"""
+        ids = _import_entities(client, [
+            _queue_entity("MLC", "not_validated", 0.5),
+            _queue_entity("Jaw", "not_validated", 0.6)
+        ])
+
+        api._lookup_entity(ids["MLC"])[0].metadata.validation_status = ValidationStatus.EXPERT_APPROVED
+
+        assert [entity_id for entity_id, _ in self._served(client)] == [ids["Jaw"]]
+        assert ids["MLC"] not in api._queue_entries
+
+    def test_superseded_entries_are_compacted(self, client):
+        """Test that repeated updates do not grow the heap without bound"""
+        ids = _import_entities(client, [_queue_entity("MLC", "not_validated", 0.5)])
+        entity = api._lookup_entity(ids["MLC"])[0]
+
+        for i in range(500):
+            entity.metadata.confidence_score = i / 500
+            api._enqueue_entity(entity)
+
+        assert len(api._pending_queue) <= 2 * len(api._queue_entries) + 64
+        assert self._served(client) == _reference_queue(50)
+
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+
+
+class TestImageUpload:
+    """Test content sniffing, the size cap and cleanup of image uploads"""
+
+    @pytest.fixture
+    def uploads(self, tmp_path, monkeypatch):
+        """Upload directory under a temporary working directory, with small chunks and cap"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(api, "_UPLOAD_CHUNK_SIZE", 16)
+        monkeypatch.setattr(api, "_MAX_IMAGE_BYTES", 64)
+        return tmp_path / "frontend" / "static" / "uploads" / "entity_images"
+
+    def _upload(self, client, entity_id, content, content_type="image/png", filename="photo.exe"):
+        """Upload image bytes for an entity"""
+        return client.post(f"{PREFIX}/entities/{entity_id}/upload-image",
+                           files={"file": (filename, content, content_type)})
+
+    def test_image_is_saved_under_sniffed_format(self, client, uploads):
+        """Test that a valid image is streamed to disk and named by its format"""
+        ids = _import_entities(client, [{"entity_type": "component", "label": "MLC"}])
+        content = PNG_HEADER + bytes(range(56))
+
+        response = self._upload(client, ids["MLC"], content)
+
+        assert response.status_code == 200
+        filename = response.json()["filename"]
+        assert filename.endswith(".png")
+        assert (uploads / filename).read_bytes() == content
+        assert api._lookup_entity(ids["MLC"])[0].image_url == f"/static/uploads/entity_images/{filename}"
+
+    @pytest.mark.parametrize("content, content_type", [
+        (b"\xff\xd8\xff\xe0" + b"x" * 20, "image/png"),
+        (b"MZ" + b"x" * 20, "image/jpeg"),
+        (b"", "image/gif"),
+        (PNG_HEADER + b"x" * 20, "application/octet-stream")
+    ])
+    def test_content_must_match_declared_type(self, client, uploads, content, content_type):
+        """Test that uploads whose bytes are not the declared image type are rejected unsaved"""
+        ids = _import_entities(client, [{"entity_type": "component", "label": "MLC"}])
+
+        response = self._upload(client, ids["MLC"], content, content_type)
+
+        assert response.status_code == 400
+        assert not uploads.exists() or not any(uploads.iterdir())
+        assert api._lookup_entity(ids["MLC"])[0].image_url is None
+
+    @pytest.mark.parametrize("header, content_type", [
+        (b"\xff\xd8\xff\xe0", "image/jpeg"),
+        (b"GIF89a", "image/gif"),
+        (b"RIFF\x00\x00\x00\x00WEBP", "image/webp")
+    ])
+    def test_other_formats_are_sniffed(self, client, uploads, header, content_type):
+        """Test that JPEG, GIF and WebP signatures are recognized"""
+        ids = _import_entities(client, [{"entity_type": "component", "label": "MLC"}])
+
+        response = self._upload(client, ids["MLC"], header + b"x" * 8, content_type)
+
+        assert response.status_code == 200
+
+    def test_oversized_upload_leaves_no_file(self, client, uploads):
+        """Test that an upload over the cap is rejected and its partial file removed"""
+        ids = _import_entities(client, [{"entity_type": "component", "label": "MLC"}])
+
+        assert self._upload(client, ids["MLC"], PNG_HEADER + b"x" * 56).status_code == 200
+        files = set(uploads.iterdir())
+
+        response = self._upload(client, ids["MLC"], PNG_HEADER + b"x" * 57)
+
+        assert response.status_code == 413
+        assert set(uploads.iterdir()) == files
+
+    def test_unknown_entity_writes_nothing(self, client, uploads):
+        """Test that uploads for unknown entities are rejected before touching the disk"""
+        response = self._upload(client, "missing", PNG_HEADER)
+
+        assert response.status_code == 404
+        assert not uploads.exists()
+
+
+class TestWriteLock:
+    """Test that changes are serialized without blocking the event loop"""
+
+    def test_writers_wait_for_import_while_readers_are_served(self, client, monkeypatch):
+        """Test that a write waits for an import building in the threadpool, and a read does not"""
+        monkeypatch.setattr(api, "_write_lock", asyncio.Lock())
+        building = threading.Event()
+        release = threading.Event()
+        build_import_data = api._build_import_data
+
+        def slow_build(*args):
+            building.set()
+            assert release.wait(5)
+            return build_import_data(*args)
+
+        monkeypatch.setattr(api, "_build_import_data", slow_build)
+
+        async def run():
+            data = {"entities": [{"entity_type": "component", "label": "MLC"}]}
+            importing = asyncio.create_task(api.process_import_data(data, "tester"))
+            assert await asyncio.to_thread(building.wait, 5)
+
+            clearing = asyncio.create_task(api.clear_data())
+            await asyncio.sleep(0.05)
+            assert not clearing.done()
+
+            queue = await api.get_validation_queue(priority="high", limit=50)
+            assert queue.status_code == 200
+
+            release.set()
+            await clearing
+            return await importing
+
+        result = asyncio.run(run())
+
+        # The clear ran after the imported entity was added
+        assert result["success"]
+        assert result["stats"]["entities_imported"] == 1
+        assert api.ontology_data["components"] == []
+        assert_indexes_consistent()
+
+
+class TestReviewHistory:
+    """Test the bounded expert review log"""
+
+    def test_oldest_reviews_are_dropped(self, client, monkeypatch):
+        """Test that the history keeps the newest reviews and payloads the most recent of those"""
+        monkeypatch.setattr(api, "_REVIEW_LOG_SIZE", 12)
+        ids = _import_entities(client, [{"entity_type": "component", "label": "MLC"}])
+
+        for i in range(15):
+            response = client.post(f"{PREFIX}/entities/{ids['MLC']}/validate", json={
+                "entity_id": ids["MLC"],
+                "validation_status": "expert_approved",
+                "expert_id": "tester",
+                "review_comment": f"review {i}"
+            })
+            assert response.status_code == 200
+
+        history = client.get(f"{PREFIX}/entities/{ids['MLC']}/review-history").json()["review_history"]
+        assert [review["comment"] for review in history] == [f"review {i}" for i in range(3, 15)]
+
+        recent = response.json()["entity"]["metadata"]["expert_reviews"]
+        assert recent == history[-api._RECENT_REVIEWS:]
+
+
+class TestResponseTimestamps:
+    """Test that cached responses are stamped with the time they are served"""
+
+    @pytest.fixture
+    def now(self, monkeypatch):
+        """Control the time read by the API"""
+        clock = {"now": datetime(2025, 1, 1, 12, 0, 0)}
+
+        class FakeDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock["now"]
+
+        monkeypatch.setattr(api, "datetime", FakeDatetime)
+        return clock
+
+    @pytest.mark.parametrize("method, path, field", [
+        ("get", "/dashboard/overview", "last_updated"),
+        ("post", "/relationships/validate-all", "validation_timestamp"),
+        ("post", "/relationships/detect-duplicates", "detection_timestamp"),
+        ("post", "/relationships/detect-cycles", "detection_timestamp")
+    ])
+    def test_cached_body_gets_current_timestamp(self, client, now, method, path, field):
+        """Test that a cached response repeats the body with a fresh timestamp"""
+        _import_entities(client, [{"entity_type": "component", "label": "MLC"}])
+
+        first = getattr(client, method)(f"{PREFIX}{path}").json()
+        now["now"] = datetime(2025, 1, 1, 12, 5, 0)
+        second = getattr(client, method)(f"{PREFIX}{path}").json()
+
+        assert first[field] == "2025-01-01T12:00:00"
+        assert second[field] == "2025-01-01T12:05:00"
+        assert list(second)[-1] == field
+        del first[field], second[field]
+        assert first == second
+
+
+@pytest.fixture
+def results_dir(tmp_path, monkeypatch):
+    """Empty PDF results directory read by the dashboard loader"""
+    monkeypatch.setattr(api, "_RESULTS_DIR", tmp_path)
+    api._find_latest_result_files.cache_clear()
+    yield tmp_path
+    api._find_latest_result_files.cache_clear()
+
+
+def _write_entities(results_dir, names):
+    """Write a PDF results entities file with one component per name"""
+    path = results_dir / "manual_entities_20250101_000000.json"
+    path.write_bytes(orjson.dumps({
+        "entities": [{"id": f"pdf-{i}", "name": name, "confidence": 0.9} for i, name in enumerate(names)]
+    }))
+
+
+class TestPdfResultsReload:
+    """Test that reloading unchanged PDF results is skipped only while the data is unedited"""
+
+    def _labels(self):
+        """Sorted labels of the loaded components"""
+        return sorted(component.label for component in api.ontology_data["components"])
+
+    def test_unchanged_files_are_not_parsed_again(self, client, results_dir, monkeypatch):
+        """Test that a reload of the same files keeps the loaded data"""
+        _write_entities(results_dir, ["MLC", "Jaw"])
+        assert client.post(f"{PREFIX}/load-pdf-results").json()["success"]
+        loaded = list(api.ontology_data["components"])
+
+        monkeypatch.setattr(api.orjson, "loads", lambda data: pytest.fail("results parsed again"))
+        assert client.post(f"{PREFIX}/load-pdf-results").json()["entities_loaded"] == 2
+        assert api.ontology_data["components"] == loaded
+
+    def test_explicit_reload_discards_edits(self, client, results_dir):
+        """Test that a reload after an expert edit or import restores the files' data"""
+        _write_entities(results_dir, ["MLC", "Jaw"])
+        client.post(f"{PREFIX}/load-pdf-results")
+
+        response = client.put(f"{PREFIX}/entities/pdf-0", json={
+            "entity_id": "pdf-0",
+            "entity_type": "component",
+            "updates": {"label": "Renamed"},
+            "expert_id": "tester"
+        })
+        assert response.status_code == 200
+        assert self._labels() == ["Jaw", "Renamed"]
+
+        client.post(f"{PREFIX}/load-pdf-results")
+        assert self._labels() == ["Jaw", "MLC"]
+
+        _import_entities(client, [{"entity_type": "component", "label": "Imported"}])
+        client.post(f"{PREFIX}/load-pdf-results")
+        assert self._labels() == ["Jaw", "MLC"]
+        assert_indexes_consistent()
+
+    def test_changed_files_are_reloaded(self, client, results_dir):
+        """Test that new file contents and a cleared dashboard are loaded again"""
+        _write_entities(results_dir, ["MLC"])
+        client.post(f"{PREFIX}/load-pdf-results")
+
+        _write_entities(results_dir, ["MLC", "Gantry Motor"])
+        client.post(f"{PREFIX}/load-pdf-results")
+        assert self._labels() == ["Gantry Motor", "MLC"]
+
+        client.post(f"{PREFIX}/clear-data")
+        assert self._labels() == []
+        client.post(f"{PREFIX}/load-pdf-results")
+        assert self._labels() == ["Gantry Motor", "MLC"]
+
+
+def _pairwise_duplicates(relationships):
+    """Reference duplicate search comparing every pair of relationships"""
+    pairs = []
+    for i, first in enumerate(relationships):
+        for second in relationships[i + 1:]:
+            if (first.source_entity_id == second.source_entity_id
+                    and first.target_entity_id == second.target_entity_id
+                    and first.relationship_type == second.relationship_type):
+                pairs.append((first.id, second.id))
+    return pairs
+
+
+class TestDuplicateDetection:
+    """Test grouped duplicate detection against the pairwise scan"""
+
+    def test_matches_pairwise_scan(self, client):
+        """Test that the same pairs are reported in the same order on random relationships"""
+        rng = random.Random(7)
+        types = [RelationshipType.HAS_COMPONENT, RelationshipType.CONNECTED_TO, RelationshipType.CONTROLS]
+
+        for _ in range(20):
+            client.post(f"{PREFIX}/clear-data")
+            relationships = api.ontology_data["relationships"]
+            for _ in range(rng.randint(0, 30)):
+                relationships.append(OntologyRelationship(
+                    relationship_type=rng.choice(types),
+                    source_entity_id=rng.choice("abc"),
+                    target_entity_id=rng.choice("abc")
+                ))
+
+            response = client.post(f"{PREFIX}/relationships/detect-duplicates")
+            assert response.status_code == 200
+            body = response.json()
+
+            reported = [(d["relationship_1"]["id"], d["relationship_2"]["id"]) for d in body["duplicates"]]
+            assert reported == _pairwise_duplicates(relationships)
+            assert body["duplicate_count"] == len(reported)
+            assert all(d["duplicate_type"] == "exact_match" for d in body["duplicates"])
+
+    def test_result_follows_changes(self, client):
+        """Test that a cached result is replaced once a duplicate is deleted"""
+        ids = _import_entities(client, [
+            {"entity_type": "subsystem", "label": "Beam Delivery"},
+            {"entity_type": "component", "label": "MLC"}
+        ])
+        created = [
+            client.post(f"{PREFIX}/relationships", json={
+                "relationship_type": "has_component",
+                "source_entity_id": ids["Beam Delivery"],
+                "target_entity_id": ids["MLC"],
+                "expert_id": "tester"
+            }).json()["relationship"]["id"]
+            for _ in range(3)
+        ]
+        path = f"{PREFIX}/relationships/detect-duplicates"
+
+        assert client.post(path).json()["duplicate_count"] == 3
+        client.delete(f"{PREFIX}/relationships/{created[0]}")
+        assert client.post(path).json()["duplicate_count"] == 1
+
+
+def _dfs_cycles(graph):
+    """Reference recursive cycle search the iterative detection replaced"""
+    cycles = []
+    visited = set()
+    on_path = set()
+
+    def dfs(node, path):
+        if node in on_path:
+            cycles.append(path[path.index(node):] + [node])
+            return
+        if node in visited:
+            return
+        visited.add(node)
+        on_path.add(node)
+        for target in graph.get(node, []):
+            dfs(target, path + [node])
+        on_path.remove(node)
+
+    for node in graph:
+        if node not in visited:
+            dfs(node, [])
+
+    return cycles
+
+
+def _reachable(graph, start):
+    """Nodes reachable from start by a path of at least one edge"""
+    seen = set()
+    stack = list(graph.get(start, ()))
+    while stack:
+        node = stack.pop()
+        if node not in seen:
+            seen.add(node)
+            stack.extend(graph.get(node, ()))
+    return seen
+
+
+def _random_graph(rng):
+    """Random directed graph, with self-loops and parallel edges allowed"""
+    nodes = [f"n{i}" for i in range(rng.randint(1, 12))]
+    graph = {}
+    for _ in range(rng.randint(0, 20)):
+        graph.setdefault(rng.choice(nodes), []).append(rng.choice(nodes))
+    return {source: tuple(targets) for source, targets in graph.items()}
+
+
+class TestCycleDetection:
+    """Test cycle detection against the recursive depth-first search"""
+
+    def test_simple_cycle(self):
+        """Test a three-node cycle hanging off an acyclic node"""
+        graph = {"root": ("a",), "a": ("b",), "b": ("c",), "c": ("a",)}
+
+        cycles, components = api._find_cycles(graph)
+
+        assert cycles == [["a", "b", "c", "a"]]
+        assert [sorted(component) for component in components] == [["a", "b", "c"]]
+
+    def test_acyclic_graph(self):
+        """Test that an acyclic graph has no cycles or cyclic components"""
+        graph = {"a": ("b", "c"), "b": ("c",), "c": ()}
+
+        assert api._find_cycles(graph) == ([], [])
+        assert api._cyclic_components(graph) == []
+
+    def test_matches_recursive_search(self):
+        """Test cyclic components and reported cycles on random graphs"""
+        rng = random.Random(42)
+
+        for _ in range(500):
+            graph = _random_graph(rng)
+            cycles, components = api._find_cycles(graph)
+            reachable = {node: _reachable(graph, node) for node in graph}
+
+            # Components are exactly the mutually reachable sets of nodes on a cycle
+            cyclic_nodes = {node for node, targets in reachable.items() if node in targets}
+            assert {node for component in components for node in component} == cyclic_nodes
+            for component in components:
+                members = set(component)
+                for node in component:
+                    assert members <= reachable[node] | {node}
+                    assert not any(
+                        other in reachable[node] and node in reachable[other]
+                        for other in cyclic_nodes - members
+                    )
+            assert sorted(map(sorted, components)) == sorted(map(sorted, api._cyclic_components(graph)))
+
+            # Every reported cycle is a closed path of graph edges within one component
+            for cycle in cycles:
+                assert cycle[0] == cycle[-1]
+                assert all(target in graph.get(source, ()) for source, target in zip(cycle, cycle[1:]))
+                assert any(set(cycle) <= set(component) for component in components)
+
+            # Cycles are found exactly when the recursive search finds any, and
+            # every cyclic component contains at least one reported cycle
+            assert bool(cycles) == bool(_dfs_cycles(graph))
+            for component in components:
+                assert any(set(cycle) <= set(component) for cycle in cycles)
+            for cycle in _dfs_cycles(graph):
+                assert set(cycle) <= cyclic_nodes
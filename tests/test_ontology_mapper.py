@@ -0,0 +1,189 @@
+"""
+Test suite for the medical device ontology mapper
+Tests concept-name normalization and the cached lookups used when mapping entities
+"""
+
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from backend.ai_extraction.ontology_mapper import MedicalDeviceOntologyMapper
+
+
+def _regex_normalize(name):
+    """Reference normalization with the regular expressions the mapper used to run"""
+    if not name or name == "unknown":
+        return ""
+
+    normalized = re.sub(r'[^\w\s]', ' ', name.lower())
+    normalized = re.sub(r'\s+', ' ', normalized).strip()
+
+    for prefix in ['the ', 'a ', 'an ']:
+        if normalized.startswith(prefix):
+            normalized = normalized[len(prefix):]
+    for suffix in [' system', ' assembly', ' unit', ' device']:
+        if normalized.endswith(suffix):
+            normalized = normalized[:-len(suffix)]
+
+    return normalized.strip()
+
+
+@pytest.fixture(scope="module")
+def mapper():
+    """Mapper shared by the tests, its concept data is read-only"""
+    return MedicalDeviceOntologyMapper()
+
+
+class TestNormalization:
+    """Test concept-name normalization"""
+
+    @pytest.mark.parametrize("name", [
+        "Multi-Leaf Collimator System",
+        "The MLC (120 leaves), unit",
+        "gantry_angle: 90/180",
+        "Beam   Delivery\tSystem",
+        "Gantry rotation – 360°",
+        "Dose rate ± 5%",
+        "Operator’s console",
+        "Kollimator-Einheit Größe",
+        "",
+        "unknown"
+    ])
+    def test_matches_regex_normalization(self, mapper, name):
+        """Test that ASCII and non-ASCII names normalize as with the regex"""
+        assert mapper._normalize_concept_name(name) == _regex_normalize(name)
+
+    def test_non_ascii_symbols_are_blanked(self, mapper):
+        """Test that symbols common in LINAC manuals separate words"""
+        assert mapper._normalize_concept_name("Gantry–Rotation 90°±0.5") == "gantry rotation 90 0 5"
+        assert mapper._normalize_concept_name("Operator’s Console") == "operator s console"
+
+
+def _reference_partial_matches(mapper, entity_name, entity_type, device_type):
+    """Reference partial matching that re-splits both names for every comparison"""
+    matches = []
+
+    for concept in mapper.medical_device_concepts.get(device_type, {}).get(entity_type, []):
+        for candidate in [concept.concept_name] + concept.synonyms:
+            similarity = mapper._calculate_name_similarity(entity_name, candidate)
+            if similarity >= mapper.similarity_thresholds["minimum"]:
+                matches.append((concept, similarity))
+
+    matches.sort(key=lambda x: x[1], reverse=True)
+
+    return [(concept, score) for concept, score in matches if score >= mapper.similarity_thresholds["partial_match"]]
+
+
+class TestConceptWordSets:
+    """Test the normalized names and word sets cached on concepts"""
+
+    def test_cached_terms_match_concept_names(self, mapper):
+        """Test that every concept carries the normalized forms of its names"""
+        for type_concepts in mapper.medical_device_concepts.values():
+            for concepts in type_concepts.values():
+                for concept in concepts:
+                    normalized = mapper._normalize_concept_name(concept.concept_name)
+                    assert concept._normalized_name == normalized
+                    assert concept._word_set == frozenset(normalized.split())
+                    assert concept._normalized_synonyms == [
+                        mapper._normalize_concept_name(synonym) for synonym in concept.synonyms
+                    ]
+                    assert concept._synonym_word_sets == [
+                        frozenset(name.split()) for name in concept._normalized_synonyms
+                    ]
+
+    @pytest.mark.parametrize("entity_name, entity_type", [
+        ("Leaf Motor", "components"),
+        ("MLC Leaf Motor", "components"),
+        ("Servo Motor Drive", "components"),
+        ("Multi Leaf Collimator", "subsystems"),
+        ("Gantry", "subsystems"),
+        ("Patient Positioning", "subsystems"),
+        ("Movement Error", "error_codes"),
+        ("Beam", "subsystems")
+    ])
+    def test_partial_matches_use_cached_word_sets(self, mapper, entity_name, entity_type):
+        """Test partial matching against similarity scoring of the raw names"""
+        assert mapper._find_partial_matches(entity_name, entity_type, "linear_accelerator") == \
+            _reference_partial_matches(mapper, entity_name, entity_type, "linear_accelerator")
+
+
+def _mapping_fields(mappings):
+    """Comparable fields of concept mappings, without generated ids and timestamps"""
+    return [
+        (m.entity_name, m.entity_type, m.concept_id, m.concept_name,
+         m.mapping_confidence, m.mapping_type, m.evidence)
+        for m in mappings
+    ]
+
+
+class TestMappingCache:
+    """Test memoization of name-based concept mappings"""
+
+    def test_shared_name_reuses_mapping(self):
+        """Test that entities sharing a name map like a fresh mapper would map them"""
+        mapper = MedicalDeviceOntologyMapper()
+        first = SimpleNamespace(id="motor-1", name="Leaf Motor", description="Drives an MLC leaf")
+        second = SimpleNamespace(id="motor-2", name="Leaf Motor", description="Drives an MLC leaf")
+
+        first_mappings = mapper._map_single_entity(first, "components", "linear_accelerator")
+        second_mappings = mapper._map_single_entity(second, "components", "linear_accelerator")
+        uncached = MedicalDeviceOntologyMapper()._map_single_entity(second, "components", "linear_accelerator")
+
+        assert len(mapper._map_cache) == 1
+        assert _mapping_fields(second_mappings) == _mapping_fields(first_mappings) == _mapping_fields(uncached)
+
+        # Concept matches carry the id of the entity being mapped
+        exact = [m for m in second_mappings if m.mapping_type == "exact_match" and m.concept_id.startswith("MDO:")]
+        assert exact
+        assert all(m.entity_id == "motor-2" for m in exact)
+
+    def test_key_uses_normalized_name_type_and_device(self):
+        """Test which inputs share a cache entry"""
+        mapper = MedicalDeviceOntologyMapper()
+
+        for name in ["Leaf Motor", "leaf-motor", "The LEAF MOTOR"]:
+            mapper._map_single_entity(SimpleNamespace(id=name, name=name), "components", "linear_accelerator")
+        assert len(mapper._map_cache) == 1
+
+        mapper._map_single_entity(SimpleNamespace(id="x", name="Leaf Motor"), "subsystems", "linear_accelerator")
+        mapper._map_single_entity(SimpleNamespace(id="y", name="Leaf Motor"), "components", "other_device")
+        assert len(mapper._map_cache) == 3
+
+    def test_returned_mappings_are_fresh(self):
+        """Test that editing a returned mapping does not leak into later results"""
+        mapper = MedicalDeviceOntologyMapper()
+        entity = SimpleNamespace(id="motor-1", name="Leaf Motor")
+
+        mappings = mapper._map_single_entity(entity, "components", "linear_accelerator")
+        expected = _mapping_fields(mappings)
+        for mapping in mappings:
+            mapping.mapping_confidence = 0.0
+            mapping.validation_status = "rejected"
+
+        again = mapper._map_single_entity(entity, "components", "linear_accelerator")
+        assert _mapping_fields(again) == expected
+        assert all(m.validation_status == "pending" for m in again)
+
+
+class TestConceptIndex:
+    """Test the flattened (device type, entity type) concept lookup"""
+
+    def test_index_matches_nested_concepts(self, mapper):
+        """Test that every nested concept list is indexed under its key"""
+        expected = {
+            (device_type, entity_type): concepts
+            for device_type, type_concepts in mapper.medical_device_concepts.items()
+            for entity_type, concepts in type_concepts.items()
+        }
+
+        assert mapper._concepts_by_key.keys() == expected.keys()
+        for key, concepts in expected.items():
+            assert mapper._concepts_by_key[key] is concepts
+
+    def test_unknown_keys_have_no_matches(self, mapper):
+        """Test that unknown device or entity types find no concepts"""
+        assert mapper._find_exact_matches("Leaf Motor", "components", "unknown_device") == []
+        assert mapper._find_partial_matches("Leaf Motor", "unknown_type", "linear_accelerator") == []
+        assert [c.concept_id for c in mapper._find_exact_matches("Leaf Motor", "components", "linear_accelerator")]
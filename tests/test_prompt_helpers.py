@@ -0,0 +1,212 @@
+"""
+Test suite for the prompt helpers of the AI extraction pipeline
+Tests the prompt response cache and the byte-bounded page content chunking
+"""
+
+import asyncio
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from backend.ai_extraction import prompt_cache
+from backend.ai_extraction.gemini_client import ExtractionConfig, GeminiClient
+from backend.ai_extraction.prompt_cache import PromptCache, SemanticPromptCache
+from backend.ai_extraction.prompt_templates import _chunk_page_content
+
+
+class FakeClock:
+    """Stand-in for time.time that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze the prompt cache's clock"""
+    fake = FakeClock()
+    monkeypatch.setattr(prompt_cache.time, "time", fake)
+    return fake
+
+
+class TestPromptCache:
+    """Test expiry, eviction and statistics of the exact-match prompt cache"""
+
+    def test_hit_and_miss(self, clock):
+        """Test that stored responses are returned and counted"""
+        cache = PromptCache()
+        key = PromptCache.cache_key("prompt", "model")
+
+        assert cache.get(key) is None
+        cache.set(key, "response")
+        assert cache.get(key) == "response"
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_cache_key_separates_parts(self):
+        """Test that keys depend on how the prompt is split into parts"""
+        assert PromptCache.cache_key("ab", "c") != PromptCache.cache_key("a", "bc")
+        assert PromptCache.cache_key("a", "b") == PromptCache.cache_key("a", "b")
+
+    def test_ttl_expiry(self, clock):
+        """Test that entries expire after the default or per-entry TTL"""
+        cache = PromptCache(default_ttl=60)
+        cache.set("default", "a")
+        cache.set("short", "b", ttl=10)
+
+        clock.now += 10
+        assert cache.get("short") == "b"
+        assert cache.get("default") == "a"
+
+        clock.now += 1
+        assert cache.get("short") is None
+        assert cache.get("default") == "a"
+
+        clock.now += 50
+        assert cache.get("default") is None
+        assert cache.get_stats()["entries"] == 0
+
+    def test_eviction_of_oldest_insertion(self, clock):
+        """Test that the oldest insertion is evicted at the size bound"""
+        cache = PromptCache(max_entries=2)
+        cache.set("first", "1")
+        cache.set("second", "2")
+
+        # Overwriting an existing key does not evict
+        cache.set("first", "1b")
+        assert cache.get_stats()["entries"] == 2
+
+        cache.set("third", "3")
+        assert cache.get("first") is None
+        assert cache.get("second") == "2"
+        assert cache.get("third") == "3"
+
+    def test_clear(self, clock):
+        """Test that clearing drops entries and statistics"""
+        cache = PromptCache()
+        cache.set("key", "value")
+        cache.get("key")
+
+        cache.clear()
+
+        assert cache.get_stats() == {"hits": 0, "misses": 0, "hit_rate": 0.0, "entries": 0}
+
+
+class TestSemanticPromptCache:
+    """Test similarity lookup of the semantic prompt cache"""
+
+    def test_similar_page_reuses_response(self, clock):
+        """Test that a near-identical page is answered and embedded once per lookup"""
+        calls = []
+
+        def embed(text):
+            calls.append(text)
+            return [1.0, 0.0] if text.startswith("page") else [0.0, 1.0]
+
+        cache = SemanticPromptCache(embed_fn=embed)
+
+        assert cache.get_similar("prefix", "page 1") is None
+        cache.add_similar("prefix", "page 1", "response")
+        assert cache.get_similar("prefix", "page 2") == "response"
+        assert cache.get_similar("prefix", "other") is None
+        assert cache.get_similar("other prefix", "page 2") is None
+
+        # The miss for "other" is stored without embedding it again
+        cache.add_similar("prefix", "other", "other response")
+        assert calls == ["page 1", "page 2", "other"]
+        assert cache.get_stats()["semantic_hits"] == 1
+
+    def test_similar_entries_expire(self, clock):
+        """Test that similarity entries expire with their TTL"""
+        cache = SemanticPromptCache(embed_fn=lambda text: [1.0, 0.0], default_ttl=60)
+        cache.add_similar("prefix", "page", "response")
+
+        clock.now += 61
+
+        assert cache.get_similar("prefix", "page") is None
+
+    def test_requires_sentence_transformers_without_embed_fn(self, monkeypatch):
+        """Test that the default embedder reports the missing optional dependency"""
+        monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+
+        with pytest.raises(ImportError):
+            SemanticPromptCache()
+
+    def test_client_falls_back_to_exact_cache(self, monkeypatch):
+        """Test that the client disables the semantic tier without sentence-transformers"""
+        monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+
+        client = GeminiClient(api_key="test", config=ExtractionConfig(temperature=0, semantic_cache_threshold=0.9))
+
+        assert type(client.response_cache) is PromptCache
+
+    def test_client_embeds_off_the_event_loop(self):
+        """Test that the client embeds pages in worker threads, once per missed page"""
+        embed_threads = []
+
+        def embed(text):
+            embed_threads.append(threading.current_thread())
+            return [0.0, 1.0] if text == "page three" else [1.0, 0.0]
+
+        client = GeminiClient(api_key="test", config=ExtractionConfig(temperature=0))
+        client.config.semantic_cache_threshold = 0.9
+        client.response_cache = SemanticPromptCache(embed_fn=embed)
+        client.model = SimpleNamespace(generate_content=lambda prompt: SimpleNamespace(text="response"))
+
+        async def run():
+            await client._generate_response("prefix page one", page_content="page one")
+            await client._generate_response("prefix page two", page_content="page two")
+            await client._generate_response("prefix page three", page_content="page three")
+            return threading.current_thread()
+
+        loop_thread = asyncio.run(run())
+
+        # The first page is embedded when stored, the second when it is looked
+        # up and found, the third when it is looked up and missed, and it is
+        # then stored with the vector from that lookup
+        assert len(embed_threads) == 3
+        assert all(thread is not loop_thread for thread in embed_threads)
+        assert client.response_cache.get_stats()["semantic_hits"] == 1
+
+
+class TestChunkPageContent:
+    """Test byte-bounded chunking of page content"""
+
+    def test_small_page_is_one_chunk(self):
+        """Test that content within the budget is not split"""
+        assert list(_chunk_page_content("one\n\ntwo", 100)) == ["one\n\ntwo"]
+
+    def test_paragraphs_are_packed(self):
+        """Test that whole paragraphs are packed up to the budget"""
+        chunks = list(_chunk_page_content("aaaa\n\nbbbb\n\ncccc", 10))
+
+        assert chunks == ["aaaa\n\nbbbb", "cccc"]
+
+    def test_oversized_ascii_paragraph_fills_budget(self):
+        """Test that an oversized ASCII paragraph is split into full-size chunks"""
+        chunks = list(_chunk_page_content("a" * 25, 10))
+
+        assert chunks == ["a" * 10, "a" * 10, "a" * 5]
+
+    @pytest.mark.parametrize("max_bytes", [4, 5, 7, 16, 33])
+    def test_multibyte_chunks_stay_within_budget(self, max_bytes):
+        """Test that chunks never exceed the byte budget or split a character"""
+        page = "\n\n".join(["Beam é 漢字 😀 " * 5, "x" * 40, "ü" * 30])
+
+        chunks = list(_chunk_page_content(page, max_bytes))
+
+        assert all(len(chunk.encode("utf-8")) <= max_bytes for chunk in chunks)
+        assert "".join(chunks).replace("\n", "") == page.replace("\n", "")
+
+    def test_no_room_for_content(self):
+        """Test that a non-positive budget is rejected"""
+        with pytest.raises(ValueError):
+            list(_chunk_page_content("text", 0))
@@ -0,0 +1,106 @@
+"""
+Test suite for the prompt templates of the AI extraction pipeline
+Tests the relationship detection and LINAC subsystem prompt builders
+"""
+
+import warnings
+
+import pytest
+
+from backend.ai_extraction.prompt_templates import (
+    PromptParts, build_all_subsystem_prompts, build_linac_subsystem_prompt, build_linac_subsystem_prompts,
+    build_relationship_detection_prompt
+)
+
+
+class TestRelationshipDetectionPrompt:
+    """Test the relationship detection prompt builder"""
+
+    def test_entities_and_context_in_user_part(self):
+        """Test that the per-call data is in the user part, after a static system part"""
+        entities = [{"name": "MLC", "type": "component"}, {"code": "E42", "type": "error_code"}]
+
+        prompt = build_relationship_detection_prompt(entities, "The MLC raises E42.")
+        other = build_relationship_detection_prompt([{"name": "Gantry"}], "Other text")
+
+        assert isinstance(prompt, PromptParts)
+        assert prompt.system is other.system
+        assert "MLC" not in prompt.system
+        assert "- MLC (component)\n- E42 (error_code)" in prompt.user
+        assert prompt.user.index("E42 (error_code)") < prompt.user.index("The MLC raises E42.")
+        assert prompt.text == prompt.system + "\n\n" + prompt.user
+
+    @pytest.mark.parametrize("entity, line", [
+        ({"name": "MLC", "code": "E1", "type": "component"}, "- MLC (component)"),
+        ({"code": "E1", "type": "error_code"}, "- E1 (error_code)"),
+        ({"name": "", "code": "E1"}, "-  (Unknown)"),
+        ({"name": None, "code": "E1"}, "- None (Unknown)"),
+        ({"type": "component"}, "- Unknown (component)")
+    ])
+    def test_entity_label_fallback(self, entity, line):
+        """Test that an entity's name is used whenever present, then its code"""
+        prompt = build_relationship_detection_prompt([entity], "context")
+
+        assert prompt.user.splitlines()[1] == line
+
+    def test_device_type_is_deprecated(self):
+        """Test that passing the ignored device type warns and changes nothing"""
+        entities = [{"name": "MLC", "type": "component"}]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            expected = build_relationship_detection_prompt(entities, "context")
+
+        with pytest.warns(DeprecationWarning):
+            prompt = build_relationship_detection_prompt(entities, "context", device_type="ct_scanner")
+
+        assert prompt == expected
+
+
+class TestLinacSubsystemPrompt:
+    """Test the LINAC subsystem prompt builders"""
+
+    def test_prompt_layout(self):
+        """Test that the subsystem instructions lead and the page follows in the user part"""
+        prompt = build_linac_subsystem_prompt("Leaf motor 12 stalled.", "MLCSystem")
+
+        assert "MLCSystem" in prompt.system
+        assert "Leaf motor 12 stalled." not in prompt.system
+        assert prompt.user == "**CONTENT TO ANALYZE:**\nLeaf motor 12 stalled.\n\n**BEGIN SUBSYSTEM EXTRACTION:**"
+
+    def test_system_part_is_shared(self):
+        """Test that prompts for one subsystem share their system part"""
+        first = build_linac_subsystem_prompt("Page one", "GantrySystem")
+        second = build_linac_subsystem_prompt("Page two", "GantrySystem")
+        other = build_linac_subsystem_prompt("Page one", "ImagingSystem")
+
+        assert first.system is second.system
+        assert first.system != other.system
+        assert first.user == other.user
+
+    def test_batch_matches_single_prompts(self):
+        """Test that batch building gives the prompts built page by page"""
+        pages = ["Page one", "", "Page three"]
+
+        prompts = list(build_linac_subsystem_prompts(pages, "SafetySystem"))
+
+        assert prompts == [build_linac_subsystem_prompt(page, "SafetySystem") for page in pages]
+
+    def test_unknown_subsystem(self):
+        """Test that unknown subsystems are rejected by both builders"""
+        with pytest.raises(ValueError):
+            build_linac_subsystem_prompt("Page", "WarpDrive")
+        with pytest.raises(ValueError):
+            build_linac_subsystem_prompts(["Page"], "WarpDrive")
+
+    def test_all_subsystem_prompts(self):
+        """Test that every page gets a prompt for every subsystem"""
+        pages = ["Page one", "Page two"]
+
+        prompts = build_all_subsystem_prompts(pages)
+
+        subsystems = {subsystem for _, subsystem in prompts}
+        assert "MLCSystem" in subsystems
+        assert len(prompts) == len(pages) * len(subsystems)
+        for (page_index, subsystem), prompt in prompts.items():
+            assert prompt == build_linac_subsystem_prompt(pages[page_index], subsystem)